@@ -0,0 +1,39 @@
+"""Add composite indexes for keyset pagination of users
+
+Revision ID: 10be8d25a0e7
+Revises: 20fc361c721b
+Create Date: 2026-10-17 12:40:18.335904
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '10be8d25a0e7'
+down_revision: Union[str, Sequence[str], None] = '20fc361c721b'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Keyset pagination cannot address rows with a NULL sort key
+    op.execute("UPDATE users SET created_at = now() WHERE created_at IS NULL;")
+    op.alter_column('users', 'created_at', existing_type=sa.DateTime(), nullable=False)
+
+    op.create_index('idx_user_created_at_id', 'users', ['created_at', 'id'], unique=False)
+    op.create_index('idx_user_role_created_at_id', 'users', ['role', 'created_at', 'id'], unique=False)
+    op.create_index('idx_user_is_active_created_at_id', 'users', ['is_active', 'created_at', 'id'], unique=False)
+    op.create_index('idx_user_language_created_at_id', 'users', ['preferred_language', 'created_at', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('idx_user_language_created_at_id', table_name='users')
+    op.drop_index('idx_user_is_active_created_at_id', table_name='users')
+    op.drop_index('idx_user_role_created_at_id', table_name='users')
+    op.drop_index('idx_user_created_at_id', table_name='users')
+    op.alter_column('users', 'created_at', existing_type=sa.DateTime(), nullable=True)
@@ -0,0 +1,41 @@
+"""Create local password_resets table
+
+Revision ID: 20fc361c721b
+Revises: 85153fdbde56
+Create Date: 2026-10-17 11:26:52.840117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import UUID
+
+
+# revision identifiers, used by Alembic.
+revision: str = '20fc361c721b'
+down_revision: Union[str, Sequence[str], None] = '85153fdbde56'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # The table previously written through the Supabase client stored raw
+    # tokens; outstanding reset links are invalidated rather than migrated.
+    op.execute("DROP TABLE IF EXISTS password_resets CASCADE;")
+    op.create_table(
+        'password_resets',
+        sa.Column('id', UUID(as_uuid=True), primary_key=True, server_default=sa.text("gen_random_uuid()")),
+        sa.Column('user_id', UUID(as_uuid=True), sa.ForeignKey("users.id", ondelete="CASCADE"), nullable=False),
+        sa.Column('token_digest', sa.String(length=64), nullable=False),
+        sa.Column('expires_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    )
+    op.create_index('idx_password_reset_token_digest', 'password_resets', ['token_digest'], unique=True)
+    op.create_index('idx_password_reset_expires_at', 'password_resets', ['expires_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('password_resets')
@@ -0,0 +1,32 @@
+"""Create job_runs table for scheduled job bookkeeping
+
+Revision ID: 4e7a9c2b51d8
+Revises: 10be8d25a0e7
+Create Date: 2026-10-17 16:05:41.218734
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4e7a9c2b51d8'
+down_revision: Union[str, Sequence[str], None] = '10be8d25a0e7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'job_runs',
+        sa.Column('name', sa.String(length=64), primary_key=True),
+        sa.Column('last_completed_at', sa.DateTime(timezone=True), nullable=False),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('job_runs')
@@ -0,0 +1,28 @@
+"""Add users.token_version revocation epoch
+
+Revision ID: 85153fdbde56
+Revises: dfe8f90168bb
+Create Date: 2026-10-17 10:03:41.207915
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '85153fdbde56'
+down_revision: Union[str, Sequence[str], None] = 'dfe8f90168bb'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('users', sa.Column('token_version', sa.Integer(), server_default=sa.text('0'), nullable=False))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('users', 'token_version')
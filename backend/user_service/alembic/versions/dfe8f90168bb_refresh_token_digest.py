@@ -0,0 +1,36 @@
+"""Store refresh tokens as a uniquely indexed HMAC digest
+
+Revision ID: dfe8f90168bb
+Revises: 033bba3f0b9a
+Create Date: 2026-10-17 09:12:04.518233
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'dfe8f90168bb'
+down_revision: Union[str, Sequence[str], None] = '033bba3f0b9a'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Existing rows hold salted bcrypt hashes that can never be matched again,
+    # so they are dropped instead of migrated. Affected clients log in again.
+    op.execute("DELETE FROM refresh_tokens;")
+    op.drop_column('refresh_tokens', 'token')
+    op.add_column('refresh_tokens', sa.Column('token_digest', sa.String(length=64), nullable=False))
+    op.create_index('idx_refresh_token_token_digest', 'refresh_tokens', ['token_digest'], unique=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DELETE FROM refresh_tokens;")
+    op.drop_index('idx_refresh_token_token_digest', table_name='refresh_tokens')
+    op.drop_column('refresh_tokens', 'token_digest')
+    op.add_column('refresh_tokens', sa.Column('token', sa.String(), nullable=False))
@@ -4,13 +4,63 @@ from pydantic import SecretStr, AnyUrl, validator
 class Settings(BaseSettings):
     # Database
     DATABASE_URL: str
+    # Comma-separated read replica URLs; plain SELECTs are spread across them
+    DATABASE_REPLICA_URLS: str = ""
+    REPLICA_MAX_LAG_SECONDS: float = 5.0           # lagging replicas are skipped
+    REPLICA_HEALTH_CHECK_INTERVAL_SECONDS: float = 10.0
+    REPLICA_RETRY_AFTER_SECONDS: float = 30.0      # how long a failed replica is skipped
+
+    # Connection pool
+    DB_POOL_SIZE: int = 5                 # connections kept open
+    DB_MAX_OVERFLOW: int = 10             # extra connections allowed under load
+    DB_POOL_TIMEOUT: int = 30             # seconds to wait for a connection
+    DB_POOL_RECYCLE: int = 300            # seconds before a connection is replaced
+    # Adaptive mode sizes the pool from observed concurrency, between
+    # DB_POOL_MIN_SIZE and DB_POOL_SIZE + DB_MAX_OVERFLOW, and replaces
+    # per-checkout pre-ping with background liveness checks.
+    DB_POOL_ADAPTIVE: bool = False
+    DB_POOL_MIN_SIZE: int = 2
+    DB_POOL_ADAPT_INTERVAL_SECONDS: float = 30.0
+    DB_POOL_SHRINK_AFTER_INTERVALS: int = 3   # quiet intervals before shrinking
+    DB_POOL_LIVENESS_INTERVAL_SECONDS: float = 30.0
+
+    # Query logging. Statements at or above the threshold are logged (without
+    # parameters); DB_ECHO logs every statement with parameters, for local
+    # debugging only.
+    SLOW_QUERY_THRESHOLD_MS: float = 200.0
+    DB_ECHO: bool = False
+
+    # Request profiling (opt-in). Profiles a random fraction of requests,
+    # plus requests sent by an admin with PROFILING_HEADER set.
+    PROFILING_ENABLED: bool = False
+    PROFILING_SAMPLE_RATE: float = 0.0
+    PROFILING_INTERVAL_MS: float = 5.0    # stack sampling interval
+    PROFILING_HEADER: str = "X-Profile"
 
     # JWT Settings
     JWT_SECRET: SecretStr                     # considered sensitive
     JWT_ALGORITHM: str = "HS256"
+    # Implementation for HS256/384/512: hmac (standard library fast path),
+    # jose, or pyjwt (needs PyJWT). Tokens are interchangeable between them.
+    JWT_BACKEND: str = "hmac"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 15
     REFRESH_TOKEN_EXPIRE_DAYS: int = 7
     RESET_TOKEN_EXPIRE_MINUTES: int = 15
+    # Key for the HMAC-SHA256 digest used to look up stored refresh tokens.
+    # Falls back to JWT_SECRET when not set.
+    REFRESH_TOKEN_DIGEST_KEY: SecretStr | None = None
+    # Asymmetric signing (JWT_ALGORITHM=RS256, ES256, ...). JWT_KEYS_DIR holds
+    # one PEM file per key, named <kid>.pem. JWT_ACTIVE_KEY_ID signs new
+    # tokens; the others only verify. All public keys are served at
+    # /.well-known/jwks.json, cacheable for JWKS_MAX_AGE_SECONDS.
+    JWT_KEYS_DIR: str | None = None
+    JWT_ACTIVE_KEY_ID: str | None = None
+    JWKS_MAX_AGE_SECONDS: int = 300
+
+    @property
+    def replica_urls(self) -> list[str]:
+        """Return the configured read replica URLs"""
+        return [url.strip() for url in self.DATABASE_REPLICA_URLS.split(",") if url.strip()]
 
     # Backwards-compat alias
     @property
@@ -18,6 +68,39 @@ class Settings(BaseSettings):
         """Return JWT secret as plain string for libraries like python-jose"""
         return self.JWT_SECRET.get_secret_value()
 
+    @property
+    def refresh_token_digest_key(self) -> bytes:
+        """Return the key used to digest refresh tokens before storing them"""
+        key = self.REFRESH_TOKEN_DIGEST_KEY or self.JWT_SECRET
+        return key.get_secret_value().encode("utf-8")
+
+    # Token revocation epoch cache. A bumped version is seen by other
+    # workers within this many seconds.
+    TOKEN_VERSION_CACHE_TTL_SECONDS: int = 30
+    TOKEN_VERSION_CACHE_MAX_ENTRIES: int = 10000
+    INTROSPECTION_MAX_TOKENS: int = 100   # tokens per /auth/introspect call
+    # Verified-token cache; decoded payloads are reused until the token's exp.
+    # 0 disables it.
+    TOKEN_CACHE_MAX_ENTRIES: int = 10000
+
+    # User row cache. Rows include the password hash and token version, so
+    # the TTL is capped at TOKEN_VERSION_CACHE_TTL_SECONDS.
+    USER_CACHE_ENABLED: bool = True
+    USER_CACHE_TTL_SECONDS: int = 30
+    USER_CACHE_MAX_ENTRIES: int = 10000
+
+    # Password hashing pool
+    PASSWORD_HASH_WORKERS: int = 2        # 0 runs bcrypt in the default thread pool
+    PASSWORD_HASH_MAX_PENDING: int = 32   # queued calls allowed before returning 503
+
+    # Admin bulk user import
+    USER_IMPORT_BATCH_SIZE: int = 500
+    # Passwords an import hashes at once; 0 uses every hashing worker, and
+    # logins still get the pending slots
+    USER_IMPORT_HASH_CONCURRENCY: int = 0
+    # Ids plus emails accepted by one bulk user lookup
+    USER_LOOKUP_MAX_KEYS: int = 500
+
     # Default Admin
     DEFAULT_ADMIN_EMAIL: str
     DEFAULT_ADMIN_PASSWORD: str
@@ -40,10 +123,19 @@ class Settings(BaseSettings):
     SMTP_PASS: SecretStr
     SMTP_HOST: str = "smtp.gmail.com"
     SMTP_PORT: int = 587
+    SMTP_USE_TLS: bool = True
     FRONTEND_URL: str
 
+    # Background email dispatcher
+    EMAIL_WORKERS: int = 2                # at least 1; each keeps one SMTP connection open
+    EMAIL_QUEUE_MAX_SIZE: int = 1000
+    EMAIL_MAX_RETRIES: int = 3
+    EMAIL_RETRY_BASE_DELAY: float = 1.0   # seconds, doubled after each failed attempt
+
     # Cleanup Job
     CLEANUP_SCHEDULE_HOUR: int = 0
+    CLEANUP_CHUNK_SIZE: int = 1000               # rows deleted per transaction
+    CLEANUP_CHUNK_PAUSE_SECONDS: float = 0.1     # pause between chunks
 
     # allow reading .env
     model_config = SettingsConfigDict(
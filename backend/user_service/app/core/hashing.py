@@ -0,0 +1,136 @@
+import asyncio
+import multiprocessing
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Any, Callable
+
+from ..core.config import settings
+from ..core.metrics import password_hash_duration_seconds, registry
+from ..core.security import get_password_hash, verify_password
+
+
+class PasswordHasherBusy(Exception):
+    """Raised when the password hashing pool has no free capacity."""
+
+
+class PasswordHasher:
+    """
+    Run bcrypt hashing and verification off the event loop.
+
+    Work is submitted to a bounded ProcessPoolExecutor. At most
+    `workers + max_pending` calls may be in flight at once; anything beyond
+    that is rejected straight away with PasswordHasherBusy so a login storm
+    turns into fast 503s instead of an ever-growing queue.
+    With `workers=0` the calls run in the default thread pool instead.
+    """
+
+    def __init__(self, workers: int, max_pending: int):
+        self.workers = workers
+        self.max_pending = max_pending
+        self._executor: Executor | None = None
+        self._in_flight = 0
+        self._peak_in_flight = 0
+        self._completed = 0
+        self._rejected = 0
+        self._busy_seconds = 0.0
+
+    @property
+    def capacity(self) -> int:
+        return max(self.workers, 1) + self.max_pending
+
+    def start(self) -> None:
+        if self._executor is None and self.workers > 0:
+            # "spawn" avoids forking a process that is running an event loop
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+    async def _run(self, operation: str, func: Callable[..., Any], *args: Any) -> Any:
+        if self._in_flight >= self.capacity:
+            self._rejected += 1
+            raise PasswordHasherBusy("Password hashing pool is saturated")
+
+        self.start()
+        self._in_flight += 1
+        self._peak_in_flight = max(self._peak_in_flight, self._in_flight)
+        started = time.perf_counter()
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, func, *args)
+        finally:
+            elapsed = time.perf_counter() - started
+            self._in_flight -= 1
+            self._completed += 1
+            self._busy_seconds += elapsed
+            password_hash_duration_seconds.observe(elapsed, operation=operation)
+
+    async def hash(self, password: str) -> str:
+        return await self._run("hash", get_password_hash, password)
+
+    async def hash_many(self, passwords: list[str], concurrency: int | None = None) -> list[str | PasswordHasherBusy]:
+        """
+        Hash a batch of passwords in parallel, one pool call each, at most
+        `concurrency` at a time (default: one per worker).
+
+        Each call is admitted like a login's, so a large batch never holds
+        more than `concurrency` slots; the pending slots stay free for
+        logins, which wait behind at most one hash per worker. A password rejected because the pool is saturated comes
+        back as a PasswordHasherBusy instance in its position instead of
+        failing the whole batch.
+        """
+        semaphore = asyncio.Semaphore(max(concurrency or self.workers, 1))
+
+        async def hash_one(password: str) -> str | PasswordHasherBusy:
+            async with semaphore:
+                try:
+                    return await self._run("hash_many", get_password_hash, password)
+                except PasswordHasherBusy as e:
+                    return e
+
+        return await asyncio.gather(*(hash_one(password) for password in passwords))
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return await self._run("verify", verify_password, plain_password, hashed_password)
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "max_pending": self.max_pending,
+            "in_flight": self._in_flight,
+            "peak_in_flight": self._peak_in_flight,
+            "utilization": self._in_flight / self.capacity,
+            "completed": self._completed,
+            "rejected": self._rejected,
+            "busy_seconds": round(self._busy_seconds, 6),
+        }
+
+
+password_hasher = PasswordHasher(
+    workers=settings.PASSWORD_HASH_WORKERS,
+    max_pending=settings.PASSWORD_HASH_MAX_PENDING
+)
+
+registry.gauge(
+    "password_hash_in_flight", "Password hashing calls running or queued.",
+    callback=lambda: password_hasher.stats()["in_flight"]
+)
+registry.counter(
+    "password_hash_rejected_total", "Password hashing calls rejected because the pool was saturated.",
+    callback=lambda: password_hasher.stats()["rejected"]
+)
+
+
+async def hash_password_async(password: str) -> str:
+    """Hash a password without blocking the event loop."""
+    return await password_hasher.hash(password)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Verify a password without blocking the event loop."""
+    return await password_hasher.verify(plain_password, hashed_password)
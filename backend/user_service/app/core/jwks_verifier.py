@@ -0,0 +1,108 @@
+"""
+Local verification of this service's tokens, for the other microservices.
+
+    verifier = JWKSVerifier("http://user-service:8000/.well-known/jwks.json")
+    claims = await verifier.verify(token)  # None if invalid, expired or not an access token
+
+The public keys are fetched once and cached for the max-age the endpoint
+sends (or `cache_seconds`), so verifying a token needs no network hop. A
+token signed with a kid that is not cached, e.g. a key rotated in since the
+last fetch, triggers a refetch, at most once every `min_refresh_seconds` so
+made-up kids cannot be used to hammer the endpoint. If a refetch fails the
+cached keys stay in use.
+
+Refresh tokens are signed with the same keys, so only tokens whose
+"token_use" claim is `token_use` ("access") are accepted.
+
+Only depends on httpx and python-jose, so it can be copied as is.
+"""
+import asyncio
+import re
+import time
+from typing import Any
+
+import httpx
+from jose import jwt
+from jose.exceptions import JWTError
+
+DEFAULT_ALGORITHMS = ("RS256", "RS384", "RS512", "ES256", "ES384", "ES512")
+ACCESS_TOKEN_USE = "access"
+
+_MAX_AGE = re.compile(r"max-age=(\d+)")
+
+
+class JWKSVerifier:
+    def __init__(
+        self,
+        jwks_url: str,
+        algorithms: tuple[str, ...] = DEFAULT_ALGORITHMS,
+        cache_seconds: float = 300,
+        min_refresh_seconds: float = 30,
+        client: httpx.AsyncClient | None = None,
+        token_use: str = ACCESS_TOKEN_USE
+    ):
+        self.jwks_url = jwks_url
+        self.algorithms = list(algorithms)
+        self.cache_seconds = cache_seconds
+        self.min_refresh_seconds = min_refresh_seconds
+        self.token_use = token_use
+        self._client = client
+        self._keys: dict[str, dict] = {}
+        self._expires_at = 0.0
+        self._last_fetch = float("-inf")
+        self._lock = asyncio.Lock()
+        self.fetches = 0
+
+    async def _fetch(self) -> None:
+        self._last_fetch = time.monotonic()
+        self.fetches += 1
+        if self._client is not None:
+            response = await self._client.get(self.jwks_url)
+        else:
+            async with httpx.AsyncClient(timeout=5) as client:
+                response = await client.get(self.jwks_url)
+        response.raise_for_status()
+        self._keys = {key["kid"]: key for key in response.json()["keys"] if "kid" in key}
+        match = _MAX_AGE.search(response.headers.get("cache-control", ""))
+        max_age = int(match.group(1)) if match else self.cache_seconds
+        self._expires_at = self._last_fetch + max_age
+
+    def _needs_fetch(self, kid: str) -> bool:
+        now = time.monotonic()
+        if now - self._last_fetch < self.min_refresh_seconds:
+            return False
+        return now >= self._expires_at or kid not in self._keys
+
+    async def get_key(self, kid: str) -> dict | None:
+        if self._needs_fetch(kid):
+            async with self._lock:
+                # Another caller may have refetched while we waited
+                if self._needs_fetch(kid):
+                    try:
+                        await self._fetch()
+                    except (httpx.HTTPError, ValueError, KeyError):
+                        if not self._keys:
+                            raise
+        return self._keys.get(kid)
+
+    async def verify(self, token: str) -> dict[str, Any] | None:
+        """
+        Return the token's claims, or None if it is invalid, expired, signed
+        with an unknown key or not a `token_use` token.
+        """
+        try:
+            header = jwt.get_unverified_header(token)
+        except JWTError:
+            return None
+        if header.get("alg") not in self.algorithms:
+            return None
+        key = await self.get_key(header.get("kid"))
+        if key is None:
+            return None
+        try:
+            claims = jwt.decode(token, key, algorithms=self.algorithms)
+        except JWTError:
+            return None
+        if claims.get("token_use") != self.token_use:
+            return None
+        return claims
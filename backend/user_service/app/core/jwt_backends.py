@@ -0,0 +1,183 @@
+import base64
+import binascii
+import hashlib
+import hmac
+import json
+import time
+from abc import ABC, abstractmethod
+from calendar import timegm
+from datetime import datetime
+from typing import Any
+
+from jose import jwt as jose_jwt
+from jose.exceptions import ExpiredSignatureError, JWTClaimsError, JWTError
+
+from .config import settings
+from .keys import ASYMMETRIC_ALGORITHMS
+
+try:
+    import jwt as pyjwt
+except ImportError:  # PyJWT is optional; only the "pyjwt" backend needs it
+    pyjwt = None
+
+HMAC_DIGESTS = {"HS256": hashlib.sha256, "HS384": hashlib.sha384, "HS512": hashlib.sha512}
+
+_TIME_CLAIMS = ("exp", "iat", "nbf")
+
+
+def _b64encode(data: bytes) -> bytes:
+    return base64.urlsafe_b64encode(data).rstrip(b"=")
+
+
+def _b64decode(data: str) -> bytes:
+    return base64.urlsafe_b64decode(data + "=" * (-len(data) % 4))
+
+
+def _numeric_dates(claims: dict[str, Any]) -> dict[str, Any]:
+    """Turn datetime time claims into NumericDate seconds, as python-jose does."""
+    for claim in _TIME_CLAIMS:
+        value = claims.get(claim)
+        if isinstance(value, datetime):
+            claims = {**claims, claim: timegm(value.utctimetuple())}
+    return claims
+
+
+class JWTBackend(ABC):
+    """
+    Signs and verifies JWTs with one shared-secret algorithm and key.
+
+    The key and anything else that does not depend on the claims is
+    prepared once, in __init__. verify() raises python-jose's
+    ExpiredSignatureError or JWTError whatever the implementation, so
+    callers handle every backend the same way.
+    """
+
+    name = ""
+
+    def __init__(self, algorithm: str, secret: str):
+        if algorithm not in HMAC_DIGESTS:
+            raise ValueError(f"{algorithm} is not a shared-secret JWT algorithm")
+        self.algorithm = algorithm
+        self.secret = secret
+
+    @abstractmethod
+    def sign(self, claims: dict[str, Any]) -> str:
+        ...
+
+    @abstractmethod
+    def verify(self, token: str) -> dict[str, Any]:
+        ...
+
+
+class JoseBackend(JWTBackend):
+    """python-jose, as used before backends existed."""
+
+    name = "jose"
+
+    def sign(self, claims):
+        return jose_jwt.encode(claims, self.secret, algorithm=self.algorithm)
+
+    def verify(self, token):
+        return jose_jwt.decode(token, self.secret, algorithms=[self.algorithm])
+
+
+class HMACBackend(JWTBackend):
+    """
+    Compact JWS with the standard library's hmac.
+
+    The HMAC key schedule is computed once and copied per token, and the
+    encoded header is a constant. Tokens whose header is that constant skip
+    header parsing; any other header must still name our algorithm.
+    Validates exp and nbf like python-jose.
+    """
+
+    name = "hmac"
+
+    def __init__(self, algorithm, secret):
+        super().__init__(algorithm, secret)
+        self._mac = hmac.new(secret.encode("utf-8"), digestmod=HMAC_DIGESTS[algorithm])
+        header = json.dumps({"alg": algorithm, "typ": "JWT"}, separators=(",", ":"), sort_keys=True)
+        self._header = _b64encode(header.encode("utf-8"))
+        self._header_str = self._header.decode("ascii")
+
+    def _signature(self, signing_input: bytes) -> bytes:
+        mac = self._mac.copy()
+        mac.update(signing_input)
+        return mac.digest()
+
+    def sign(self, claims):
+        payload = json.dumps(_numeric_dates(claims), separators=(",", ":")).encode("utf-8")
+        signing_input = self._header + b"." + _b64encode(payload)
+        return (signing_input + b"." + _b64encode(self._signature(signing_input))).decode("ascii")
+
+    def verify(self, token):
+        try:
+            header, payload, signature = token.split(".")
+            if header != self._header_str and json.loads(_b64decode(header)).get("alg") != self.algorithm:
+                raise JWTError("The specified alg value is not allowed")
+            expected = self._signature(f"{header}.{payload}".encode("ascii"))
+            if not hmac.compare_digest(expected, _b64decode(signature)):
+                raise JWTError("Signature verification failed.")
+            claims = json.loads(_b64decode(payload))
+        except JWTError:
+            raise
+        except (ValueError, TypeError, AttributeError, binascii.Error, UnicodeError) as e:
+            raise JWTError(f"Invalid token: {e}")
+        if not isinstance(claims, dict):
+            raise JWTError("Invalid payload: not a JSON object")
+
+        now = int(time.time())
+        try:
+            if "exp" in claims and int(claims["exp"]) < now:
+                raise ExpiredSignatureError("Signature has expired.")
+            if "nbf" in claims and int(claims["nbf"]) > now:
+                raise JWTClaimsError("The token is not yet valid (nbf)")
+        except (TypeError, ValueError):
+            raise JWTClaimsError("Time claims must be integers.")
+        return claims
+
+
+class PyJWTBackend(JWTBackend):
+    """PyJWT, if installed."""
+
+    name = "pyjwt"
+
+    def __init__(self, algorithm, secret):
+        if pyjwt is None:
+            raise ValueError("JWT_BACKEND=pyjwt needs the PyJWT package")
+        super().__init__(algorithm, secret)
+        self._key = secret.encode("utf-8")
+        self._algorithms = [algorithm]
+
+    def sign(self, claims):
+        return pyjwt.encode(claims, self._key, algorithm=self.algorithm)
+
+    def verify(self, token):
+        try:
+            return pyjwt.decode(token, self._key, algorithms=self._algorithms)
+        except pyjwt.ExpiredSignatureError as e:
+            raise ExpiredSignatureError(str(e))
+        except pyjwt.InvalidTokenError as e:
+            raise JWTError(str(e))
+
+
+BACKENDS = {backend.name: backend for backend in (JoseBackend, HMACBackend, PyJWTBackend)}
+
+
+def available_backends() -> list[str]:
+    return [name for name in BACKENDS if name != "pyjwt" or pyjwt is not None]
+
+
+def create_backend(name: str, algorithm: str, secret: str) -> JWTBackend:
+    try:
+        backend = BACKENDS[name]
+    except KeyError:
+        raise ValueError(f"Unknown JWT backend {name!r}; use one of {', '.join(BACKENDS)}")
+    return backend(algorithm, secret)
+
+
+# Shared-secret signing; asymmetric algorithms go through the key ring instead
+jwt_backend = (
+    create_backend(settings.JWT_BACKEND, settings.JWT_ALGORITHM, settings.secret_key)
+    if settings.JWT_ALGORITHM not in ASYMMETRIC_ALGORITHMS else None
+)
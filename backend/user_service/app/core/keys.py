@@ -0,0 +1,83 @@
+import os
+from typing import Any
+
+from jose import jwk, jwt
+from jose.exceptions import JWTError
+
+from .config import settings
+
+ASYMMETRIC_ALGORITHMS = ("RS256", "RS384", "RS512", "ES256", "ES384", "ES512")
+
+
+class KeyRing:
+    """
+    Keys for asymmetrically signed JWTs, by key id (kid).
+
+    New tokens are signed with the active key and carry its kid in the
+    header. Other keys in the ring only verify. To rotate: add a key, make
+    it active, and remove the old one once every token it signed has
+    expired (REFRESH_TOKEN_EXPIRE_DAYS). All public keys are published as
+    a JWK set, so other services can verify tokens without calling us.
+    """
+
+    def __init__(self, algorithm: str, keys: dict[str, str], active_kid: str):
+        if algorithm not in ASYMMETRIC_ALGORITHMS:
+            raise ValueError(f"{algorithm} is not an asymmetric JWT algorithm")
+        if active_kid not in keys:
+            raise ValueError(f"No key with id {active_kid!r} to sign with")
+        self.algorithm = algorithm
+        self.active_kid = active_kid
+        self._signing_key = jwk.construct(keys[active_kid], algorithm)
+        if self._signing_key.is_public():
+            raise ValueError(f"Signing key {active_kid!r} is a public key")
+        self._public_keys = {
+            kid: jwk.construct(pem, algorithm).public_key() for kid, pem in keys.items()
+        }
+        self._headers = {"kid": active_kid}
+        self._jwks = {
+            "keys": [
+                {**key.to_dict(), "kid": kid, "use": "sig"}
+                for kid, key in self._public_keys.items()
+            ]
+        }
+
+    @classmethod
+    def from_directory(cls, algorithm: str, path: str, active_kid: str) -> "KeyRing":
+        """Load every `<kid>.pem` file (private or public key) in `path`."""
+        keys = {}
+        for name in sorted(os.listdir(path)):
+            kid, ext = os.path.splitext(name)
+            if ext == ".pem":
+                with open(os.path.join(path, name)) as f:
+                    keys[kid] = f.read()
+        return cls(algorithm, keys, active_kid)
+
+    @property
+    def kids(self) -> list[str]:
+        return list(self._public_keys)
+
+    def sign(self, claims: dict[str, Any]) -> str:
+        return jwt.encode(claims, self._signing_key, algorithm=self.algorithm, headers=self._headers)
+
+    def verify(self, token: str) -> dict[str, Any]:
+        """Decode `token`, raising JWTError if it is invalid, expired or signed with an unknown key."""
+        kid = jwt.get_unverified_header(token).get("kid")
+        key = self._public_keys.get(kid)
+        if key is None:
+            raise JWTError(f"Unknown signing key {kid!r}")
+        return jwt.decode(token, key, algorithms=[self.algorithm])
+
+    def jwks(self) -> dict:
+        return self._jwks
+
+
+def load_key_ring() -> KeyRing | None:
+    """The configured key ring, or None when tokens are signed with the shared JWT_SECRET."""
+    if settings.JWT_ALGORITHM not in ASYMMETRIC_ALGORITHMS:
+        return None
+    if not settings.JWT_KEYS_DIR or not settings.JWT_ACTIVE_KEY_ID:
+        raise ValueError(f"JWT_ALGORITHM={settings.JWT_ALGORITHM} needs JWT_KEYS_DIR and JWT_ACTIVE_KEY_ID")
+    return KeyRing.from_directory(settings.JWT_ALGORITHM, settings.JWT_KEYS_DIR, settings.JWT_ACTIVE_KEY_ID)
+
+
+key_ring = load_key_ring()
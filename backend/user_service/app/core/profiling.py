@@ -0,0 +1,167 @@
+import os
+import random
+import sys
+import threading
+import uuid
+from collections import Counter
+from typing import Awaitable, Callable
+
+from .config import settings
+from .security import decode_token
+from .token_versions import token_version_cache
+from ..models.user import UserRole
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class StackSampler:
+    """
+    Statistical profiler for one thread.
+
+    A background thread wakes every `interval` seconds and records the
+    target thread's current call stack, root first, in collapsed form
+    ("outer;inner;leaf"). Unlike cProfile this has a fixed, low overhead
+    and sees time spent waiting in the event loop, e.g. for the bcrypt pool
+    or the database.
+    """
+
+    def __init__(self, thread_id: int, interval: float):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                stack.append(_frame_label(frame))
+                frame = frame.f_back
+            if stack:
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def start(self) -> "StackSampler":
+        self._thread.start()
+        return self
+
+    def stop(self) -> Counter:
+        self._stop.set()
+        self._thread.join()
+        return self.stacks
+
+
+class RequestProfiler:
+    """
+    Samples a fraction of requests, plus any request an admin flags with
+    `header`, and aggregates their stacks per route.
+
+    All requests run on the event loop thread, so at most one request is
+    profiled at a time; samples taken while it is in flight include any
+    other request the loop interleaves with it.
+    """
+
+    def __init__(self, sample_rate: float, interval_ms: float, header: str):
+        self.sample_rate = sample_rate
+        self.interval = interval_ms / 1000
+        self.header = header
+        self.profiles: dict[str, Counter] = {}
+        self.requests: Counter = Counter()
+        self._active = False
+
+    async def _flagged_by_admin(
+        self, request, load_version: Callable[[uuid.UUID], Awaitable[int | None]]
+    ) -> bool:
+        if not request.headers.get(self.header):
+            return False
+        scheme, _, token = request.headers.get("authorization", "").partition(" ")
+        payload = decode_token(token) if scheme.lower() == "bearer" else None
+        if payload is None or payload.get("role") != UserRole.ADMIN.value:
+            return False
+        try:
+            user_id = uuid.UUID(str(payload.get("sub")))
+        except ValueError:
+            return False
+
+        # A revoked admin token must not be able to switch profiling on
+        current_version = await token_version_cache.get(user_id, load_version)
+        return current_version is not None and payload.get("ver", 0) == current_version
+
+    async def should_profile(
+        self, request, load_version: Callable[[uuid.UUID], Awaitable[int | None]]
+    ) -> bool:
+        """
+        Decide whether to profile this request. A True result keeps the
+        profiler claimed until finish(); the claim is taken before the
+        token version lookup, so a request interleaved with it is not
+        profiled too.
+        """
+        if self._active:
+            return False
+        self._active = True
+        try:
+            selected = (
+                (self.sample_rate > 0 and random.random() < self.sample_rate)
+                or await self._flagged_by_admin(request, load_version)
+            )
+        except BaseException:
+            self._active = False
+            raise
+        if not selected:
+            self._active = False
+        return selected
+
+    def start(self) -> StackSampler:
+        self._active = True
+        return StackSampler(threading.get_ident(), self.interval).start()
+
+    def finish(self, sampler: StackSampler, route: str) -> int:
+        """Stop sampling and fold the stacks into the route's profile."""
+        try:
+            stacks = sampler.stop()
+        finally:
+            self._active = False
+        self.profiles.setdefault(route, Counter()).update(stacks)
+        self.requests[route] += 1
+        return sum(stacks.values())
+
+    def collapsed(self, route: str | None = None) -> str:
+        """
+        Collapsed-stack text, one "frame;frame;frame count" line per stack,
+        as read by flamegraph.pl and speedscope. Without a route, every
+        route's profile is included under a root frame naming the route.
+        """
+        if route is not None:
+            profiles = {None: self.profiles.get(route, Counter())}
+        else:
+            profiles = self.profiles
+        lines = []
+        for name, stacks in profiles.items():
+            for stack, count in stacks.most_common():
+                lines.append(f"{name};{stack} {count}" if name is not None else f"{stack} {count}")
+        return "\n".join(lines) + "\n" if lines else ""
+
+    def summary(self) -> dict:
+        return {
+            "sample_rate": self.sample_rate,
+            "interval_ms": self.interval * 1000,
+            "routes": {
+                route: {"requests": self.requests[route], "samples": sum(stacks.values())}
+                for route, stacks in self.profiles.items()
+            },
+        }
+
+    def clear(self) -> None:
+        self.profiles.clear()
+        self.requests.clear()
+
+
+request_profiler = RequestProfiler(
+    sample_rate=settings.PROFILING_SAMPLE_RATE,
+    interval_ms=settings.PROFILING_INTERVAL_MS,
+    header=settings.PROFILING_HEADER
+)
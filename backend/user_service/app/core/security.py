@@ -1,12 +1,23 @@
 from datetime import datetime, timedelta
 from typing import Any, Union
+import hashlib
+import hmac
+import secrets
 from jose import jwt
 from passlib.context import CryptContext
 from ..core.config import settings
+from .keys import key_ring
+from .jwt_backends import jwt_backend
+from .token_cache import verified_token_cache
 
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+# "token_use" claim values. Both kinds are signed with the same key, so
+# verifiers must check the claim to tell them apart.
+ACCESS_TOKEN_USE = "access"
+REFRESH_TOKEN_USE = "refresh"
+
 # AES encryption functions are no longer used for phone numbers.
 # Keeping them commented out in case they are needed for other purposes in the future.
 # from cryptography.fernet import Fernet
@@ -50,6 +61,12 @@ def _truncate_password_to_safe_str(password: str) -> str:
     return safe_pw
 
 
+def _encode(claims: dict) -> str:
+    if key_ring is not None:
+        return key_ring.sign(claims)
+    return jwt_backend.sign(claims)
+
+
 def create_access_token(
     data: dict,
     expires_delta: timedelta = None
@@ -59,8 +76,8 @@ def create_access_token(
         expire = datetime.utcnow() + expires_delta
     else:
         expire = datetime.utcnow() + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-    to_encode.update({"exp": expire, "iat": datetime.utcnow()})
-    encoded_jwt = jwt.encode(to_encode, settings.secret_key, algorithm=settings.JWT_ALGORITHM)
+    to_encode.update({"exp": expire, "iat": datetime.utcnow(), "token_use": ACCESS_TOKEN_USE})
+    encoded_jwt = _encode(to_encode)
     return encoded_jwt
 
 
@@ -73,8 +90,11 @@ def create_refresh_token(
         expire = datetime.utcnow() + expires_delta
     else:
         expire = datetime.utcnow() + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
-    to_encode.update({"exp": expire, "iat": datetime.utcnow()})
-    encoded_jwt = jwt.encode(to_encode, settings.secret_key, algorithm=settings.JWT_ALGORITHM)
+    # A random jti keeps two tokens issued in the same second from colliding
+    # on the unique refresh token digest.
+    to_encode.setdefault("jti", secrets.token_hex(16))
+    to_encode.update({"exp": expire, "iat": datetime.utcnow(), "token_use": REFRESH_TOKEN_USE})
+    encoded_jwt = _encode(to_encode)
     return encoded_jwt
 
 
@@ -95,12 +115,49 @@ def get_password_hash(password: str) -> str:
     return pwd_context.hash(safe_pw[:72])
 
 
+# Prefixed to the HMAC input of reset tokens so a reset token never shares a
+# digest with a refresh token, which is an unprefixed JWT. Refresh digests
+# keep the bare input so the stored rows stay valid.
+_RESET_TOKEN_CONTEXT = b"reset:"
+
+
+def _hmac_digest(token: str, context: bytes = b"") -> str:
+    return hmac.new(
+        settings.refresh_token_digest_key,
+        context + token.encode("utf-8"),
+        hashlib.sha256
+    ).hexdigest()
+
+
+def hash_refresh_token(token: str) -> str:
+    """
+    Return the keyed HMAC-SHA256 hex digest of a raw refresh token.
+
+    Unlike bcrypt this is deterministic, so the digest can be stored in a
+    uniquely indexed column and looked up with a single equality query.
+    Refresh tokens are high-entropy JWTs, so a salted slow hash adds nothing.
+    """
+    return _hmac_digest(token)
+
+
+def hash_reset_token(token: str) -> str:
+    """Return the keyed HMAC-SHA256 hex digest of a raw password reset token."""
+    return _hmac_digest(token, _RESET_TOKEN_CONTEXT)
+
+
 
 def decode_token(token: str) -> Union[dict, None]:
-    try:
-        payload = jwt.decode(token, settings.secret_key, algorithms=[settings.JWT_ALGORITHM])
+    payload = verified_token_cache.get(token)
+    if payload is not None:
         return payload
+    try:
+        if key_ring is not None:
+            payload = key_ring.verify(token)
+        else:
+            payload = jwt_backend.verify(token)
     except jwt.ExpiredSignatureError:
         return None  # Token has expired
     except jwt.JWTError:
         return None  # Other JWT errors (e.g., invalid signature)
+    verified_token_cache.store(token, payload)
+    return payload
@@ -0,0 +1,80 @@
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Any
+
+from ..core.config import settings
+from ..core.metrics import registry
+
+
+class VerifiedTokenCache:
+    """
+    LRU cache of decoded JWT payloads whose signature has been verified.
+
+    Clients reuse an access token for its whole lifetime, so a repeat
+    request can skip the parse and signature check. Entries are keyed by
+    the SHA-256 of the raw token, so a token that differs in any byte (a
+    tampered signature, say) is never served from here. Each entry expires
+    at the token's own `exp`. Only the signature is cached: revocation is
+    still checked per request against the token version.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[bytes, tuple[dict[str, Any], float]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _key(token: str) -> bytes:
+        return hashlib.sha256(token.encode("utf-8")).digest()
+
+    def get(self, token: str) -> dict[str, Any] | None:
+        if self.max_entries <= 0:
+            return None
+        key = self._key(token)
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        payload, expires_at = entry
+        if time.time() >= expires_at:
+            del self._entries[key]
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._entries.move_to_end(key)
+        return dict(payload)
+
+    def store(self, token: str, payload: dict[str, Any]) -> None:
+        exp = payload.get("exp")
+        if self.max_entries <= 0 or not isinstance(exp, (int, float)):
+            return
+        self._entries[self._key(token)] = (dict(payload), exp)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+verified_token_cache = VerifiedTokenCache(max_entries=settings.TOKEN_CACHE_MAX_ENTRIES)
+
+registry.counter(
+    "token_cache_lookups_total", "Verified-token cache lookups.", ("result",),
+    callback=lambda: {("hit",): verified_token_cache.hits, ("miss",): verified_token_cache.misses}
+)
+registry.gauge(
+    "token_cache_entries", "Verified tokens cached.",
+    callback=lambda: len(verified_token_cache._entries)
+)
@@ -0,0 +1,95 @@
+import time
+import uuid
+from collections import OrderedDict
+from typing import Awaitable, Callable, Iterable
+
+from ..core.config import settings
+
+
+class TokenVersionCache:
+    """
+    In-process cache of each user's token version (revocation epoch).
+
+    Access tokens carry the version they were issued under in the `ver`
+    claim. Bumping a user's version in the database revokes every token
+    issued before it. Entries expire after `ttl_seconds`, which bounds how
+    long another worker may keep accepting a revoked token. A cached value
+    of None means the user is missing or inactive.
+    """
+
+    def __init__(self, ttl_seconds: float, max_entries: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[uuid.UUID, tuple[int | None, float]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    async def get(
+        self,
+        user_id: uuid.UUID,
+        loader: Callable[[uuid.UUID], Awaitable[int | None]]
+    ) -> int | None:
+        entry = self._entries.get(user_id)
+        if entry is not None and entry[1] > time.monotonic():
+            self.hits += 1
+            self._entries.move_to_end(user_id)
+            return entry[0]
+
+        self.misses += 1
+        version = await loader(user_id)
+        self.set(user_id, version)
+        return version
+
+    async def get_many(
+        self,
+        user_ids: Iterable[uuid.UUID],
+        loader: Callable[[list[uuid.UUID]], Awaitable[dict[uuid.UUID, int]]]
+    ) -> dict[uuid.UUID, int | None]:
+        """
+        Like get() for several users; the misses are loaded with a single
+        loader call, which returns the versions it found by user id.
+        """
+        versions: dict[uuid.UUID, int | None] = {}
+        missing = []
+        now = time.monotonic()
+        for user_id in dict.fromkeys(user_ids):
+            entry = self._entries.get(user_id)
+            if entry is not None and entry[1] > now:
+                self.hits += 1
+                self._entries.move_to_end(user_id)
+                versions[user_id] = entry[0]
+            else:
+                missing.append(user_id)
+
+        if missing:
+            self.misses += len(missing)
+            loaded = await loader(missing)
+            for user_id in missing:
+                versions[user_id] = loaded.get(user_id)
+                self.set(user_id, versions[user_id])
+        return versions
+
+    def set(self, user_id: uuid.UUID, version: int | None) -> None:
+        self._entries[user_id] = (version, time.monotonic() + self.ttl_seconds)
+        self._entries.move_to_end(user_id)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, user_id: uuid.UUID) -> None:
+        self._entries.pop(user_id, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+token_version_cache = TokenVersionCache(
+    ttl_seconds=settings.TOKEN_VERSION_CACHE_TTL_SECONDS,
+    max_entries=settings.TOKEN_VERSION_CACHE_MAX_ENTRIES
+)
@@ -0,0 +1,229 @@
+import time
+import uuid
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import make_transient_to_detached
+
+from ..core.config import settings
+from ..models.user import User, UserRole, Language, Currency
+
+
+class UserCacheBackend(ABC):
+    """
+    Storage interface for the user cache.
+
+    Values are plain JSON-serializable dicts or strings, so a shared backend
+    (e.g. Redis) can be plugged in with set_user_cache_backend() to share the
+    cache across uvicorn workers. User snapshots include the bcrypt password
+    hash and token_version, so a shared backend holds password hashes and
+    must be protected like the database.
+    """
+
+    @abstractmethod
+    def get(self, key: str) -> Any | None:
+        ...
+
+    @abstractmethod
+    def set(self, key: str, value: Any) -> None:
+        ...
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        ...
+
+    @abstractmethod
+    def clear(self) -> None:
+        ...
+
+    def stats(self) -> dict:
+        return {}
+
+
+class InMemoryUserCacheBackend(UserCacheBackend):
+    """Bounded per-process cache with TTL expiry and LRU eviction."""
+
+    def __init__(self, ttl_seconds: float, max_entries: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, tuple[Any, float]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: str) -> Any | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        if entry[1] <= time.monotonic():
+            del self._entries[key]
+            self.misses += 1
+            self.evictions += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[0]
+
+    def set(self, key: str, value: Any) -> None:
+        self._entries[key] = (value, time.monotonic() + self.ttl_seconds)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def delete(self, key: str) -> None:
+        self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+def _id_key(user_id: uuid.UUID | str) -> str:
+    return f"user:id:{user_id}"
+
+
+def _email_key(email: str) -> str:
+    return f"user:email:{email}"
+
+
+def _to_snapshot(user: User) -> dict:
+    return {
+        "id": str(user.id),
+        "email": user.email,
+        "password": user.password,
+        "full_name": user.full_name,
+        "role": user.role.value if user.role else None,
+        "phone_number": (
+            user.phone_number.decode("utf-8")
+            if isinstance(user.phone_number, bytes)
+            else user.phone_number
+        ),
+        "preferred_language": user.preferred_language.value if user.preferred_language else None,
+        "preferred_currency": user.preferred_currency.value if user.preferred_currency else None,
+        "created_at": user.created_at.isoformat() if user.created_at else None,
+        "updated_at": user.updated_at.isoformat() if user.updated_at else None,
+        "password_changed": user.password_changed,
+        "is_active": user.is_active,
+        "token_version": user.token_version,
+        "cached_at": time.time(),
+    }
+
+
+def _from_snapshot(data: dict) -> User:
+    user = User(
+        id=uuid.UUID(data["id"]),
+        email=data["email"],
+        password=data["password"],
+        full_name=data["full_name"],
+        role=UserRole(data["role"]) if data["role"] else None,
+        phone_number=data["phone_number"],
+        preferred_language=Language(data["preferred_language"]) if data["preferred_language"] else None,
+        preferred_currency=Currency(data["preferred_currency"]) if data["preferred_currency"] else None,
+        created_at=datetime.fromisoformat(data["created_at"]) if data["created_at"] else None,
+        updated_at=datetime.fromisoformat(data["updated_at"]) if data["updated_at"] else None,
+        password_changed=data["password_changed"],
+        is_active=data["is_active"],
+        token_version=data["token_version"],
+    )
+    # Reset attribute history so the instance looks freshly loaded
+    make_transient_to_detached(user)
+    return user
+
+
+class UserCache:
+    """
+    Read-through cache for user rows, keyed by id and by email.
+
+    Cached rows are attached to the caller's session on a hit without a
+    SELECT, so handlers can keep modifying and committing them as usual.
+    Every write to a user must call invalidate().
+
+    invalidate() only reaches this process's backend, so other workers can
+    keep serving a stale password hash or token_version. Snapshots older
+    than `max_age_seconds` are treated as misses whatever the backend's own
+    TTL, which bounds that window to the token version cache's.
+    """
+
+    def __init__(self, backend: UserCacheBackend | None, max_age_seconds: float):
+        self.backend = backend
+        self.max_age_seconds = max_age_seconds
+
+    @property
+    def enabled(self) -> bool:
+        return self.backend is not None
+
+    async def get_by_id(self, db: AsyncSession, user_id: uuid.UUID | str) -> User | None:
+        if self.backend is None:
+            return None
+        # An instance already loaded in this session is fresher than the cache
+        identity = db.sync_session.identity_key(User, uuid.UUID(str(user_id)))
+        existing = db.sync_session.identity_map.get(identity)
+        if existing is not None:
+            return existing
+
+        data = self.backend.get(_id_key(user_id))
+        if data is None or time.time() - data.get("cached_at", 0) >= self.max_age_seconds:
+            return None
+        return await db.merge(_from_snapshot(data), load=False)
+
+    async def get_by_email(self, db: AsyncSession, email: str) -> User | None:
+        if self.backend is None:
+            return None
+        user_id = self.backend.get(_email_key(email))
+        if user_id is None:
+            return None
+        return await self.get_by_id(db, user_id)
+
+    def store(self, user: User) -> None:
+        if self.backend is None:
+            return
+        self.backend.set(_id_key(user.id), _to_snapshot(user))
+        self.backend.set(_email_key(user.email), str(user.id))
+
+    def invalidate(self, user_id: uuid.UUID | str, email: str | None = None) -> None:
+        if self.backend is None:
+            return
+        self.backend.delete(_id_key(user_id))
+        if email:
+            self.backend.delete(_email_key(email))
+
+    def clear(self) -> None:
+        if self.backend is not None:
+            self.backend.clear()
+
+    def stats(self) -> dict:
+        if self.backend is None:
+            return {"enabled": False}
+        return {"enabled": True, **self.backend.stats()}
+
+
+# Never cache rows longer than a revoked token version may be served
+_user_cache_ttl = min(settings.USER_CACHE_TTL_SECONDS, settings.TOKEN_VERSION_CACHE_TTL_SECONDS)
+
+user_cache = UserCache(
+    InMemoryUserCacheBackend(
+        ttl_seconds=_user_cache_ttl,
+        max_entries=settings.USER_CACHE_MAX_ENTRIES
+    ) if settings.USER_CACHE_ENABLED else None,
+    max_age_seconds=_user_cache_ttl
+)
+
+
+def set_user_cache_backend(backend: UserCacheBackend | None) -> None:
+    """Swap the cache storage, e.g. for a shared backend; None disables caching."""
+    user_cache.backend = backend
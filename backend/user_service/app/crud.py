@@ -1,57 +1,248 @@
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from sqlalchemy import delete
-from .models.user import User, RefreshToken
+from sqlalchemy import delete, insert, func, literal, tuple_, any_, bindparam, or_, String
+from sqlalchemy.dialects.postgresql import ARRAY, UUID as PG_UUID, insert as pg_insert
+from .models.user import User, UserRole, Language, RefreshToken, PasswordReset
 from .schemas.user import UserCreate
-from .core.security import get_password_hash
+from .core.hashing import hash_password_async
+from .core.user_cache import user_cache
 from .utils.retry import async_retry
+from .db.routing import PRIMARY_BIND, use_primary
 import uuid
 from datetime import datetime
 
 @async_retry()
 async def get_user_by_email(db: AsyncSession, email: str) -> User | None:
+    user = await user_cache.get_by_email(db, email)
+    if user is not None:
+        return user
+
     result = await db.execute(select(User).filter(User.email == email))
     user = result.scalars().first()
+    if user is not None:
+        user_cache.store(user)
 
     return user
 
 @async_retry()
-async def get_user(db: AsyncSession, user_id: uuid.UUID) -> User | None:
+async def get_user(db: AsyncSession, user_id: uuid.UUID, fresh: bool = False) -> User | None:
+    """
+    Load a user, from the cache when possible. With fresh=True the cache is
+    skipped and the session is pinned to the primary: use it when the user
+    is about to be modified, so the write never starts from a stale row.
+    """
+    if fresh:
+        use_primary(db)
+        user = await db.get(User, uuid.UUID(str(user_id)), populate_existing=True)
+        if user is not None:
+            user_cache.store(user)
+        return user
+
+    user = await user_cache.get_by_id(db, user_id)
+    if user is not None:
+        return user
+
     user = await db.get(User, user_id)
+    if user is not None:
+        user_cache.store(user)
 
     return user
 
 @async_retry()
-async def create_user(db: AsyncSession, user: UserCreate, password_changed: bool = True) -> User:
-    hashed_password = get_password_hash(user.password)
-    db_user = User(
-        email=user.email,
-        password=hashed_password,
-        full_name=user.full_name,
-        role=user.role,
-        phone_number=user.phone_number, # Store phone number directly
-        preferred_language=user.preferred_language,
-        preferred_currency=user.preferred_currency,
-        password_changed=password_changed # Set password_changed status
+async def get_user_token_version(db: AsyncSession, user_id: uuid.UUID) -> int | None:
+    """Return the user's token version, or None if the user is missing or inactive."""
+    # Always read from the primary: a lagging replica could return a version
+    # from before a revocation and have it cached as current
+    result = await db.execute(
+        select(User.token_version).where(User.id == user_id, User.is_active.is_(True)),
+        bind_arguments=PRIMARY_BIND
     )
-    db.add(db_user)
-    await db.flush()
-    await db.refresh(db_user)
+    return result.scalar_one_or_none()
+
+def _uuid_array(name: str, values: list[uuid.UUID]):
+    return bindparam(name, values, type_=ARRAY(PG_UUID(as_uuid=True)))
+
+@async_retry()
+async def get_user_token_versions(db: AsyncSession, user_ids: list[uuid.UUID]) -> dict[uuid.UUID, int]:
+    """
+    Return the token versions of the active users among `user_ids`, by id.
+
+    The ids are sent as one array parameter (id = ANY($1)), so the statement
+    is the same whatever the batch size.
+    """
+    result = await db.execute(
+        select(User.id, User.token_version).where(
+            User.id == any_(_uuid_array("user_ids", user_ids)),
+            User.is_active.is_(True)
+        ),
+        bind_arguments=PRIMARY_BIND  # see get_user_token_version
+    )
+    return dict(result.all())
+
+@async_retry()
+async def create_user(db: AsyncSession, user: UserCreate, password_changed: bool = True) -> User | None:
+    """
+    Insert a user and return it, or None if the email is already registered.
+
+    One INSERT ... ON CONFLICT (email) DO NOTHING RETURNING statement, so
+    concurrent registrations for the same email cannot race to a unique
+    violation and no separate existence check or refresh is needed.
+    """
+    hashed_password = await hash_password_async(user.password)
+    insert_stmt = (
+        pg_insert(User)
+        .values(
+            email=user.email,
+            password=hashed_password,
+            full_name=user.full_name,
+            role=user.role,
+            phone_number=user.phone_number, # Store phone number directly
+            preferred_language=user.preferred_language,
+            preferred_currency=user.preferred_currency,
+            password_changed=password_changed # Set password_changed status
+        )
+        .on_conflict_do_nothing(index_elements=[User.email])
+        .returning(User)
+    )
+    result = await db.execute(select(User).from_statement(insert_stmt))
+    db_user = result.scalars().first()
     await db.commit()
-    
+    if db_user is not None:
+        user_cache.invalidate(db_user.id, db_user.email)
+
     return db_user
 
-async def get_users(db: AsyncSession, skip: int = 0, limit: int = 100):
-    result = await db.execute(select(User).offset(skip).limit(limit))
-    users = result.scalars().all()
-    # No decryption needed for phone_number
-    return users
+@async_retry()
+async def get_users(
+    db: AsyncSession,
+    limit: int = 100,
+    after: tuple[datetime, uuid.UUID] | None = None,
+    role: UserRole | None = None,
+    is_active: bool | None = None,
+    preferred_language: Language | None = None
+) -> tuple[list[User], tuple[datetime, uuid.UUID] | None]:
+    """
+    Return one page of users, newest first, and the keyset position of the
+    next page (None on the last page).
+
+    Pages are addressed by (created_at, id) instead of OFFSET, so every page
+    is a range scan on one of the composite indexes on users.
+    """
+    query = select(User)
+    if role is not None:
+        query = query.where(User.role == role)
+    if is_active is not None:
+        query = query.where(User.is_active.is_(is_active))
+    if preferred_language is not None:
+        query = query.where(User.preferred_language == preferred_language)
+    if after is not None:
+        query = query.where(tuple_(User.created_at, User.id) < tuple_(*after))
+
+    # Fetch one extra row to learn whether another page exists
+    query = query.order_by(User.created_at.desc(), User.id.desc()).limit(limit + 1)
+    result = await db.execute(query)
+    users = list(result.scalars().all())
+
+    next_position = None
+    if len(users) > limit:
+        users = users[:limit]
+        next_position = (users[-1].created_at, users[-1].id)
+    return users, next_position
+
+async def bulk_insert_users(db: AsyncSession, users: list[tuple[UserCreate, str]]) -> set[str]:
+    """
+    Insert (user, hashed_password) pairs in one multi-row statement and
+    return the emails that were actually inserted.
+
+    INSERT ... ON CONFLICT (email) DO NOTHING RETURNING email; rows whose
+    email already exists are skipped instead of aborting the batch.
+    """
+    if not users:
+        return set()
+    now = datetime.utcnow()
+    values = [
+        {
+            "id": uuid.uuid4(),
+            "email": user.email,
+            "password": hashed_password,
+            "full_name": user.full_name,
+            "role": user.role,
+            "phone_number": user.phone_number,
+            "preferred_language": user.preferred_language,
+            "preferred_currency": user.preferred_currency,
+            "created_at": now,
+            "updated_at": now,
+            "password_changed": True,
+            "is_active": True,
+            "token_version": 0,
+        }
+        for user, hashed_password in users
+    ]
+    result = await db.execute(
+        pg_insert(User)
+        .values(values)
+        .on_conflict_do_nothing(index_elements=[User.email])
+        .returning(User.email)
+    )
+    return set(result.scalars().all())
+
+EXPORT_COLUMNS = (
+    User.id,
+    User.email,
+    User.full_name,
+    User.role,
+    User.phone_number,
+    User.preferred_language,
+    User.preferred_currency,
+    User.is_active,
+    User.password_changed,
+    User.created_at,
+)
+
+async def stream_user_rows(db: AsyncSession, batch_size: int = 1000):
+    """
+    Yield lists of user rows (public columns only) from a server-side cursor.
+
+    Rows are never materialized as ORM objects and at most `batch_size` rows
+    are held in memory at a time.
+    """
+    result = await db.stream(
+        select(*EXPORT_COLUMNS)
+        .order_by(User.created_at, User.id)
+        .execution_options(yield_per=batch_size)
+    )
+    async for partition in result.partitions(batch_size):
+        yield partition
+
+@async_retry()
+async def lookup_users(
+    db: AsyncSession,
+    columns: list,
+    ids: list[uuid.UUID] | None = None,
+    emails: list[str] | None = None
+) -> list[dict]:
+    """
+    Return `columns` of the users matching any of `ids` or `emails`.
+
+    One statement, id = ANY($1) OR email = ANY($2), with each list bound as
+    a single array parameter, so it has the same text whatever the list
+    lengths and only the requested columns are read.
+    """
+    conditions = []
+    if ids:
+        conditions.append(User.id == any_(_uuid_array("ids", ids)))
+    if emails:
+        conditions.append(User.email == any_(bindparam("emails", emails, type_=ARRAY(String))))
+    if not conditions:
+        return []
+    result = await db.execute(select(*columns).where(or_(*conditions)))
+    return [dict(row) for row in result.mappings().all()]
 
 @async_retry()
-async def create_refresh_token_db(db: AsyncSession, user_id: uuid.UUID, token: str, expires_at: datetime) -> RefreshToken:
+async def create_refresh_token_db(db: AsyncSession, user_id: uuid.UUID, token_digest: str, expires_at: datetime) -> RefreshToken:
     db_refresh_token = RefreshToken(
         user_id=user_id,
-        token=token,
+        token_digest=token_digest,
         expires_at=expires_at
     )
     db.add(db_refresh_token)
@@ -59,12 +250,84 @@ async def create_refresh_token_db(db: AsyncSession, user_id: uuid.UUID, token: s
     await db.refresh(db_refresh_token)
     return db_refresh_token
 
-@async_retry()
-async def get_refresh_token_by_token(db: AsyncSession, token: str) -> RefreshToken | None:
-    result = await db.execute(select(RefreshToken).filter(RefreshToken.token == token))
+async def rotate_refresh_token(
+    db: AsyncSession,
+    token_digest: str,
+    user_id: uuid.UUID,
+    token_version: int,
+    new_token_digest: str,
+    new_expires_at: datetime
+) -> User | None:
+    """
+    Swap a refresh token for a new one and return its user, in one statement.
+
+        WITH old_token AS (DELETE ... RETURNING user_id),
+             new_token AS (INSERT ... SELECT FROM old_token RETURNING user_id)
+        SELECT users.* FROM users JOIN new_token
+
+    The old row only matches if it is unexpired and belongs to an active
+    user with the given id and token version. Two concurrent refreshes of
+    the same token serialize on the DELETE, so only one of them gets a row
+    back. Returns None when nothing matched. Not retried, for the same
+    reason as consume_password_reset.
+    """
+    old_token = (
+        delete(RefreshToken)
+        .where(
+            RefreshToken.token_digest == token_digest,
+            RefreshToken.expires_at > func.now(),
+            RefreshToken.user_id == User.id,
+            User.id == user_id,
+            User.token_version == token_version,
+            User.is_active.is_(True)
+        )
+        .returning(RefreshToken.user_id)
+        .cte("old_token")
+    )
+    new_token = (
+        insert(RefreshToken)
+        .from_select(
+            ["id", "user_id", "token_digest", "expires_at", "created_at"],
+            select(
+                literal(uuid.uuid4(), RefreshToken.id.type),
+                old_token.c.user_id,
+                literal(new_token_digest, RefreshToken.token_digest.type),
+                literal(new_expires_at, RefreshToken.expires_at.type),
+                func.now()
+            )
+        )
+        .returning(RefreshToken.user_id)
+        .cte("new_token")
+    )
+    use_primary(db)
+    result = await db.execute(
+        select(User).join(new_token, User.id == new_token.c.user_id),
+        execution_options={"populate_existing": True}
+    )
     return result.scalars().first()
 
 @async_retry()
-async def delete_refresh_token(db: AsyncSession, refresh_token_id: uuid.UUID):
-    await db.execute(delete(RefreshToken).where(RefreshToken.id == refresh_token_id))
-    await db.flush()
\ No newline at end of file
+async def create_password_reset(db: AsyncSession, user_id: uuid.UUID, token_digest: str, expires_at: datetime) -> PasswordReset:
+    db_password_reset = PasswordReset(
+        user_id=user_id,
+        token_digest=token_digest,
+        expires_at=expires_at
+    )
+    db.add(db_password_reset)
+    await db.flush()
+    return db_password_reset
+
+async def consume_password_reset(db: AsyncSession, token_digest: str) -> tuple[uuid.UUID, datetime] | None:
+    """
+    Delete the reset row for this digest and return its (user_id, expires_at).
+
+    A single DELETE ... RETURNING, so a token can only ever be consumed once.
+    Not retried: a retry after a lost response would see the row already gone.
+    """
+    result = await db.execute(
+        delete(PasswordReset)
+        .where(PasswordReset.token_digest == token_digest)
+        .returning(PasswordReset.user_id, PasswordReset.expires_at)
+    )
+    row = result.first()
+    return (row.user_id, row.expires_at) if row else None
@@ -1 +1 @@
-from ..models.user import Base, User
+from ..models.user import Base, User, RefreshToken, PasswordReset
@@ -0,0 +1,237 @@
+import asyncio
+import time
+from collections import deque
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+
+def _percentile(sorted_samples: list[float], fraction: float) -> float:
+    if not sorted_samples:
+        return 0.0
+    return sorted_samples[min(len(sorted_samples) - 1, int(len(sorted_samples) * fraction))]
+
+
+class InstrumentedPool(AsyncAdaptedQueuePool):
+    """
+    AsyncAdaptedQueuePool that reports checkout wait time to its monitor and
+    can be resized while in use.
+
+    All pool_size + max_overflow connections share one queue, so the total
+    cap is enforced by QueuePool itself. `target_size` (initially
+    pool_size) bounds how many are kept open while idle: a connection
+    checked in when that many are already idle is closed and its slot
+    freed, as QueuePool does with overflow. Resizing only moves
+    `target_size`, so warm connections survive it.
+    """
+
+    monitor: "PoolMonitor | None" = None
+
+    def __init__(self, creator, pool_size: int = 5, max_overflow: int = 10, **kw):
+        if max_overflow >= 0:
+            super().__init__(creator, pool_size=pool_size + max_overflow, max_overflow=0, **kw)
+        else:
+            # Unbounded overflow; there is no total cap to share
+            super().__init__(creator, pool_size=pool_size, max_overflow=max_overflow, **kw)
+        self.target_size = pool_size
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except Exception:
+            if self.monitor is not None:
+                self.monitor.checkout_failures += 1
+            raise
+        finally:
+            if self.monitor is not None:
+                self.monitor.record_wait(time.perf_counter() - started)
+
+    def _do_return_conn(self, record):
+        if self.checkedin() >= self.target_size:
+            try:
+                record.close()
+            finally:
+                self._dec_overflow()
+            return
+        super()._do_return_conn(record)
+
+    def recreate(self):
+        # engine.dispose() swaps in a new pool; keep the size and monitor
+        pool = super().recreate()
+        pool.target_size = self.target_size
+        pool.monitor = self.monitor
+        return pool
+
+    def resize(self, target_size: int) -> None:
+        """
+        Change how many idle connections are kept open. Surplus idle
+        connections are closed as they are checked in; the liveness task
+        cycles through every idle one, so they do not linger.
+        """
+        self.target_size = target_size
+
+
+# Closing a surplus connection frees its slot the way QueuePool does for
+# overflow. Fail at import, not at the first check-in, if an upgrade past
+# the pinned SQLAlchemy version drops that hook.
+if not callable(getattr(AsyncAdaptedQueuePool, "_dec_overflow", None)):
+    raise ImportError("InstrumentedPool needs QueuePool._dec_overflow; check the SQLAlchemy version")
+
+
+class PoolMonitor:
+    """
+    Connection pool metrics, plus the optional background tasks that
+    replace per-checkout pre-ping and a fixed pool size.
+
+    Checkout latency comes from InstrumentedPool; connects, checkouts and
+    invalidations come from pool events on the engine.
+
+    With adaptive sizing, the pool keeps `min_size` connections open and
+    every `adapt_interval` seconds is resized to the peak number of
+    connections in use during the last interval (never above `max_size`,
+    the total connection cap). It grows as soon as a window's peak is
+    higher, but shrinks only after `shrink_after` consecutive lower
+    windows, so a load that moves up and down does not churn
+    connections. The liveness task pings idle connections
+    every `liveness_interval` seconds, so checkouts no longer pay a
+    pre-ping round trip. A failed ping is a disconnect error and
+    invalidates the pool's older connections as pre-ping would have.
+    """
+
+    def __init__(self, engine: AsyncEngine, sample_size: int = 1024):
+        self.engine = engine
+        self.connects = 0
+        self.checkouts = 0
+        self.checkout_failures = 0
+        self.invalidations = 0
+        self.soft_invalidations = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+        self.peak_in_use = 0
+        self.window_peak_in_use = 0
+        self.resizes = 0
+        self.liveness_failures = 0
+        self._low_windows = 0
+        self._low_peak = 0
+        self._waits: deque = deque(maxlen=sample_size)
+        self._tasks: list[asyncio.Task] = []
+
+        sync_engine = engine.sync_engine
+        if isinstance(sync_engine.pool, InstrumentedPool):
+            sync_engine.pool.monitor = self
+        event.listen(sync_engine, "connect", self._on_connect)
+        event.listen(sync_engine, "checkout", self._on_checkout)
+        event.listen(sync_engine, "invalidate", self._on_invalidate)
+        event.listen(sync_engine, "soft_invalidate", self._on_soft_invalidate)
+
+    @property
+    def pool(self):
+        return self.engine.sync_engine.pool
+
+    def record_wait(self, seconds: float) -> None:
+        self.wait_seconds_total += seconds
+        self.wait_seconds_max = max(self.wait_seconds_max, seconds)
+        self._waits.append(seconds)
+
+    def _on_connect(self, dbapi_connection, connection_record):
+        self.connects += 1
+
+    def _on_checkout(self, dbapi_connection, connection_record, connection_proxy):
+        self.checkouts += 1
+        in_use = self.pool.checkedout()
+        self.peak_in_use = max(self.peak_in_use, in_use)
+        self.window_peak_in_use = max(self.window_peak_in_use, in_use)
+
+    def _on_invalidate(self, dbapi_connection, connection_record, exception):
+        self.invalidations += 1
+
+    def _on_soft_invalidate(self, dbapi_connection, connection_record, exception):
+        self.soft_invalidations += 1
+
+    def adapt(self, min_size: int, max_size: int, shrink_after: int = 1) -> None:
+        """Resize the pool to the peak concurrency seen since the last call."""
+        pool = self.pool
+        peak = max(min_size, min(max_size, self.window_peak_in_use))
+        self.window_peak_in_use = pool.checkedout()
+        if not isinstance(pool, InstrumentedPool):
+            return
+
+        if peak >= pool.target_size:
+            self._low_windows = self._low_peak = 0
+            target = peak
+        else:
+            self._low_windows += 1
+            self._low_peak = max(self._low_peak, peak)
+            if self._low_windows < shrink_after:
+                return
+            # Keep enough for the busiest of the quiet windows
+            target = self._low_peak
+            self._low_windows = self._low_peak = 0
+
+        if target != pool.target_size:
+            print(f"Resizing DB pool from {pool.target_size} to {target} connection(s).")
+            pool.resize(target)
+            self.resizes += 1
+
+    async def check_liveness(self) -> None:
+        """Ping each idle connection once."""
+        # Checkouts take the oldest idle connection and check-ins go to the
+        # back of the queue, so successive checkouts visit each idle one.
+        for _ in range(self.pool.checkedin()):
+            try:
+                async with self.engine.connect() as conn:
+                    await conn.exec_driver_sql("SELECT 1")
+            except Exception as e:
+                self.liveness_failures += 1
+                print(f"DB liveness check failed: {e}")
+                return
+
+    async def _adapt_loop(self, interval: float, min_size: int, max_size: int, shrink_after: int) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            self.adapt(min_size, max_size, shrink_after)
+
+    async def _liveness_loop(self, interval: float) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            await self.check_liveness()
+
+    def start_adaptive_sizing(self, interval: float, min_size: int, max_size: int, shrink_after: int = 1) -> None:
+        self._tasks.append(asyncio.create_task(self._adapt_loop(interval, min_size, max_size, shrink_after)))
+
+    def start_liveness_checks(self, interval: float) -> None:
+        self._tasks.append(asyncio.create_task(self._liveness_loop(interval)))
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def stats(self) -> dict:
+        waits = sorted(self._waits)
+        pool = self.pool
+        size = getattr(pool, "target_size", pool.size())
+        return {
+            "size": size,
+            "checked_in": pool.checkedin(),
+            "in_use": pool.checkedout(),
+            "overflow": max(pool.checkedin() + pool.checkedout() - size, 0),
+            "peak_in_use": self.peak_in_use,
+            "connects": self.connects,
+            "checkouts": self.checkouts,
+            "checkout_failures": self.checkout_failures,
+            "checkout_wait_seconds": {
+                "total": round(self.wait_seconds_total, 6),
+                "max": round(self.wait_seconds_max, 6),
+                "p50": round(_percentile(waits, 0.50), 6),
+                "p95": round(_percentile(waits, 0.95), 6),
+                "p99": round(_percentile(waits, 0.99), 6),
+            },
+            "invalidations": self.invalidations,
+            "soft_invalidations": self.soft_invalidations,
+            "resizes": self.resizes,
+            "liveness_failures": self.liveness_failures,
+        }
@@ -0,0 +1,161 @@
+import bisect
+import json
+import re
+import time
+from contextvars import ContextVar
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from ..core.metrics import db_query_duration_seconds
+
+# Upper bounds (ms) of the latency histogram buckets; the last bucket is +Inf
+LATENCY_BUCKETS_MS = (1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+# ASGI scope of the request being served; read when a statement finishes,
+# by which time the router has stored the matched route in it
+current_request_scope: ContextVar[dict | None] = ContextVar("current_request_scope", default=None)
+
+_WHITESPACE = re.compile(r"\s+")
+# Runs of placeholders, e.g. IN ($1, $2, $3) or multi-row VALUES lists
+_PLACEHOLDER_LIST = re.compile(r"\((?:\s*\$\d+(?:::\w+(?:\[\])?)?\s*,)+\s*\$\d+(?:::\w+(?:\[\])?)?\s*\)")
+_VALUES_ROWS = re.compile(r"(VALUES \(\.\.\.\))(?:, \(\.\.\.\))+")
+# Literals and numbered placeholders, whose numbers shift with list lengths
+_LITERAL = re.compile(r"'(?:[^']|'')*'|\$\d+|(?<!\w)\d+\b")
+
+
+def fingerprint(statement: str) -> str:
+    """
+    Normalise a statement so executions that differ only in their values,
+    or in how many values they bind, share one entry.
+    """
+    text = _WHITESPACE.sub(" ", statement).strip()
+    text = _PLACEHOLDER_LIST.sub("(...)", text)
+    text = _VALUES_ROWS.sub(r"\1", text)
+    return _LITERAL.sub("?", text)
+
+
+def route_label(scope: dict | None) -> str:
+    if scope is None:
+        return "-"  # outside a request, e.g. scheduler jobs and startup
+    route = scope.get("route")
+    path = getattr(route, "path", None) or scope.get("path", "?")
+    return f"{scope.get('method', '')} {path}".strip()
+
+
+class QueryStats:
+    __slots__ = ("count", "total_ms", "max_ms", "buckets", "routes")
+
+    def __init__(self):
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.buckets = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        self.routes: dict[str, list] = {}  # route -> [count, total_ms]
+
+    def observe(self, elapsed_ms: float, route: str) -> None:
+        self.count += 1
+        self.total_ms += elapsed_ms
+        self.max_ms = max(self.max_ms, elapsed_ms)
+        self.buckets[bisect.bisect_left(LATENCY_BUCKETS_MS, elapsed_ms)] += 1
+        per_route = self.routes.setdefault(route, [0, 0.0])
+        per_route[0] += 1
+        per_route[1] += elapsed_ms
+
+    def as_dict(self) -> dict:
+        return {
+            "count": self.count,
+            "total_ms": round(self.total_ms, 3),
+            "mean_ms": round(self.total_ms / self.count, 3) if self.count else 0.0,
+            "max_ms": round(self.max_ms, 3),
+            "histogram_ms": {
+                **{str(bound): n for bound, n in zip(LATENCY_BUCKETS_MS, self.buckets)},
+                "+Inf": self.buckets[-1],
+            },
+            "routes": {
+                route: {"count": n, "total_ms": round(total, 3)}
+                for route, (n, total) in self.routes.items()
+            },
+        }
+
+
+class QueryLog:
+    """
+    Per-fingerprint latency histograms for every statement, and a one-line
+    JSON log entry for statements slower than `slow_threshold_ms`.
+
+    Parameters are never logged, only the statement text, so the log does
+    not carry user data. Each statement is attributed to the route of the
+    request that issued it.
+    """
+
+    def __init__(self, slow_threshold_ms: float, max_fingerprints: int = 1000):
+        self.slow_threshold_ms = slow_threshold_ms
+        self.max_fingerprints = max_fingerprints
+        self.queries: dict[str, QueryStats] = {}
+        self.slow_queries = 0
+        self._fingerprints: dict[str, str] = {}  # raw statement -> fingerprint
+
+    def _fingerprint(self, statement: str) -> str:
+        # Statements are generated from a small set of code paths, so the
+        # raw text repeats and normalising it once is enough
+        fp = self._fingerprints.get(statement)
+        if fp is None:
+            fp = fingerprint(statement)
+            if len(self._fingerprints) < self.max_fingerprints * 10:
+                self._fingerprints[statement] = fp
+        return fp
+
+    def record(self, statement: str, elapsed_ms: float, scope: dict | None = None) -> None:
+        fp = self._fingerprint(statement)
+        route = route_label(scope)
+        stats = self.queries.get(fp)
+        if stats is None:
+            if len(self.queries) >= self.max_fingerprints:
+                fp = "<other>"
+                stats = self.queries.setdefault(fp, QueryStats())
+            else:
+                stats = self.queries[fp] = QueryStats()
+        stats.observe(elapsed_ms, route)
+        db_query_duration_seconds.observe(elapsed_ms / 1000, route=route)
+
+        if elapsed_ms >= self.slow_threshold_ms:
+            self.slow_queries += 1
+            print(json.dumps({
+                "event": "slow_query",
+                "duration_ms": round(elapsed_ms, 3),
+                "route": route,
+                "statement": fp,
+            }))
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info["query_start"] = time.perf_counter()
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        started = conn.info.pop("query_start", None)
+        if started is not None:
+            self.record(statement, (time.perf_counter() - started) * 1000, current_request_scope.get())
+
+    def _handle_error(self, context):
+        # after_cursor_execute does not run for failed statements
+        if context.connection is not None:
+            context.connection.info.pop("query_start", None)
+
+    def install(self, engine: Engine) -> None:
+        """Attach the timing listeners to a (sync) engine."""
+        event.listen(engine, "before_cursor_execute", self._before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", self._after_cursor_execute)
+        event.listen(engine, "handle_error", self._handle_error)
+
+    def reset(self) -> None:
+        self.queries.clear()
+        self.slow_queries = 0
+
+    def stats(self, top: int = 20) -> dict:
+        ranked = sorted(self.queries.items(), key=lambda item: item[1].total_ms, reverse=True)
+        return {
+            "slow_threshold_ms": self.slow_threshold_ms,
+            "slow_queries": self.slow_queries,
+            "fingerprints": len(self.queries),
+            "top": [{"statement": fp, **stats.as_dict()} for fp, stats in ranked[:top]],
+        }
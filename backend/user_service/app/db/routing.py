@@ -0,0 +1,156 @@
+import asyncio
+import itertools
+import time
+
+from sqlalchemy import event, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import Select, visitors
+from sqlalchemy.sql.dml import UpdateBase
+
+# Seconds of replication lag on a replica (0 on a primary)
+REPLICA_LAG_QUERY = text(
+    "SELECT CASE WHEN pg_is_in_recovery() "
+    "THEN COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) "
+    "ELSE 0 END"
+)
+
+
+class ReplicaSet:
+    """
+    Read replicas chosen round-robin, skipping unhealthy ones.
+
+    A replica is marked unhealthy when a statement on it fails with a
+    connection-level error, or when the periodic health check sees it
+    unreachable or lagging more than `max_lag_seconds`. Unhealthy replicas
+    are retried after `retry_after_seconds`. With no healthy replica,
+    choose() returns None and reads go to the primary.
+    """
+
+    def __init__(self, engines: list[AsyncEngine], max_lag_seconds: float, retry_after_seconds: float):
+        self.engines = engines
+        self.max_lag_seconds = max_lag_seconds
+        self.retry_after_seconds = retry_after_seconds
+        self._unhealthy_until: dict[int, float] = {}
+        self._lag: dict[int, float | None] = {}
+        self._cycle = itertools.cycle(range(len(engines)))
+        self._health_task: asyncio.Task | None = None
+        for index, engine in enumerate(engines):
+            self._watch_errors(index, engine.sync_engine)
+
+    @classmethod
+    def from_urls(cls, urls: list[str], max_lag_seconds: float, retry_after_seconds: float, **engine_kwargs) -> "ReplicaSet":
+        # Replicas only serve SELECTs, so they never need a transaction
+        engines = [
+            create_async_engine(url, isolation_level="AUTOCOMMIT", **engine_kwargs)
+            for url in urls
+        ]
+        return cls(engines, max_lag_seconds, retry_after_seconds)
+
+    def _watch_errors(self, index: int, sync_engine: Engine) -> None:
+        @event.listens_for(sync_engine, "handle_error")
+        def _on_error(context):
+            if context.is_disconnect or context.connection is None:
+                self.mark_unhealthy(index)
+
+    def mark_unhealthy(self, index: int) -> None:
+        self._unhealthy_until[index] = time.monotonic() + self.retry_after_seconds
+
+    def mark_healthy(self, index: int) -> None:
+        self._unhealthy_until.pop(index, None)
+
+    def is_healthy(self, index: int) -> bool:
+        until = self._unhealthy_until.get(index)
+        return until is None or until <= time.monotonic()
+
+    def choose(self) -> Engine | None:
+        """Return the next healthy replica's sync engine, or None."""
+        for _ in range(len(self.engines)):
+            index = next(self._cycle)
+            if self.is_healthy(index):
+                return self.engines[index].sync_engine
+        return None
+
+    async def check_health(self) -> None:
+        for index, engine in enumerate(self.engines):
+            try:
+                async with engine.connect() as conn:
+                    lag = float((await conn.execute(REPLICA_LAG_QUERY)).scalar() or 0)
+            except Exception as e:
+                print(f"Replica {index} health check failed: {e}")
+                self._lag[index] = None
+                self.mark_unhealthy(index)
+                continue
+            self._lag[index] = lag
+            if lag > self.max_lag_seconds:
+                print(f"Replica {index} is lagging {lag:.1f}s; routing reads to other servers.")
+                self.mark_unhealthy(index)
+            else:
+                self.mark_healthy(index)
+
+    async def _health_loop(self, interval: float) -> None:
+        while True:
+            await self.check_health()
+            await asyncio.sleep(interval)
+
+    def start_health_checks(self, interval: float) -> None:
+        if self.engines and self._health_task is None:
+            self._health_task = asyncio.create_task(self._health_loop(interval))
+
+    async def stop(self) -> None:
+        if self._health_task is not None:
+            self._health_task.cancel()
+            await asyncio.gather(self._health_task, return_exceptions=True)
+            self._health_task = None
+        for engine in self.engines:
+            await engine.dispose()
+
+    def stats(self) -> dict:
+        return {
+            "replicas": [
+                {"index": i, "healthy": self.is_healthy(i), "lag_seconds": self._lag.get(i)}
+                for i in range(len(self.engines))
+            ]
+        }
+
+
+# bind_arguments that send one statement to the primary without pinning the
+# session, e.g. session.execute(stmt, bind_arguments=PRIMARY_BIND)
+PRIMARY_BIND = {"use_primary": True}
+
+
+def use_primary(session) -> None:
+    """Pin a (sync or async) session to the primary for the rest of its life."""
+    session.info["use_primary"] = True
+
+
+def is_read_only(clause) -> bool:
+    """True for a SELECT that neither locks rows nor writes through a CTE."""
+    if not isinstance(clause, Select) or clause._for_update_arg is not None:
+        return False
+    return not any(isinstance(element, UpdateBase) for element in visitors.iterate(clause))
+
+
+class RoutingSession(Session):
+    """
+    Session that sends plain SELECTs to a read replica.
+
+    Writes (including SELECTs over data-modifying CTEs), flushes,
+    SELECT ... FOR UPDATE, and every statement after the session has
+    written go to the primary (the session's own bind), so a
+    request always reads its own writes. Reads that must not be stale, such
+    as token versions or a row about to be updated, use PRIMARY_BIND or
+    use_primary().
+    """
+
+    replica_set: ReplicaSet | None = None
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        primary = super().get_bind(mapper=mapper, clause=clause, **kw)
+        if self.replica_set is None or self._flushing or kw.get("use_primary") or self.info.get("use_primary"):
+            return primary
+        if not is_read_only(clause):
+            self.info["use_primary"] = True  # read-your-writes for the rest of the session
+            return primary
+        return self.replica_set.choose() or primary
@@ -4,23 +4,92 @@ from sqlalchemy.pool import QueuePool
 from ..core.config import settings
 from typing import AsyncGenerator
 from contextlib import asynccontextmanager
+from .stats import install_db_stats
+from .routing import ReplicaSet, RoutingSession
+from .pool import InstrumentedPool, PoolMonitor
+from .query_log import QueryLog
 
 # Configure connection pool settings
+if settings.DB_POOL_ADAPTIVE:
+    # Start small and let PoolMonitor grow the pool up to the same total cap
+    pool_options = dict(
+        pool_size=settings.DB_POOL_MIN_SIZE,
+        max_overflow=settings.DB_POOL_SIZE + settings.DB_MAX_OVERFLOW - settings.DB_POOL_MIN_SIZE,
+        pool_pre_ping=False  # idle connections are pinged in the background instead
+    )
+else:
+    pool_options = dict(
+        pool_size=settings.DB_POOL_SIZE,  # Base number of connections to keep open
+        max_overflow=settings.DB_MAX_OVERFLOW,  # Maximum number of connections allowed beyond pool_size
+        pool_pre_ping=True  # Enable connection health checks
+    )
+
 engine = create_async_engine(
     settings.DATABASE_URL,
-    echo=True,
+    echo=settings.DB_ECHO,
     future=True,
-    pool_size=5,  # Base number of connections to keep open
-    max_overflow=10,  # Maximum number of connections allowed beyond pool_size
-    pool_timeout=30,  # Seconds to wait before giving up on getting a connection
-    pool_recycle=300,  # Recycle connections after 5 minutes
-    pool_pre_ping=True  # Enable connection health checks
+    poolclass=InstrumentedPool,
+    pool_timeout=settings.DB_POOL_TIMEOUT,  # Seconds to wait before giving up on getting a connection
+    pool_recycle=settings.DB_POOL_RECYCLE,  # Seconds before a connection is recycled
+    **pool_options
+)
+
+install_db_stats(engine.sync_engine)
+
+query_log = QueryLog(slow_threshold_ms=settings.SLOW_QUERY_THRESHOLD_MS)
+query_log.install(engine.sync_engine)
+
+# Read replicas; with none configured every statement goes to the primary
+replica_set = ReplicaSet.from_urls(
+    settings.replica_urls,
+    max_lag_seconds=settings.REPLICA_MAX_LAG_SECONDS,
+    retry_after_seconds=settings.REPLICA_RETRY_AFTER_SECONDS,
+    poolclass=InstrumentedPool,
+    pool_timeout=settings.DB_POOL_TIMEOUT,
+    pool_recycle=settings.DB_POOL_RECYCLE,
+    **pool_options
 )
+for replica in replica_set.engines:
+    install_db_stats(replica.sync_engine)
+    query_log.install(replica.sync_engine)
+
+pool_monitors = [PoolMonitor(engine), *(PoolMonitor(replica) for replica in replica_set.engines)]
+
+def start_pool_monitors() -> None:
+    """Start adaptive sizing and liveness checks when DB_POOL_ADAPTIVE is set."""
+    if not settings.DB_POOL_ADAPTIVE:
+        return
+    for monitor in pool_monitors:
+        monitor.start_adaptive_sizing(
+            settings.DB_POOL_ADAPT_INTERVAL_SECONDS,
+            min_size=settings.DB_POOL_MIN_SIZE,
+            max_size=settings.DB_POOL_SIZE + settings.DB_MAX_OVERFLOW,
+            shrink_after=settings.DB_POOL_SHRINK_AFTER_INTERVALS
+        )
+        monitor.start_liveness_checks(settings.DB_POOL_LIVENESS_INTERVAL_SECONDS)
+
+async def stop_pool_monitors() -> None:
+    for monitor in pool_monitors:
+        await monitor.stop()
+
+class ReplicaRoutingSession(RoutingSession):
+    replica_set = replica_set if replica_set.engines else None
 
 # Create session factory
 async_session = async_sessionmaker(
     bind=engine,
     class_=AsyncSession,
+    sync_session_class=ReplicaRoutingSession,
+    expire_on_commit=False,
+    autoflush=False
+)
+
+# Sessions for pure reads run in autocommit mode: no BEGIN and no COMMIT
+# round trips, each SELECT runs on its own.
+readonly_session = async_sessionmaker(
+    bind=engine.execution_options(isolation_level="AUTOCOMMIT"),
+    class_=AsyncSession,
+    sync_session_class=ReplicaRoutingSession,
     expire_on_commit=False,
     autoflush=False
 )
@@ -30,9 +99,23 @@ async def get_db() -> AsyncGenerator[AsyncSession, None]:
     async with async_session() as session:
         try:
             yield session
-            await session.commit()
+            # Handlers that already committed leave nothing to commit
+            if session.in_transaction():
+                await session.commit()
         except Exception:
             await session.rollback()
             raise
         finally:
-            await session.close()
\ No newline at end of file
+            await session.close()
+
+async def get_db_readonly() -> AsyncGenerator[AsyncSession, None]:
+    """Dependency for handlers that only read. Never commits."""
+    async with readonly_session() as session:
+        yield session
+
+def get_session_factory() -> async_sessionmaker:
+    """
+    Dependency for handlers that need to open their own sessions, e.g. when
+    streaming a response after the request-scoped session has been closed.
+    """
+    return async_session
@@ -0,0 +1,51 @@
+from contextvars import ContextVar
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+class DbRequestStats:
+    """Database statements and commits issued while serving one request."""
+
+    __slots__ = ("statements", "commits")
+
+    def __init__(self):
+        self.statements = 0
+        self.commits = 0
+
+
+current_db_stats: ContextVar[DbRequestStats | None] = ContextVar("current_db_stats", default=None)
+
+# Running totals across all tracked requests, for comparing before/after
+db_totals = {"requests": 0, "statements": 0, "commits": 0}
+
+
+def begin_request_stats() -> DbRequestStats:
+    """Start counting for the current request; call from middleware."""
+    stats = DbRequestStats()
+    current_db_stats.set(stats)
+    return stats
+
+
+def end_request_stats(stats: DbRequestStats) -> None:
+    db_totals["requests"] += 1
+    db_totals["statements"] += stats.statements
+    db_totals["commits"] += stats.commits
+
+
+def _count_statement(conn, cursor, statement, parameters, context, executemany):
+    stats = current_db_stats.get()
+    if stats is not None:
+        stats.statements += 1
+
+
+def _count_commit(conn):
+    stats = current_db_stats.get()
+    if stats is not None:
+        stats.commits += 1
+
+
+def install_db_stats(engine: Engine) -> None:
+    """Attach the counting listeners to a (sync) engine."""
+    event.listen(engine, "before_cursor_execute", _count_statement)
+    event.listen(engine, "commit", _count_commit)
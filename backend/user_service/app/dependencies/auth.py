@@ -1,37 +1,95 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.ext.asyncio import AsyncSession
-from ..core.security import decode_token
-from ..db.session import get_db
+from ..core.security import decode_token, REFRESH_TOKEN_USE
+from ..core.token_versions import token_version_cache
+from ..db.session import get_db, get_db_readonly
 from ..models.user import User, UserRole
 from ..schemas.token import UserTokenData
-from ..crud import get_user
+from ..crud import get_user, get_user_token_version
 from typing import List
+import uuid
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/login")
 
-async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_db)) -> User:
-    credentials_exception = HTTPException(
+def _credentials_exception() -> HTTPException:
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
+
+async def _load_current_user(token: str, db: AsyncSession, fresh: bool = False) -> User:
+    credentials_exception = _credentials_exception()
     payload = decode_token(token)
-    if payload is None:
+    # Refresh tokens carry sub and ver too; they are only good at /refresh
+    if payload is None or payload.get("token_use") == REFRESH_TOKEN_USE:
         raise credentials_exception
-    
+
     user_id = payload.get("sub")
     if user_id is None:
         raise credentials_exception
 
-    user = await get_user(db, user_id) # Use crud function to get user
+    user = await get_user(db, user_id, fresh=fresh) # Use crud function to get user
     if user is None:
         raise credentials_exception
-    
+
+    # Tokens issued before the user's last password change/reset are revoked
+    if payload.get("ver", 0) != user.token_version:
+        raise credentials_exception
+
     # Ensure the user object returned has all necessary fields for downstream use
     # phone_number is no longer encrypted/decrypted here
     return user
 
+async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_db)) -> User:
+    # Shares the request's read-write session, so handlers can modify and
+    # commit the user; loaded fresh from the primary for that reason
+    return await _load_current_user(token, db, fresh=True)
+
+async def get_current_user_readonly(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_db_readonly)) -> User:
+    """For handlers that only read the current user; loaded on the read-only session."""
+    return await _load_current_user(token, db)
+
+def principal_from_claims(payload: dict) -> UserTokenData | None:
+    """Build the principal from access token claims, or None if they are malformed."""
+    if payload.get("token_use") == REFRESH_TOKEN_USE:
+        return None
+    try:
+        return UserTokenData(
+            user_id=uuid.UUID(payload["sub"]),
+            role=payload["role"],
+            email=payload["email"],
+            phone_number=payload.get("phone_number"),
+            preferred_language=payload.get("preferred_language")
+        )
+    except (KeyError, TypeError, ValueError):
+        return None
+
+async def get_current_principal(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_db_readonly)) -> UserTokenData:
+    """
+    Claims-only alternative to get_current_user for routes that only need
+    identity and role. The user row is not loaded; only the token version is
+    checked, and that is served from an in-process cache.
+    """
+    credentials_exception = _credentials_exception()
+    payload = decode_token(token)
+    if payload is None:
+        raise credentials_exception
+
+    principal = principal_from_claims(payload)
+    if principal is None:
+        raise credentials_exception
+
+    async def load_version(uid: uuid.UUID) -> int | None:
+        return await get_user_token_version(db, uid)
+
+    current_version = await token_version_cache.get(principal.user_id, load_version)
+    if current_version is None or payload.get("ver", 0) != current_version:
+        raise credentials_exception
+
+    return principal
+
 def require_role(required_roles: List[UserRole]):
     async def role_checker(current_user: User = Depends(get_current_user)) -> User:
         if current_user.role not in required_roles:
@@ -41,3 +99,14 @@ def require_role(required_roles: List[UserRole]):
             )
         return current_user
     return role_checker
+
+def require_role_claims(required_roles: List[UserRole]):
+    """Like require_role, but checks the role claim without loading the user."""
+    async def role_checker(principal: UserTokenData = Depends(get_current_principal)) -> UserTokenData:
+        if principal.role not in required_roles:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="The user does not have enough privileges",
+            )
+        return principal
+    return role_checker
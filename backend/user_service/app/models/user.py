@@ -6,6 +6,7 @@ from sqlalchemy import (
     String, 
     Boolean, 
     DateTime, 
+    Integer, 
     Enum as SAEnum, 
     LargeBinary, 
     Index, 
@@ -41,23 +42,55 @@ class User(Base):
     phone_number = Column(String, nullable=True) # No longer encrypted
     preferred_language = Column(SAEnum(Language), default=Language.EN)
     preferred_currency = Column(SAEnum(Currency), default=Currency.ETB)
-    created_at = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     password_changed = Column(Boolean, default=False)
     is_active = Column(Boolean, default=True)
+    token_version = Column(Integer, nullable=False, default=0, server_default="0") # Bumped to revoke issued tokens
+
+    # Keyset pagination for the admin listing walks (created_at, id),
+    # optionally behind an equality filter.
+    __table_args__ = (
+        Index('idx_user_created_at_id', created_at, id),
+        Index('idx_user_role_created_at_id', role, created_at, id),
+        Index('idx_user_is_active_created_at_id', is_active, created_at, id),
+        Index('idx_user_language_created_at_id', preferred_language, created_at, id),
+    )
 
 class RefreshToken(Base):
     __tablename__ = "refresh_tokens"
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
-    token = Column(String, nullable=False) # Hashed refresh token
+    token_digest = Column(String(64), nullable=False) # HMAC-SHA256 of the raw refresh token
     expires_at = Column(DateTime(timezone=True), nullable=False)
     created_at = Column(DateTime(timezone=True), default=datetime.utcnow)
 
     __table_args__ = (
         Index('idx_refresh_token_expires_at', expires_at),
         Index('idx_refresh_token_user_id', user_id),
+        Index('idx_refresh_token_token_digest', token_digest, unique=True),
     )
 
     
+
+class PasswordReset(Base):
+    __tablename__ = "password_resets"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    token_digest = Column(String(64), nullable=False) # HMAC-SHA256 of the raw reset token
+    expires_at = Column(DateTime(timezone=True), nullable=False)
+    created_at = Column(DateTime(timezone=True), default=datetime.utcnow)
+
+    __table_args__ = (
+        Index('idx_password_reset_token_digest', token_digest, unique=True),
+        Index('idx_password_reset_expires_at', expires_at),
+    )
+
+
+class JobRun(Base):
+    __tablename__ = "job_runs"
+
+    name = Column(String(64), primary_key=True) # Scheduled job id
+    last_completed_at = Column(DateTime(timezone=True), nullable=False)
@@ -1,33 +1,278 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.ext.asyncio import AsyncSession
-from typing import List
+from fastapi import APIRouter, Depends, File, HTTPException, Query, UploadFile, status
+from pydantic import ValidationError
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from typing import List, Literal, Optional
 import uuid
 
-from ..dependencies.auth import get_current_user, require_role
-from ..schemas.user import User
-from ..db.session import get_db
-from ..crud import get_user, get_users
-from ..models.user import UserRole
+from ..dependencies.auth import require_role_claims
+from ..schemas.user import User, UserCreate, UserPage, UserLookupRequest, UserLookupResponse
+from ..schemas.token import UserTokenData
+from ..db.session import get_db, get_db_readonly, get_session_factory, replica_set, pool_monitors, query_log
+from ..db.stats import db_totals
+from ..crud import get_user, get_users, lookup_users, stream_user_rows, bulk_insert_users, EXPORT_COLUMNS
+from ..models.user import UserRole, Language
+from ..utils.pagination import encode_cursor, decode_cursor
+from ..utils.export import csv_header, rows_to_csv, rows_to_ndjson
+from ..utils.bulk_import import iter_upload_records
+from ..core.config import settings
+from ..core.hashing import password_hasher, PasswordHasherBusy
+from ..core.user_cache import user_cache
+from ..core.token_cache import verified_token_cache
+from ..core.profiling import request_profiler
+from ..utils.email_queue import email_dispatcher
+from ..utils.cleanup import cleanup_runs
 
 router = APIRouter()
 
-@router.get("/users", response_model=List[User])
+@router.get("/users", response_model=UserPage)
 async def read_all_users(
-    skip: int = 0,
-    limit: int = 100,
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=500),
+    role: Optional[UserRole] = None,
+    is_active: Optional[bool] = None,
+    preferred_language: Optional[Language] = None,
+    db: AsyncSession = Depends(get_db_readonly),
+    current_user: UserTokenData = Depends(require_role_claims([UserRole.ADMIN]))
+):
+    after = None
+    if cursor:
+        try:
+            after = decode_cursor(cursor)
+        except ValueError:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+
+    users, next_position = await get_users(
+        db,
+        limit=limit,
+        after=after,
+        role=role,
+        is_active=is_active,
+        preferred_language=preferred_language
+    )
+    return UserPage(
+        items=users,
+        next_cursor=encode_cursor(*next_position) if next_position else None
+    )
+
+@router.get("/users/export")
+async def export_users(
+    format: Literal["ndjson", "csv"] = "ndjson",
+    session_factory: async_sessionmaker = Depends(get_session_factory),
+    current_user: UserTokenData = Depends(require_role_claims([UserRole.ADMIN]))
+):
+    fields = [column.key for column in EXPORT_COLUMNS]
+
+    async def generate():
+        # The request session from get_db is closed before the body is sent,
+        # so the stream owns its own session for the lifetime of the cursor.
+        async with session_factory() as db:
+            if format == "csv":
+                yield csv_header(fields)
+            async for rows in stream_user_rows(db):
+                if format == "csv":
+                    yield rows_to_csv(rows, fields)
+                else:
+                    yield rows_to_ndjson(rows, fields)
+
+    media_type = "text/csv" if format == "csv" else "application/x-ndjson"
+    return StreamingResponse(
+        generate(),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="users.{format}"'}
+    )
+
+@router.post("/users/import")
+async def import_users(
+    file: UploadFile = File(...),
+    format: Optional[Literal["ndjson", "csv"]] = None,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(require_role([UserRole.ADMIN]))
+    current_user: UserTokenData = Depends(require_role_claims([UserRole.ADMIN]))
+):
+    if format is None:
+        filename = (file.filename or "").lower()
+        format = "ndjson" if filename.endswith((".ndjson", ".jsonl")) else "csv"
+
+    results = []
+    seen_emails = set()
+    batch: list[tuple[int, UserCreate]] = []
+
+    async def flush_batch():
+        # Hash in parallel across the pool, then insert the batch in one statement
+        hashed = await password_hasher.hash_many(
+            [user.password for _, user in batch],
+            concurrency=settings.USER_IMPORT_HASH_CONCURRENCY or None
+        )
+        ready = []
+        for (row_number, user), hashed_password in zip(batch, hashed):
+            if isinstance(hashed_password, PasswordHasherBusy):
+                results.append({
+                    "row": row_number, "email": user.email, "status": "failed",
+                    "error": "Password hashing is busy; retry this row"
+                })
+            else:
+                ready.append((row_number, user, hashed_password))
+        created = await bulk_insert_users(db, [(user, h) for _, user, h in ready])
+        await db.commit()
+        for row_number, user, _ in ready:
+            if user.email in created:
+                results.append({"row": row_number, "email": user.email, "status": "created"})
+            else:
+                results.append({"row": row_number, "email": user.email, "status": "exists"})
+        batch.clear()
+
+    async for row_number, record, error in iter_upload_records(file, format):
+        if error:
+            results.append({"row": row_number, "status": "invalid", "error": error})
+            continue
+        try:
+            user = UserCreate(**record)
+        except ValidationError as e:
+            errors = "; ".join(f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in e.errors())
+            results.append({"row": row_number, "email": record.get("email"), "status": "invalid", "error": errors})
+            continue
+        if user.role == UserRole.ADMIN:
+            results.append({"row": row_number, "email": user.email, "status": "invalid", "error": "Cannot import admin users"})
+            continue
+        if user.email in seen_emails:
+            results.append({"row": row_number, "email": user.email, "status": "duplicate"})
+            continue
+        seen_emails.add(user.email)
+        batch.append((row_number, user))
+        if len(batch) >= settings.USER_IMPORT_BATCH_SIZE:
+            await flush_batch()
+
+    if batch:
+        await flush_batch()
+
+    results.sort(key=lambda r: r["row"])
+    summary = {"created": 0, "exists": 0, "duplicate": 0, "invalid": 0, "failed": 0}
+    for result in results:
+        summary[result["status"]] += 1
+    return {**summary, "results": results}
+
+LOOKUP_COLUMNS = {column.key: column for column in EXPORT_COLUMNS}
+
+@router.post("/users/lookup", response_model=UserLookupResponse)
+async def lookup_users_bulk(
+    lookup: UserLookupRequest,
+    db: AsyncSession = Depends(get_db_readonly),
+    current_user: UserTokenData = Depends(require_role_claims([UserRole.ADMIN]))
 ):
-    users = await get_users(db, skip=skip, limit=limit)
-    return users
+    """
+    Fetch many users by id and/or email in one query, for services that
+    join users onto their own rows. Only the requested public fields are
+    selected; `id` (and `email` when looking up by email) are always
+    included so results can be matched back.
+    """
+    fields = lookup.fields or list(LOOKUP_COLUMNS)
+    unknown = [field for field in fields if field not in LOOKUP_COLUMNS]
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown fields: {', '.join(unknown)}; choose from {', '.join(LOOKUP_COLUMNS)}"
+        )
+    keys = ["id"] + (["email"] if lookup.emails else [])
+    fields = list(dict.fromkeys(keys + fields))
+
+    ids = list(dict.fromkeys(lookup.ids))
+    emails = list(dict.fromkeys(lookup.emails))
+    users = await lookup_users(db, [LOOKUP_COLUMNS[field] for field in fields], ids=ids, emails=emails)
+
+    found_ids = {user["id"] for user in users}
+    found_emails = {user["email"] for user in users} if emails else set()
+    return {
+        "users": users,
+        "missing_ids": [user_id for user_id in ids if user_id not in found_ids],
+        "missing_emails": [email for email in emails if email not in found_emails],
+    }
 
 @router.get("/users/{user_id}", response_model=User)
 async def read_user_by_id(
     user_id: uuid.UUID,
-    db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(require_role([UserRole.ADMIN]))
+    db: AsyncSession = Depends(get_db_readonly),
+    current_user: UserTokenData = Depends(require_role_claims([UserRole.ADMIN]))
 ):
     user = await get_user(db, user_id)
     if user is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
     return user
+
+@router.get("/metrics/password-hashing")
+async def read_password_hashing_metrics(
+    current_user: UserTokenData = Depends(require_role_claims([UserRole.ADMIN]))
+):
+    return password_hasher.stats()
+
+@router.get("/metrics/user-cache")
+async def read_user_cache_metrics(
+    current_user: UserTokenData = Depends(require_role_claims([UserRole.ADMIN]))
+):
+    return user_cache.stats()
+
+@router.get("/metrics/token-cache")
+async def read_token_cache_metrics(
+    current_user: UserTokenData = Depends(require_role_claims([UserRole.ADMIN]))
+):
+    return verified_token_cache.stats()
+
+@router.get("/metrics/email-queue")
+async def read_email_queue_metrics(
+    current_user: UserTokenData = Depends(require_role_claims([UserRole.ADMIN]))
+):
+    return {**email_dispatcher.stats(), "recent_dead_letters": list(email_dispatcher.dead_letters)}
+
+@router.get("/metrics/db")
+async def read_db_metrics(
+    current_user: UserTokenData = Depends(require_role_claims([UserRole.ADMIN]))
+):
+    return {**db_totals, **replica_set.stats()}
+
+@router.get("/metrics/cleanup")
+async def read_cleanup_metrics(
+    current_user: UserTokenData = Depends(require_role_claims([UserRole.ADMIN]))
+):
+    return {"runs": list(cleanup_runs)}
+
+@router.get("/metrics/queries")
+async def read_query_metrics(
+    top: int = Query(20, ge=1, le=200),
+    current_user: UserTokenData = Depends(require_role_claims([UserRole.ADMIN]))
+):
+    return query_log.stats(top=top)
+
+@router.get("/metrics/db-pool")
+async def read_db_pool_metrics(
+    current_user: UserTokenData = Depends(require_role_claims([UserRole.ADMIN]))
+):
+    primary, *replicas = pool_monitors
+    return {
+        "adaptive": settings.DB_POOL_ADAPTIVE,
+        "primary": primary.stats(),
+        "replicas": [monitor.stats() for monitor in replicas],
+    }
+
+@router.get("/profiles")
+async def list_profiles(
+    current_user: UserTokenData = Depends(require_role_claims([UserRole.ADMIN]))
+):
+    return {"enabled": settings.PROFILING_ENABLED, **request_profiler.summary()}
+
+@router.get("/profiles/collapsed", response_class=PlainTextResponse)
+async def download_profile(
+    route: Optional[str] = Query(None, description="Route path, e.g. /api/v1/auth/login; all routes if omitted"),
+    current_user: UserTokenData = Depends(require_role_claims([UserRole.ADMIN]))
+):
+    if route is not None and route not in request_profiler.profiles:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="No profile for this route")
+    filename = "profile.collapsed" if route is None else route.strip("/").replace("/", "_") + ".collapsed"
+    return PlainTextResponse(
+        request_profiler.collapsed(route),
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+@router.delete("/profiles", status_code=status.HTTP_204_NO_CONTENT)
+async def clear_profiles(
+    current_user: UserTokenData = Depends(require_role_claims([UserRole.ADMIN]))
+):
+    request_profiler.clear()
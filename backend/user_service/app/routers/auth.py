@@ -1,33 +1,47 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.ext.asyncio import AsyncSession
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 import secrets
+import uuid
 from pydantic import BaseModel, EmailStr
 
-from ..dependencies.auth import get_current_user
-from ..schemas.token import Token, RefreshToken, UserTokenData
+from ..dependencies.auth import get_current_user, get_current_principal, principal_from_claims
+from ..schemas.token import (
+    Token,
+    RefreshToken,
+    UserTokenData,
+    TokenIntrospection,
+    TokenIntrospectionRequest,
+    TokenIntrospectionResponse
+)
 from ..schemas.user import ChangePassword, User
 from ..core.security import (
     create_access_token,
     create_refresh_token,
-    verify_password,
-    get_password_hash,
+    hash_refresh_token,
+    hash_reset_token,
     decode_token
 )
-from ..db.session import get_db
+from ..core.hashing import hash_password_async, verify_password_async
+from ..core.token_versions import token_version_cache
+from ..core.user_cache import user_cache
+from ..db.session import get_db, get_db_readonly
 from ..crud import (
     get_user_by_email,
     get_user,
     create_refresh_token_db,
-    get_refresh_token_by_token,
-    delete_refresh_token
+    rotate_refresh_token,
+    create_password_reset,
+    consume_password_reset,
+    get_user_token_version,
+    get_user_token_versions
 )
 from ..models.user import UserRole
 from ..core.config import settings
 
-from app.utils.send_email import send_reset_email
-from app.utils.supabase_client import supabase
+from app.utils.send_email import enqueue_reset_email
+from app.utils.email_queue import EmailQueueFull
 
 
 router = APIRouter()
@@ -41,8 +55,14 @@ async def login(
     db: AsyncSession = Depends(get_db),
     form_data: OAuth2PasswordRequestForm = Depends()
 ):
+    # Served by a replica or the user cache, either of which can predate a
+    # password change; a failed check is retried once against the primary
     user = await get_user_by_email(db, email=form_data.username)
-    if not user or not verify_password(form_data.password, user.password):
+    password_ok = user is not None and await verify_password_async(form_data.password, user.password)
+    if user is not None and not password_ok:
+        user = await get_user(db, user.id, fresh=True)
+        password_ok = user is not None and await verify_password_async(form_data.password, user.password)
+    if not password_ok:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
@@ -60,6 +80,17 @@ async def login(
     #         detail="Please change your password on first login."
     #     )
 
+    # Tokens are checked against the primary's version, so mint them with it
+    async def load_version(uid: uuid.UUID) -> int | None:
+        return await get_user_token_version(db, uid)
+
+    token_version = await token_version_cache.get(user.id, load_version)
+    if token_version is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Incorrect email or password",
+        )
+
     phone_number_str = (
         user.phone_number.decode("utf-8")
         if isinstance(user.phone_number, bytes)
@@ -71,7 +102,8 @@ async def login(
         "role": user.role.value,
         "email": user.email,
         "phone_number": phone_number_str,
-        "preferred_language": user.preferred_language.value if user.preferred_language else None
+        "preferred_language": user.preferred_language.value if user.preferred_language else None,
+        "ver": token_version
     }
 
     access_token = create_access_token(data=access_token_data)
@@ -79,15 +111,14 @@ async def login(
     # Create refresh token
     refresh_exp = datetime.utcnow() + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
     raw_refresh_token = create_refresh_token(
-        data={"sub": str(user.id)},
+        data={"sub": str(user.id), "ver": token_version},
         expires_delta=timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
     )
-    hashed_refresh_token = get_password_hash(raw_refresh_token)
 
     await create_refresh_token_db(
         db,
         user_id=user.id,
-        token=hashed_refresh_token,
+        token_digest=hash_refresh_token(raw_refresh_token),
         expires_at=refresh_exp
     )
 
@@ -106,43 +137,38 @@ async def refresh(
     db: AsyncSession = Depends(get_db),
     refresh_token_obj: RefreshToken = Depends()
 ):
-    hashed = get_password_hash(refresh_token_obj.refresh_token)
-    db_refresh_token = await get_refresh_token_by_token(db, hashed)
-
-    if not db_refresh_token or db_refresh_token.expires_at < datetime.utcnow():
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid or expired refresh token"
-        )
-
+    # The JWT is checked statelessly first; the database then swaps the
+    # stored token for the new one in a single statement.
     payload = decode_token(refresh_token_obj.refresh_token)
-    if not payload:
+    try:
+        user_id = uuid.UUID(payload["sub"])
+    except (TypeError, KeyError, ValueError):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid refresh token payload"
         )
+    token_version = payload.get("ver", 0)
 
-    user = await get_user(db, payload.get("sub"))
-    if not user:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="User not found"
-        )
-
-    # Delete old token
-    await delete_refresh_token(db, db_refresh_token.id)
-
-    # Create new refresh token
-    new_exp = datetime.utcnow() + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
+    new_exp = datetime.now(timezone.utc) + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
     new_raw = create_refresh_token(
-        data={"sub": str(user.id)},
+        data={"sub": str(user_id), "ver": token_version},
         expires_delta=timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
     )
-    new_hashed = get_password_hash(new_raw)
 
-    await create_refresh_token_db(
-        db, user_id=user.id, token=new_hashed, expires_at=new_exp
+    user = await rotate_refresh_token(
+        db,
+        token_digest=hash_refresh_token(refresh_token_obj.refresh_token),
+        user_id=user_id,
+        token_version=token_version,
+        new_token_digest=hash_refresh_token(new_raw),
+        new_expires_at=new_exp
     )
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid or expired refresh token"
+        )
+    await db.commit()
 
     phone_number_str = (
         user.phone_number.decode("utf-8")
@@ -156,7 +182,8 @@ async def refresh(
             "role": user.role.value,
             "email": user.email,
             "phone_number": phone_number_str,
-            "preferred_language": user.preferred_language.value if user.preferred_language else None
+            "preferred_language": user.preferred_language.value if user.preferred_language else None,
+            "ver": user.token_version
         }
     )
 
@@ -176,17 +203,20 @@ async def change_password(
     passwords: ChangePassword = Depends(),
     current_user: User = Depends(get_current_user)
 ):
-    if not verify_password(passwords.old_password, current_user.password):
+    if not await verify_password_async(passwords.old_password, current_user.password):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Incorrect old password"
         )
 
-    current_user.password = get_password_hash(passwords.new_password)
+    current_user.password = await hash_password_async(passwords.new_password)
     current_user.password_changed = True
+    current_user.token_version += 1  # revoke previously issued tokens
 
     db.add(current_user)
     await db.commit()
+    token_version_cache.invalidate(current_user.id)
+    user_cache.invalidate(current_user.id, current_user.email)
 
     return {"message": "Password changed successfully"}
 
@@ -210,25 +240,22 @@ async def forgot_password(
         raise HTTPException(status_code=404, detail="User not found")
 
     token = secrets.token_urlsafe(32)
-    expires_at = datetime.utcnow() + timedelta(hours=1)
+    expires_at = datetime.now(timezone.utc) + timedelta(minutes=settings.RESET_TOKEN_EXPIRE_MINUTES)
 
-    reset_link = (
-        f"https://rental-user-management-frontend-sigma.vercel.app/reset-password?token={token}"
+    await create_password_reset(
+        db,
+        user_id=user.id,
+        token_digest=hash_reset_token(token),
+        expires_at=expires_at
     )
+    await db.commit()
 
-    supabase.table("password_resets").insert({
-        "user_id": str(user.id),
-        "email": email,
-        "token": token,
-        "expires_at": expires_at.isoformat()
-    }).execute()
-
+    # Delivery happens on the background email dispatcher
     try:
-        send_reset_email(email, reset_link)
-        return {"message": "Reset link sent successfully"}
-    except Exception as e:
-        print("❌ EMAIL SEND ERROR:", e)
-        raise HTTPException(status_code=500, detail="Failed to send reset email")
+        enqueue_reset_email(email, token)
+    except EmailQueueFull:
+        raise HTTPException(status_code=503, detail="Email service is busy, please retry shortly")
+    return {"message": "Reset link sent successfully"}
 
 
 # ============================================================
@@ -247,33 +274,31 @@ async def reset_password(
     token = request_data.token
     new_password = request_data.password
 
-    result = (
-        supabase.table("password_resets")
-        .select("*")
-        .eq("token", token)
-        .execute()
-    )
+    # Consumes the token in one DELETE ... RETURNING; expired rows are
+    # consumed too, which clears them out.
+    reset_row = await consume_password_reset(db, hash_reset_token(token))
 
-    if not result.data:
+    if not reset_row:
         raise HTTPException(status_code=400, detail="Invalid token")
 
-    reset_row = result.data[0]
-    expires_at = datetime.fromisoformat(reset_row["expires_at"])
+    user_id, expires_at = reset_row
 
-    if expires_at < datetime.utcnow():
+    if expires_at < datetime.now(timezone.utc):
+        await db.commit()
         raise HTTPException(status_code=400, detail="Expired token")
 
-    user = await get_user(db, reset_row["user_id"])
+    user = await get_user(db, user_id, fresh=True)
 
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
 
-    user.password = get_password_hash(new_password)
+    user.password = await hash_password_async(new_password)
+    user.token_version += 1  # revoke previously issued tokens
 
     db.add(user)
     await db.commit()
-
-    supabase.table("password_resets").delete().eq("token", token).execute()
+    token_version_cache.invalidate(user.id)
+    user_cache.invalidate(user.id, user.email)
 
     return {"message": "Password has been reset successfully."}
 
@@ -282,17 +307,53 @@ async def reset_password(
 # VERIFY TOKEN
 # ============================================================
 @router.get("/verify", response_model=UserTokenData)
-async def verify_token(current_user: User = Depends(get_current_user)):
-    phone_number_str = (
-        current_user.phone_number.decode("utf-8")
-        if isinstance(current_user.phone_number, bytes)
-        else current_user.phone_number
+async def verify_token(principal: UserTokenData = Depends(get_current_principal)):
+    # Served from the token claims; no user row is loaded
+    return principal
+
+
+# ============================================================
+# BATCH INTROSPECTION
+# ============================================================
+@router.post("/introspect", response_model=TokenIntrospectionResponse)
+async def introspect_tokens(
+    request_data: TokenIntrospectionRequest,
+    db: AsyncSession = Depends(get_db_readonly)
+):
+    """
+    Verify a batch of access tokens in one call, with the same checks as
+    /verify. Token versions not in the cache are loaded for all distinct
+    users in a single query.
+    """
+    principals: dict[str, UserTokenData | str] = {}
+    versions_claimed: dict[str, int] = {}
+    for token in dict.fromkeys(request_data.tokens):
+        payload = decode_token(token)
+        if payload is None:
+            principals[token] = "invalid_token"
+            continue
+        principal = principal_from_claims(payload)
+        if principal is None:
+            principals[token] = "malformed_claims"
+            continue
+        principals[token] = principal
+        versions_claimed[token] = payload.get("ver", 0)
+
+    async def load_versions(user_ids: list[uuid.UUID]) -> dict[uuid.UUID, int]:
+        return await get_user_token_versions(db, user_ids)
+
+    current_versions = await token_version_cache.get_many(
+        (p.user_id for p in principals.values() if isinstance(p, UserTokenData)),
+        load_versions
     )
 
-    return UserTokenData(
-        user_id=current_user.id,
-        role=current_user.role,
-        email=current_user.email,
-        phone_number=phone_number_str,
-        preferred_language=current_user.preferred_language
-    )
\ No newline at end of file
+    results = []
+    for token in request_data.tokens:
+        principal = principals[token]
+        if isinstance(principal, str):
+            results.append(TokenIntrospection(active=False, error=principal))
+        elif current_versions[principal.user_id] != versions_claimed[token]:
+            results.append(TokenIntrospection(active=False, error="revoked"))
+        else:
+            results.append(TokenIntrospection(active=True, claims=principal))
+    return {"results": results}
@@ -1,10 +1,11 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
-from ..dependencies.auth import get_current_user
+from ..dependencies.auth import get_current_user, get_current_user_readonly
 from ..schemas.user import User, UserCreate, UserUpdate
 from ..db.session import get_db
-from ..crud import create_user, get_user_by_email
+from ..crud import create_user
 from ..models.user import UserRole
+from ..core.user_cache import user_cache
 
 router = APIRouter()
 
@@ -13,13 +14,14 @@ async def register_user(user: UserCreate, db: AsyncSession = Depends(get_db)):
     if user.role == UserRole.ADMIN:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Cannot register as an admin.")
 
-    db_user = await get_user_by_email(db, email=user.email)
-    if db_user:
+    # The insert itself detects an existing email; no lookup beforehand
+    db_user = await create_user(db=db, user=user)
+    if db_user is None:
         raise HTTPException(status_code=400, detail="Email already registered")
-    return await create_user(db=db, user=user)
+    return db_user
 
 @router.get("/me", response_model=User)
-async def read_users_me(current_user: User = Depends(get_current_user)):
+async def read_users_me(current_user: User = Depends(get_current_user_readonly)):
     return current_user
 
 @router.put("/me", response_model=User)
@@ -36,6 +38,7 @@ async def update_user_me(user_in: UserUpdate, db: AsyncSession = Depends(get_db)
     
     db.add(current_user)
     await db.commit()
+    user_cache.invalidate(current_user.id, current_user.email)
     await db.refresh(current_user)
     # Ensure phone_number is a string before returning
     phone_number_str = current_user.phone_number
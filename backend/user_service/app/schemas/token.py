@@ -1,7 +1,8 @@
-from pydantic import BaseModel, EmailStr
-from typing import Optional
+from pydantic import BaseModel, EmailStr, Field
+from typing import List, Literal, Optional
 import uuid
 from ..models.user import UserRole, Language
+from ..core.config import settings
 
 class Token(BaseModel):
     access_token: str
@@ -16,4 +17,15 @@ class UserTokenData(BaseModel):
     role: UserRole
     email: EmailStr
     phone_number: Optional[str] = None
-    preferred_language: Optional[Language] = None
\ No newline at end of file
+    preferred_language: Optional[Language] = None
+
+class TokenIntrospectionRequest(BaseModel):
+    tokens: List[str] = Field(..., min_length=1, max_length=settings.INTROSPECTION_MAX_TOKENS)
+
+class TokenIntrospection(BaseModel):
+    active: bool
+    claims: Optional[UserTokenData] = None
+    error: Optional[Literal["invalid_token", "malformed_claims", "revoked"]] = None
+
+class TokenIntrospectionResponse(BaseModel):
+    results: List[TokenIntrospection]  # in request order
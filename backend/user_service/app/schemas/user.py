@@ -1,7 +1,8 @@
 from pydantic import BaseModel, EmailStr, Field, model_validator
-from typing import Optional, Self
+from typing import Any, Dict, List, Optional, Self
 import uuid
 from ..models.user import UserRole, Language, Currency
+from ..core.config import settings
 
 
 class UserBase(BaseModel):
@@ -33,9 +34,31 @@ class UserInDBBase(UserBase):
 class User(UserInDBBase):
     phone_number: Optional[str] = None # Explicitly define phone_number as str
 
+class UserPage(BaseModel):
+    items: List[User]
+    next_cursor: Optional[str] = None # Pass back as `cursor` to fetch the next page
+
 class UserInDB(UserInDBBase):
     password: Optional[str] = None
 
 class ChangePassword(BaseModel):
     old_password: str
-    new_password: str
\ No newline at end of file
+    new_password: str
+
+class UserLookupRequest(BaseModel):
+    ids: List[uuid.UUID] = []
+    emails: List[EmailStr] = []
+    fields: Optional[List[str]] = None # Public columns to return; all when omitted
+
+    @model_validator(mode="after")
+    def check_keys(self) -> Self:
+        if not self.ids and not self.emails:
+            raise ValueError("Provide ids or emails")
+        if len(self.ids) + len(self.emails) > settings.USER_LOOKUP_MAX_KEYS:
+            raise ValueError(f"At most {settings.USER_LOOKUP_MAX_KEYS} ids and emails per lookup")
+        return self
+
+class UserLookupResponse(BaseModel):
+    users: List[Dict[str, Any]]
+    missing_ids: List[uuid.UUID]
+    missing_emails: List[str]
@@ -0,0 +1,60 @@
+import csv
+import json
+from typing import AsyncIterator
+
+from fastapi import UploadFile
+
+
+async def iter_upload_lines(upload: UploadFile, chunk_size: int = 64 * 1024) -> AsyncIterator[str]:
+    """Yield decoded lines from an upload without reading it all into memory."""
+    pending = b""
+    while True:
+        chunk = await upload.read(chunk_size)
+        if not chunk:
+            break
+        pending += chunk
+        *lines, pending = pending.split(b"\n")
+        for line in lines:
+            yield line.decode("utf-8-sig") + "\n"
+    if pending:
+        yield pending.decode("utf-8-sig")
+
+
+async def iter_upload_records(upload: UploadFile, format: str) -> AsyncIterator[tuple[int, dict | None, str | None]]:
+    """
+    Yield (row_number, record, error) for each data row of a CSV (with a
+    header row) or NDJSON upload. Blank lines are skipped; rows that cannot
+    be parsed are yielded with record=None and an error message. Records
+    are one per line, so CSV fields cannot contain embedded newlines.
+    """
+    row_number = 0
+    if format == "ndjson":
+        async for line in iter_upload_lines(upload):
+            if not line.strip():
+                continue
+            row_number += 1
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as e:
+                yield row_number, None, f"Invalid JSON: {e.msg}"
+                continue
+            if not isinstance(record, dict):
+                yield row_number, None, "Each line must be a JSON object"
+                continue
+            yield row_number, record, None
+        return
+
+    header = None
+    async for line in iter_upload_lines(upload):
+        if not line.strip():
+            continue
+        values = next(csv.reader([line]))
+        if header is None:
+            header = [h.strip() for h in values]
+            continue
+        row_number += 1
+        if len(values) != len(header):
+            yield row_number, None, f"Expected {len(header)} columns, got {len(values)}"
+            continue
+        # Empty CSV cells mean "not provided" so model defaults apply
+        yield row_number, {k: v for k, v in zip(header, values) if v != ""}, None
@@ -1,35 +1,136 @@
 import asyncio
+import time
+from collections import deque
 from datetime import datetime, timedelta
 import pytz
 
-from sqlalchemy import delete
-from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import delete, func, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
 from ..core.config import settings
+from ..core.metrics import registry
 from ..db.session import async_session
-from ..models.user import RefreshToken
+from ..models.user import JobRun, PasswordReset, RefreshToken
 from .retry import async_retry
 
 # Define the EAT timezone
 EAT = pytz.timezone('Africa/Addis_Ababa')
 
+# pg advisory lock key held by the worker that runs the cleanup
+CLEANUP_LOCK_KEY = 7_231_001
+# job_runs row recording the last completed cleanup
+CLEANUP_JOB_NAME = "refresh_token_cleanup_job"
+
+# Most recent runs, newest last, for the admin metrics endpoint
+cleanup_runs: deque = deque(maxlen=50)
+
+cleanup_rows_deleted_total = registry.counter(
+    "cleanup_rows_deleted_total", "Expired rows deleted by the cleanup job.", ("table",)
+)
+cleanup_duration_seconds = registry.histogram(
+    "cleanup_duration_seconds", "Cleanup job run time.",
+    buckets=(0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0, 300.0, 900.0)
+)
+
+async def _delete_expired_chunk(db: AsyncSession, model, threshold: datetime, chunk_size: int) -> int:
+    """
+    Delete up to `chunk_size` rows expired before `threshold` and commit.
+
+    DELETE ... WHERE id IN (SELECT id ... LIMIT n FOR UPDATE SKIP LOCKED):
+    rows another transaction is holding are skipped rather than waited on.
+    """
+    expired_ids = (
+        select(model.id)
+        .where(model.expires_at < threshold)
+        .limit(chunk_size)
+        .with_for_update(skip_locked=True)
+    )
+    result = await db.execute(delete(model).where(model.id.in_(expired_ids)))
+    await db.commit()
+    return result.rowcount
+
+async def _delete_expired(session_factory: async_sessionmaker, model, threshold: datetime) -> tuple[int, int]:
+    """Delete expired rows chunk by chunk, pausing between chunks. Returns (rows, chunks)."""
+    deleted = chunks = 0
+    while True:
+        async with session_factory() as db:
+            count = await _delete_expired_chunk(db, model, threshold, settings.CLEANUP_CHUNK_SIZE)
+        deleted += count
+        chunks += 1
+        if count < settings.CLEANUP_CHUNK_SIZE:
+            return deleted, chunks
+        await asyncio.sleep(settings.CLEANUP_CHUNK_PAUSE_SECONDS)
+
+def _schedule_window_start(now: datetime) -> datetime:
+    """The latest scheduled cleanup time (daily, CLEANUP_SCHEDULE_HOUR EAT) at or before `now`."""
+    local = now.astimezone(EAT)
+    start = local.replace(hour=settings.CLEANUP_SCHEDULE_HOUR, minute=0, second=0, microsecond=0)
+    if start > local:
+        start -= timedelta(days=1)
+    return start
+
 @async_retry(tries=3, delay=2, backoff=2)
-async def cleanup_expired_refresh_tokens():
+async def cleanup_expired_refresh_tokens(session_factory: async_sessionmaker = async_session) -> dict | None:
+    """
+    Delete expired refresh tokens and password reset tokens.
+
+    Every worker schedules this job; the one that wins a Postgres advisory
+    lock runs it and the others return None. The lock is transaction-scoped,
+    so it is released when the run finishes or its connection drops. A
+    worker whose job fires late takes the released lock, so the leader
+    records its completion in job_runs before releasing it, and a run that
+    finds one in the current schedule window is skipped too.
+    """
     print("Starting cleanup of expired refresh tokens...")
-    async with async_session_factory() as db:
+    started_at = datetime.now(pytz.utc)
+    started = time.perf_counter()
+    async with session_factory() as lock_session:
+        acquired = await lock_session.scalar(select(func.pg_try_advisory_xact_lock(CLEANUP_LOCK_KEY)))
+        if not acquired:
+            print("Cleanup skipped: another worker holds the cleanup lock.")
+            return None
+        last_completed_at = await lock_session.scalar(
+            select(JobRun.last_completed_at).where(JobRun.name == CLEANUP_JOB_NAME)
+        )
+        if last_completed_at is not None and last_completed_at >= _schedule_window_start(started_at):
+            await lock_session.commit()
+            print(f"Cleanup skipped: already completed at {last_completed_at.isoformat()}.")
+            return None
         try:
             # Calculate the expiration threshold (7 days ago from now in EAT)
             # Convert current UTC time to EAT, then subtract 7 days
-            now_utc = datetime.now(pytz.utc)
-            now_eat = now_utc.astimezone(EAT)
+            now_eat = started_at.astimezone(EAT)
             expiration_threshold = now_eat - timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
 
-            # Delete tokens where expires_at is older than the threshold
-            result = await db.execute(
-                delete(RefreshToken).where(RefreshToken.expires_at < expiration_threshold)
+            refresh_tokens_deleted, refresh_chunks = await _delete_expired(
+                session_factory, RefreshToken, expiration_threshold
             )
-            deleted_count = result.rowcount
-            print(f"Cleanup complete: Deleted {deleted_count} expired refresh tokens.")
+            password_resets_deleted, reset_chunks = await _delete_expired(
+                session_factory, PasswordReset, started_at
+            )
+            # Committed with the lock release below, so no worker sees the lock free without it
+            await lock_session.merge(JobRun(name=CLEANUP_JOB_NAME, last_completed_at=datetime.now(pytz.utc)))
         except Exception as e:
             print(f"Error during refresh token cleanup: {e}")
             raise # Re-raise to trigger retry
+        finally:
+            # Ends the lock's transaction, releasing the lock
+            await lock_session.commit()
+
+    duration = time.perf_counter() - started
+    run = {
+        "started_at": started_at.isoformat(),
+        "duration_seconds": round(duration, 3),
+        "refresh_tokens_deleted": refresh_tokens_deleted,
+        "password_resets_deleted": password_resets_deleted,
+        "chunks": refresh_chunks + reset_chunks,
+    }
+    cleanup_runs.append(run)
+    cleanup_rows_deleted_total.inc(refresh_tokens_deleted, table="refresh_tokens")
+    cleanup_rows_deleted_total.inc(password_resets_deleted, table="password_resets")
+    cleanup_duration_seconds.observe(duration)
+    print(
+        f"Cleanup complete: Deleted {refresh_tokens_deleted} expired refresh tokens and "
+        f"{password_resets_deleted} expired password reset tokens in {duration:.2f}s."
+    )
+    return run
@@ -0,0 +1,206 @@
+import asyncio
+import smtplib
+import time
+from collections import deque
+from email.message import Message
+
+from ..core.config import settings
+from ..core.metrics import registry
+
+
+class EmailQueueFull(Exception):
+    """Raised when the outbound email queue cannot accept more messages."""
+
+
+class EmailDispatcher:
+    """
+    Background email sender.
+
+    Messages are put on an asyncio queue and sent by `workers` tasks. Each
+    worker keeps its own authenticated SMTP connection open and reuses it
+    for every message, reconnecting only when the server drops it. The
+    blocking smtplib calls run in a thread so the event loop never waits on
+    SMTP. Failed sends are retried with exponential backoff; messages that
+    still fail after `max_retries` attempts go to `dead_letters`.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        username: str | None = None,
+        password: str | None = None,
+        use_tls: bool = True,
+        workers: int = 2,
+        max_queue_size: int = 1000,
+        max_retries: int = 3,
+        retry_base_delay: float = 1.0,
+        dead_letter_limit: int = 100,
+    ):
+        # With no workers nothing would drain the queue, and since `running`
+        # is judged by the worker tasks every enqueue would replace it
+        if workers < 1:
+            raise ValueError(f"EmailDispatcher needs at least one worker, got {workers}")
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.use_tls = use_tls
+        self.workers = workers
+        self.max_queue_size = max_queue_size
+        self.max_retries = max_retries
+        self.retry_base_delay = retry_base_delay
+        self.dead_letters: deque = deque(maxlen=dead_letter_limit)
+        self._queue: asyncio.Queue | None = None
+        self._tasks: list[asyncio.Task] = []
+        self._sent = 0
+        self._retried = 0
+        self._failed = 0
+
+    @property
+    def running(self) -> bool:
+        return bool(self._tasks)
+
+    def start(self) -> None:
+        if self.running:
+            return
+        self._queue = asyncio.Queue(maxsize=self.max_queue_size)
+        self._tasks = [
+            asyncio.create_task(self._worker(), name=f"email-worker-{i}")
+            for i in range(self.workers)
+        ]
+
+    async def stop(self, timeout: float = 10) -> None:
+        """Wait up to `timeout` seconds for queued mail, then stop the workers."""
+        if not self.running:
+            return
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout)
+        except asyncio.TimeoutError:
+            print(f"Email queue not drained on shutdown; {self._queue.qsize()} message(s) dropped.")
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def join(self) -> None:
+        """Wait until every queued message has been sent or dead-lettered."""
+        if self._queue is not None:
+            await self._queue.join()
+
+    def enqueue(self, message: Message) -> None:
+        """Queue a message for delivery and return immediately."""
+        self.start()
+        try:
+            self._queue.put_nowait(message)
+        except asyncio.QueueFull:
+            raise EmailQueueFull("Outbound email queue is full")
+
+    def _connect(self) -> smtplib.SMTP:
+        server = smtplib.SMTP(self.host, self.port, timeout=30)
+        if self.use_tls:
+            server.starttls()
+        if self.username and self.password:
+            server.login(self.username, self.password)
+        return server
+
+    @staticmethod
+    def _close(server: smtplib.SMTP | None) -> None:
+        if server is None:
+            return
+        try:
+            server.quit()
+        except smtplib.SMTPException:
+            server.close()
+        except OSError:
+            pass
+
+    def _send(self, server: smtplib.SMTP | None, message: Message) -> smtplib.SMTP:
+        """Send over the existing connection, reconnecting once if it was dropped."""
+        if server is None:
+            server = self._connect()
+        try:
+            server.send_message(message)
+        except smtplib.SMTPServerDisconnected:
+            self._close(server)
+            server = self._connect()
+            server.send_message(message)
+        return server
+
+    def _dead_letter(self, message: Message, error: Exception, attempts: int) -> None:
+        self._failed += 1
+        self.dead_letters.append({
+            "to": message["To"],
+            "subject": message["Subject"],
+            "error": str(error),
+            "failed_at": time.time(),
+        })
+        print(f"Failed to send email to {message['To']} after {attempts} attempts: {error}")
+
+    async def _worker(self) -> None:
+        server: smtplib.SMTP | None = None
+        try:
+            while True:
+                message = await self._queue.get()
+                try:
+                    for attempt in range(1, self.max_retries + 1):
+                        try:
+                            server = await asyncio.to_thread(self._send, server, message)
+                            self._sent += 1
+                            break
+                        except (smtplib.SMTPException, OSError) as e:
+                            # The connection may be unusable after an error
+                            await asyncio.to_thread(self._close, server)
+                            server = None
+                            if attempt == self.max_retries:
+                                self._dead_letter(message, e, attempt)
+                            else:
+                                self._retried += 1
+                                await asyncio.sleep(self.retry_base_delay * 2 ** (attempt - 1))
+                        except Exception as e:
+                            # Not a delivery problem (e.g. a message that cannot be
+                            # serialized); retrying will not help, and the worker
+                            # must survive to send the rest of the queue
+                            await asyncio.to_thread(self._close, server)
+                            server = None
+                            self._dead_letter(message, e, attempt)
+                            break
+                finally:
+                    self._queue.task_done()
+        finally:
+            await asyncio.to_thread(self._close, server)
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "running": self.running,
+            "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+            "sent": self._sent,
+            "retried": self._retried,
+            "failed": self._failed,
+            "dead_letters": len(self.dead_letters),
+        }
+
+
+email_dispatcher = EmailDispatcher(
+    host=settings.SMTP_HOST,
+    port=settings.SMTP_PORT,
+    username=settings.SMTP_USER,
+    password=settings.SMTP_PASS.get_secret_value(),
+    use_tls=settings.SMTP_USE_TLS,
+    workers=settings.EMAIL_WORKERS,
+    max_queue_size=settings.EMAIL_QUEUE_MAX_SIZE,
+    max_retries=settings.EMAIL_MAX_RETRIES,
+    retry_base_delay=settings.EMAIL_RETRY_BASE_DELAY
+)
+
+registry.gauge(
+    "email_queue_depth", "Emails waiting to be sent.",
+    callback=lambda: email_dispatcher.stats()["queue_depth"]
+)
+registry.counter(
+    "email_messages_total", "Email send outcomes.", ("outcome",),
+    callback=lambda: {
+        (outcome,): email_dispatcher.stats()[outcome] for outcome in ("sent", "retried", "failed")
+    }
+)
@@ -0,0 +1,42 @@
+import csv
+import enum
+import io
+import json
+import uuid
+from datetime import datetime
+from typing import Any, Sequence
+
+
+def _plain(value: Any) -> Any:
+    if isinstance(value, enum.Enum):
+        return value.value
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, bytes):
+        return value.decode("utf-8")
+    return value
+
+
+def rows_to_ndjson(rows: Sequence[Any], fields: Sequence[str]) -> str:
+    """Serialize rows as newline-delimited JSON objects."""
+    return "".join(
+        json.dumps({field: _plain(value) for field, value in zip(fields, row)}) + "\n"
+        for row in rows
+    )
+
+
+def csv_header(fields: Sequence[str]) -> str:
+    buffer = io.StringIO()
+    csv.writer(buffer).writerow(fields)
+    return buffer.getvalue()
+
+
+def rows_to_csv(rows: Sequence[Any], fields: Sequence[str]) -> str:
+    """Serialize rows as CSV lines, without a header."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow(["" if value is None else _plain(value) for value in row])
+    return buffer.getvalue()
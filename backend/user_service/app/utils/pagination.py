@@ -0,0 +1,20 @@
+import base64
+import json
+import uuid
+from datetime import datetime
+
+
+def encode_cursor(created_at: datetime, user_id: uuid.UUID) -> str:
+    """Encode a keyset position as an opaque URL-safe token."""
+    raw = json.dumps({"c": created_at.isoformat(), "i": str(user_id)}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, uuid.UUID]:
+    """Decode a token from encode_cursor(). Raises ValueError if it is malformed."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        return datetime.fromisoformat(data["c"]), uuid.UUID(data["i"])
+    except (KeyError, TypeError, ValueError, UnicodeError) as e:
+        raise ValueError("Invalid cursor") from e
@@ -2,8 +2,9 @@ import smtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from app.core.config import settings
+from app.utils.email_queue import email_dispatcher
 
-def send_reset_email(to_email: str, token: str):
+def build_reset_email(to_email: str, token: str) -> MIMEMultipart:
     reset_link = f"{settings.FRONTEND_URL}/reset-password?token={token}"
 
     msg = MIMEMultipart("alternative")
@@ -21,6 +22,15 @@ def send_reset_email(to_email: str, token: str):
     </html>
     """
     msg.attach(MIMEText(html, "html"))
+    return msg
+
+def enqueue_reset_email(to_email: str, token: str):
+    """Queue the reset email on the background dispatcher and return immediately."""
+    email_dispatcher.enqueue(build_reset_email(to_email, token))
+
+def send_reset_email(to_email: str, token: str):
+    """Send the reset email synchronously over a fresh SMTP connection."""
+    msg = build_reset_email(to_email, token)
 
     try:
         print(f"Attempting to connect to SMTP server: {settings.SMTP_HOST}:{settings.SMTP_PORT}")
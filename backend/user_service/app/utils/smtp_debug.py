@@ -0,0 +1,80 @@
+import asyncio
+from email import message_from_bytes
+from email.message import Message
+
+
+class LocalSMTPServer:
+    """
+    Minimal in-process SMTP server for tests and local debugging.
+
+    Speaks just enough SMTP (EHLO/HELO, MAIL, RCPT, DATA, RSET, NOOP, QUIT)
+    for smtplib to deliver to it, without STARTTLS or AUTH. Every accepted
+    message is parsed and appended to `messages`.
+
+        server = LocalSMTPServer()
+        await server.start()
+        ... point the email dispatcher at server.host / server.port ...
+        await server.stop()
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0):
+        self.host = host
+        self.port = port
+        self.messages: list[Message] = []
+        self.fail_next = 0  # reply 451 to the next N messages, to exercise retries
+        self._server: asyncio.AbstractServer | None = None
+
+    async def start(self) -> None:
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def stop(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        async def reply(line: str) -> None:
+            writer.write(f"{line}\r\n".encode())
+            await writer.drain()
+
+        await reply("220 localhost LocalSMTPServer ready")
+        try:
+            while True:
+                raw = await reader.readline()
+                if not raw:
+                    break
+                command = raw.decode("utf-8", "replace").strip()
+                verb = command.split(" ", 1)[0].upper()
+
+                if verb == "EHLO":
+                    await reply("250-localhost")
+                    await reply("250 8BITMIME")
+                elif verb in ("HELO", "MAIL", "RCPT", "RSET", "NOOP"):
+                    await reply("250 OK")
+                elif verb == "DATA":
+                    await reply("354 End data with <CR><LF>.<CR><LF>")
+                    lines = []
+                    while True:
+                        line = await reader.readline()
+                        if not line or line in (b".\r\n", b".\n"):
+                            break
+                        if line.startswith(b".."):
+                            line = line[1:]
+                        lines.append(line)
+                    if self.fail_next > 0:
+                        self.fail_next -= 1
+                        await reply("451 Temporary failure, try again")
+                    else:
+                        self.messages.append(message_from_bytes(b"".join(lines)))
+                        await reply("250 Message accepted")
+                elif verb == "QUIT":
+                    await reply("221 Bye")
+                    break
+                else:
+                    await reply("502 Command not implemented")
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
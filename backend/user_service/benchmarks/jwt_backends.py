@@ -0,0 +1,100 @@
+"""
+Micro-benchmark of the JWT backends.
+
+Measures sign (encode) and verify (decode) throughput of each installed
+backend on a token shaped like our access tokens, and prints ops/sec as
+JSON:
+
+    python -m benchmarks.jwt_backends
+    python -m benchmarks.jwt_backends --backend hmac --backend jose --iterations 50000 --out jwt.json
+
+Each measurement is the best of --repeat runs, which filters out noise
+from other processes. Verify is measured on a token from the same backend.
+"""
+import argparse
+import json
+import platform
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from app.core.jwt_backends import available_backends, create_backend
+
+from .run import _git_commit
+
+
+def _claims() -> dict:
+    return {
+        "sub": str(uuid.uuid4()),
+        "role": "tenant",
+        "email": "bench@example.com",
+        "phone_number": "+251911000000",
+        "preferred_language": "en",
+        "ver": 0,
+        "exp": datetime.utcnow() + timedelta(minutes=15),
+        "iat": datetime.utcnow(),
+    }
+
+
+def _ops_per_second(func, arg, iterations: int, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for _ in range(iterations):
+            func(arg)
+        best = min(best, time.perf_counter() - started)
+    return iterations / best if best else 0.0
+
+
+def bench_backend(name: str, algorithm: str, secret: str, iterations: int, repeat: int) -> dict:
+    backend = create_backend(name, algorithm, secret)
+    claims = _claims()
+    token = backend.sign(claims)
+    backend.verify(token)  # fail early on a broken backend
+    sign = _ops_per_second(backend.sign, claims, iterations, repeat)
+    verify = _ops_per_second(backend.verify, token, iterations, repeat)
+    return {
+        "backend": name,
+        "algorithm": algorithm,
+        "iterations": iterations,
+        "sign_ops_per_sec": round(sign),
+        "verify_ops_per_sec": round(verify),
+        "sign_us": round(1e6 / sign, 2) if sign else None,
+        "verify_us": round(1e6 / verify, 2) if verify else None,
+    }
+
+
+def main() -> None:
+    backends = available_backends()
+    parser = argparse.ArgumentParser(description="Benchmark the JWT backends.")
+    parser.add_argument("--backend", action="append", choices=backends, dest="backends",
+                        help="repeat to run several; default: all installed")
+    parser.add_argument("--algorithm", default="HS256", choices=["HS256", "HS384", "HS512"])
+    parser.add_argument("--iterations", type=int, default=20000, help="operations per run")
+    parser.add_argument("--repeat", type=int, default=5, help="runs per measurement; the best is kept")
+    parser.add_argument("--out", help="write the JSON report here instead of stdout")
+    args = parser.parse_args()
+
+    secret = "benchmark-secret-" + "x" * 32
+    results = []
+    for name in args.backends or backends:
+        results.append(bench_backend(name, args.algorithm, secret, args.iterations, args.repeat))
+        print(json.dumps(results[-1]), file=sys.stderr)
+
+    report = {
+        "commit": _git_commit(),
+        "started_at": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "results": results,
+    }
+    output = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,281 @@
+"""
+Load benchmark for the auth flows.
+
+Runs scripted scenarios against the app with a fixed number of concurrent
+workers and prints throughput and latency percentiles as JSON:
+
+    python -m benchmarks.seed --users 1000 --out bench-seed.json
+    python -m benchmarks.run --seed-file bench-seed.json --target asgi
+    python -m benchmarks.run --seed-file bench-seed.json --target uvicorn \\
+        --scenario login --scenario verify --concurrency 32 --requests 2000 --out login.json
+
+Targets:
+  asgi     the app in this process through httpx's ASGI transport; no
+           network or server overhead, so it isolates the app's own cost
+  uvicorn  a local uvicorn server started for the run
+  URL      an already running server, e.g. http://127.0.0.1:8000
+
+Compare the JSON output of two commits run with the same arguments and
+seed file to spot regressions. The refresh scenario rotates the seeded
+refresh tokens, so re-run benchmarks.seed (same arguments) before each run.
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import math
+import platform
+import socket
+import subprocess
+import sys
+import time
+import uuid
+from collections import Counter
+from datetime import datetime, timezone
+
+import httpx
+
+SCENARIOS = {}
+
+
+def scenario(name: str):
+    def register(func):
+        SCENARIOS[name] = func
+        return func
+    return register
+
+
+def _user(data: dict, worker: int, i: int) -> dict:
+    users = data["users"]
+    return users[(worker * 7919 + i) % len(users)]
+
+
+def _bearer(token: str) -> dict:
+    return {"Authorization": f"Bearer {token}"}
+
+
+@scenario("register")
+async def register(client: httpx.AsyncClient, data: dict, worker: int, i: int, state: dict) -> httpx.Response:
+    # Unique per run, so repeated runs never collide with earlier users
+    run_id = state.setdefault("run_id", uuid.uuid4().hex[:8])
+    return await client.post("/api/v1/users/register", json={
+        "email": f"{data['prefix']}-reg-{run_id}-{i}@bench.example.com",
+        "password": data["password"],
+        "full_name": "Bench Register",
+    })
+
+
+@scenario("login")
+async def login(client, data, worker, i, state):
+    return await client.post("/api/v1/auth/login", data={
+        "username": _user(data, worker, i)["email"],
+        "password": data["password"],
+    })
+
+
+@scenario("refresh")
+async def refresh(client, data, worker, i, state):
+    # Refresh tokens are single use: each worker follows its own rotation chain
+    if "refresh_token" not in state:
+        users = data["users"]
+        user = users[worker % len(users)]
+        state["refresh_token"] = user["refresh_tokens"][worker // len(users)]
+    response = await client.post("/api/v1/auth/refresh", params={"refresh_token": state["refresh_token"]})
+    if response.status_code == 200:
+        state["refresh_token"] = response.json()["refresh_token"]
+    return response
+
+
+@scenario("verify")
+async def verify(client, data, worker, i, state):
+    return await client.get("/api/v1/auth/verify", headers=_bearer(_user(data, worker, i)["access_token"]))
+
+
+@scenario("me")
+async def me(client, data, worker, i, state):
+    return await client.get("/api/v1/users/me", headers=_bearer(_user(data, worker, i)["access_token"]))
+
+
+@scenario("admin_list")
+async def admin_list(client, data, worker, i, state):
+    return await client.get(
+        "/api/v1/admin/users", params={"limit": 50}, headers=_bearer(data["admin"]["access_token"])
+    )
+
+
+def _percentile(sorted_values: list[float], fraction: float) -> float:
+    """Nearest-rank percentile."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(fraction * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+async def run_scenario(
+    client: httpx.AsyncClient,
+    name: str,
+    data: dict,
+    concurrency: int,
+    requests: int,
+    warmup: int = 0,
+) -> dict:
+    func = SCENARIOS[name]
+    if name == "refresh" and (concurrency - 1) // len(data["users"]) >= len(data["users"][0]["refresh_tokens"]):
+        raise SystemExit("refresh needs one seeded refresh token per worker; seed more users or tokens")
+
+    states = [{} for _ in range(concurrency)]
+    latencies: list[float] = []
+    statuses: Counter = Counter()
+    errors: Counter = Counter()
+
+    async def drive(total: int, record: bool) -> None:
+        counter = itertools.count()
+
+        async def worker(w: int) -> None:
+            while (i := next(counter)) < total:
+                started = time.perf_counter()
+                try:
+                    response = await func(client, data, w, i, states[w])
+                except httpx.HTTPError as e:
+                    if record:
+                        errors[type(e).__name__] += 1
+                    continue
+                if record:
+                    latencies.append(time.perf_counter() - started)
+                    statuses[response.status_code] += 1
+
+        await asyncio.gather(*(worker(w) for w in range(concurrency)))
+
+    if warmup:
+        await drive(warmup, record=False)
+    started = time.perf_counter()
+    await drive(requests, record=True)
+    duration = time.perf_counter() - started
+
+    ordered = sorted(latencies)
+    ok = sum(n for code, n in statuses.items() if code < 400)
+    # Requests that got a response; transport errors are left out of throughput
+    completed = len(ordered)
+    return {
+        "scenario": name,
+        "concurrency": concurrency,
+        "requests": requests,
+        "completed": completed,
+        "succeeded": ok,
+        "status_codes": {str(code): n for code, n in sorted(statuses.items())},
+        "transport_errors": dict(errors),
+        "duration_seconds": round(duration, 4),
+        "throughput_rps": round(completed / duration, 2) if duration else 0.0,
+        "latency_ms": {
+            "mean": round(sum(ordered) / len(ordered) * 1000, 3) if ordered else 0.0,
+            "p50": round(_percentile(ordered, 0.50) * 1000, 3),
+            "p95": round(_percentile(ordered, 0.95) * 1000, 3),
+            "p99": round(_percentile(ordered, 0.99) * 1000, 3),
+            "max": round(ordered[-1] * 1000, 3) if ordered else 0.0,
+        },
+    }
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+async def _wait_until_healthy(base_url: str, timeout: float = 30) -> None:
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient(base_url=base_url) as client:
+        while True:
+            try:
+                if (await client.get("/health")).status_code == 200:
+                    return
+            except httpx.TransportError:
+                pass
+            if time.monotonic() > deadline:
+                raise RuntimeError(f"Server at {base_url} did not become healthy")
+            await asyncio.sleep(0.2)
+
+
+async def run(target: str, scenarios: list[str], data: dict, concurrency: int, requests: int, warmup: int) -> list[dict]:
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    timeout = httpx.Timeout(60)
+
+    async def run_all(client: httpx.AsyncClient) -> list[dict]:
+        results = []
+        for name in scenarios:
+            results.append(await run_scenario(client, name, data, concurrency, requests, warmup))
+            print(json.dumps(results[-1]), file=sys.stderr)
+        return results
+
+    if target == "asgi":
+        from app.main import app
+        # ASGITransport does not run lifespan events; run them here
+        async with app.router.lifespan_context(app):
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=timeout) as client:
+                return await run_all(client)
+
+    if target == "uvicorn":
+        port = _free_port()
+        server = subprocess.Popen([
+            sys.executable, "-m", "uvicorn", "app.main:app",
+            "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning", "--no-access-log",
+        ])
+        base_url = f"http://127.0.0.1:{port}"
+        try:
+            await _wait_until_healthy(base_url)
+            async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=timeout) as client:
+                return await run_all(client)
+        finally:
+            server.terminate()
+            server.wait(timeout=30)
+
+    async with httpx.AsyncClient(base_url=target, limits=limits, timeout=timeout) as client:
+        return await run_all(client)
+
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the auth flows.")
+    parser.add_argument("--seed-file", default="bench-seed.json", help="output of benchmarks.seed")
+    parser.add_argument("--target", default="asgi", help="asgi, uvicorn, or a base URL")
+    parser.add_argument("--scenario", action="append", choices=sorted(SCENARIOS), dest="scenarios",
+                        help="repeat to run several; default: all")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=1000, help="measured requests per scenario")
+    parser.add_argument("--warmup", type=int, default=50, help="unmeasured requests per scenario")
+    parser.add_argument("--out", help="write the JSON report here instead of stdout")
+    args = parser.parse_args()
+
+    with open(args.seed_file) as f:
+        data = json.load(f)
+    # Refresh rotates tokens, so run it last: other scenarios reuse the seeded ones
+    scenarios = args.scenarios or [name for name in SCENARIOS if name != "refresh"] + ["refresh"]
+
+    results = asyncio.run(run(args.target, scenarios, data, args.concurrency, args.requests, args.warmup))
+    report = {
+        "commit": _git_commit(),
+        "started_at": datetime.now(timezone.utc).isoformat(),
+        "target": args.target,
+        "python": platform.python_version(),
+        "users": len(data["users"]),
+        "results": results,
+    }
+    output = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Synthetic data for the benchmarks.
+
+Seeds N users (plus one admin) into DATABASE_URL and writes their
+credentials and ready-made tokens to a JSON file for benchmarks.run:
+
+    python -m benchmarks.seed --users 1000 --tokens 4 --out bench-seed.json
+
+Emails are derived from --prefix and the user's index, so re-running with
+the same arguments reuses the same users. Existing users keep their rows;
+only fresh tokens are issued.
+"""
+import argparse
+import asyncio
+import json
+from datetime import datetime, timedelta
+
+from sqlalchemy import select
+
+from app.core.config import settings
+from app.core.security import (
+    create_access_token,
+    create_refresh_token,
+    get_password_hash,
+    hash_refresh_token,
+)
+from app.crud import bulk_insert_users
+from app.db.session import async_session
+from app.models.user import RefreshToken, User, UserRole
+from app.schemas.user import UserCreate
+
+BENCH_PASSWORD = "benchpassword"
+
+
+def bench_email(prefix: str, index: int | str) -> str:
+    return f"{prefix}-{index}@bench.example.com"
+
+
+def _access_token(user: User) -> str:
+    # Same claims as /auth/login
+    return create_access_token(data={
+        "sub": str(user.id),
+        "role": user.role.value,
+        "email": user.email,
+        "phone_number": user.phone_number,
+        "preferred_language": user.preferred_language.value if user.preferred_language else None,
+        "ver": user.token_version
+    })
+
+
+async def seed(users: int, tokens_per_user: int, prefix: str = "bench", batch_size: int = settings.USER_IMPORT_BATCH_SIZE, session_factory=async_session) -> dict:
+    # Every bench user shares one password, so bcrypt runs once
+    hashed_password = get_password_hash(BENCH_PASSWORD)
+    emails = [bench_email(prefix, i) for i in range(users)]
+    admin_email = bench_email(prefix, "admin")
+
+    async with session_factory() as db:
+        rows = [
+            (UserCreate(email=email, password=BENCH_PASSWORD, full_name=f"Bench User {i}"), hashed_password)
+            for i, email in enumerate(emails)
+        ]
+        rows.append((
+            UserCreate(email=admin_email, password=BENCH_PASSWORD, full_name="Bench Admin", role=UserRole.ADMIN),
+            hashed_password
+        ))
+        for start in range(0, len(rows), batch_size):
+            await bulk_insert_users(db, rows[start:start + batch_size])
+        await db.commit()
+
+        result = await db.execute(select(User).where(User.email.like(bench_email(prefix, "%"))))
+        by_email = {user.email: user for user in result.scalars()}
+
+        expires_at = datetime.utcnow() + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
+        seeded = []
+        for email in [*emails, admin_email]:
+            user = by_email[email]
+            refresh_tokens = [
+                create_refresh_token(
+                    data={"sub": str(user.id), "ver": user.token_version},
+                    expires_delta=timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
+                )
+                for _ in range(tokens_per_user)
+            ]
+            db.add_all(
+                RefreshToken(user_id=user.id, token_digest=hash_refresh_token(token), expires_at=expires_at)
+                for token in refresh_tokens
+            )
+            seeded.append({
+                "id": str(user.id),
+                "email": user.email,
+                "access_token": _access_token(user),
+                "refresh_tokens": refresh_tokens,
+            })
+        await db.commit()
+
+    *tenants, admin = seeded
+    return {"prefix": prefix, "password": BENCH_PASSWORD, "users": tenants, "admin": admin}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Seed users and tokens for the benchmarks.")
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--tokens", type=int, default=4, help="refresh tokens issued per user")
+    parser.add_argument("--prefix", default="bench")
+    parser.add_argument("--out", default="bench-seed.json")
+    args = parser.parse_args()
+
+    data = asyncio.run(seed(args.users, args.tokens, args.prefix))
+    with open(args.out, "w") as f:
+        json.dump(data, f)
+    print(f"Seeded {len(data['users'])} users and 1 admin; tokens written to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,14 @@
+CREATE TABLE IF NOT EXISTS password_resets (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    user_id UUID NOT NULL,
+    token_digest VARCHAR(64) NOT NULL, -- HMAC-SHA256 of the raw reset token
+    expires_at TIMESTAMP WITH TIME ZONE NOT NULL,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    CONSTRAINT fk_user
+        FOREIGN KEY(user_id)
+        REFERENCES users(id)
+        ON DELETE CASCADE
+);
+
+CREATE UNIQUE INDEX idx_password_reset_token_digest ON password_resets (token_digest);
+CREATE INDEX idx_password_reset_expires_at ON password_resets (expires_at);
@@ -1,7 +1,7 @@
 CREATE TABLE IF NOT EXISTS refresh_tokens (
     id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
     user_id UUID NOT NULL,
-    token VARCHAR NOT NULL, 
+    token_digest VARCHAR(64) NOT NULL, -- HMAC-SHA256 of the raw refresh token
     expires_at TIMESTAMP WITH TIME ZONE NOT NULL,
     created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
     CONSTRAINT fk_user
@@ -12,3 +12,4 @@ CREATE TABLE IF NOT EXISTS refresh_tokens (
 
 CREATE INDEX idx_refresh_token_expires_at ON refresh_tokens (expires_at);
 CREATE INDEX idx_refresh_token_user_id ON refresh_tokens (user_id);
+CREATE UNIQUE INDEX idx_refresh_token_token_digest ON refresh_tokens (token_digest);
@@ -12,12 +12,17 @@ CREATE TABLE IF NOT EXISTS users (
     phone_number BYTEA,
     preferred_language language DEFAULT 'en',
     preferred_currency currency DEFAULT 'ETB',
-    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
     password_changed BOOLEAN DEFAULT FALSE,
-    is_active BOOLEAN DEFAULT TRUE
+    is_active BOOLEAN DEFAULT TRUE,
+    token_version INTEGER NOT NULL DEFAULT 0
 );
 
 CREATE INDEX idx_user_id ON users (id);
 CREATE INDEX idx_user_email ON users (email);
 CREATE INDEX idx_user_role ON users (role);
+CREATE INDEX idx_user_created_at_id ON users (created_at, id);
+CREATE INDEX idx_user_role_created_at_id ON users (role, created_at, id);
+CREATE INDEX idx_user_is_active_created_at_id ON users (is_active, created_at, id);
+CREATE INDEX idx_user_language_created_at_id ON users (preferred_language, created_at, id);
@@ -1,41 +1,157 @@
+import os
+import shutil
+import socket
+import subprocess
+import tempfile
+
 import pytest
-from httpx import AsyncClient
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import text
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker
 
 from backend.user_service.app.main import app
 from app.db.base import Base
-from app.db.session import get_db
+from app.db.session import get_db, get_db_readonly, get_session_factory
 from app.core.config import settings
+from app.core.user_cache import user_cache
+from app.core.token_versions import token_version_cache
+from app.core.token_cache import verified_token_cache
+
+# Test database modes, chosen with TEST_DB_MODE:
+#   savepoint (default) - tables are created once per worker and every test
+#       runs in a transaction on one shared connection that is rolled back
+#       afterwards; commits made by the app only release SAVEPOINTs
+#   truncate - each test commits for real and all tables are emptied after it
+#
+# The database is TEST_DATABASE_URL if set, otherwise `test_rent_db` next to
+# DATABASE_URL. With TEST_DB_EPHEMERAL=1 a throwaway Postgres cluster is
+# started instead (needs initdb and pg_ctl on PATH). Under pytest-xdist each
+# worker creates its tables in its own schema.
+TEST_DB_MODE = os.getenv("TEST_DB_MODE", "savepoint")
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL") or settings.DATABASE_URL.replace("rent_db", "test_rent_db")
+TEST_DB_EPHEMERAL = os.getenv("TEST_DB_EPHEMERAL", "").lower() in ("1", "true", "yes")
+
+if TEST_DB_MODE not in ("savepoint", "truncate"):
+    raise pytest.UsageError(f"Unknown TEST_DB_MODE {TEST_DB_MODE!r}; use 'savepoint' or 'truncate'")
+
+class EphemeralPostgres:
+    """A Postgres cluster in a temporary directory, tuned for speed over durability."""
+
+    def __init__(self):
+        self.bindir = self._find_bindir()
+        self.root = tempfile.mkdtemp(prefix="user-service-test-pg-")
+        self.datadir = os.path.join(self.root, "data")
+        with socket.socket() as s:
+            s.bind(("127.0.0.1", 0))
+            self.port = s.getsockname()[1]
+
+    @staticmethod
+    def _find_bindir() -> str:
+        initdb = shutil.which("initdb")
+        if initdb:
+            return os.path.dirname(initdb)
+        pg_config = shutil.which("pg_config")
+        if pg_config:
+            return subprocess.run([pg_config, "--bindir"], capture_output=True, text=True, check=True).stdout.strip()
+        raise pytest.UsageError("TEST_DB_EPHEMERAL needs initdb and pg_ctl on PATH")
+
+    def start(self) -> str:
+        subprocess.run(
+            [os.path.join(self.bindir, "initdb"), "-D", self.datadir, "-U", "postgres", "-A", "trust", "--no-sync"],
+            check=True, capture_output=True
+        )
+        options = f"-p {self.port} -h 127.0.0.1 -k {self.root} -c fsync=off -c synchronous_commit=off -c full_page_writes=off"
+        subprocess.run(
+            [os.path.join(self.bindir, "pg_ctl"), "-D", self.datadir, "-o", options,
+             "-l", os.path.join(self.root, "postgres.log"), "-w", "start"],
+            check=True, capture_output=True
+        )
+        return f"postgresql+asyncpg://postgres@127.0.0.1:{self.port}/postgres"
+
+    def stop(self) -> None:
+        subprocess.run(
+            [os.path.join(self.bindir, "pg_ctl"), "-D", self.datadir, "-m", "immediate", "stop"],
+            capture_output=True
+        )
+        shutil.rmtree(self.root, ignore_errors=True)
 
-# Use a separate test database
-TEST_DATABASE_URL = settings.DATABASE_URL.replace("rent_db", "test_rent_db")
+@pytest.fixture(scope="session")
+def test_database_url():
+    if not TEST_DB_EPHEMERAL:
+        yield TEST_DATABASE_URL
+        return
+    server = EphemeralPostgres()
+    try:
+        yield server.start()
+    finally:
+        server.stop()
+
+@pytest.fixture(scope="session")
+def test_schema():
+    # pytest-xdist sets PYTEST_XDIST_WORKER (gw0, gw1, ...) in each worker
+    worker = os.getenv("PYTEST_XDIST_WORKER")
+    return f"test_{worker}" if worker else None
 
 @pytest.fixture(scope="session")
-async def test_engine():
-    engine = create_async_engine(TEST_DATABASE_URL, echo=True)
+async def test_engine(test_database_url, test_schema):
+    connect_args = {"server_settings": {"search_path": test_schema}} if test_schema else {}
+    engine = create_async_engine(test_database_url, echo=False, connect_args=connect_args)
     async with engine.begin() as conn:
+        if test_schema:
+            await conn.execute(text(f'CREATE SCHEMA IF NOT EXISTS "{test_schema}"'))
         await conn.run_sync(Base.metadata.create_all)
     yield engine
     async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.drop_all)
+        if test_schema:
+            await conn.execute(text(f'DROP SCHEMA "{test_schema}" CASCADE'))
+        else:
+            await conn.run_sync(Base.metadata.drop_all)
     await engine.dispose()
 
+@pytest.fixture(scope="session")
+async def test_connection(test_engine):
+    """The connection every test shares in savepoint mode; None otherwise."""
+    if TEST_DB_MODE != "savepoint":
+        yield None
+        return
+    async with test_engine.connect() as conn:
+        yield conn
+
+@pytest.fixture(scope="function")
+async def test_db(test_engine, test_connection):
+    if TEST_DB_MODE == "savepoint":
+        transaction = await test_connection.begin()
+        session = AsyncSession(bind=test_connection, expire_on_commit=False, join_transaction_mode="create_savepoint")
+        try:
+            yield session
+        finally:
+            await session.close()
+            await transaction.rollback()
+    else:
+        async_session = sessionmaker(test_engine, class_=AsyncSession, expire_on_commit=False)
+        async with async_session() as session:
+            yield session
+            # Clean up data after each test
+            for table in reversed(Base.metadata.sorted_tables):
+                await session.execute(table.delete())
+            await session.commit()
+    user_cache.clear()
+    token_version_cache.clear()
+    verified_token_cache.clear()
+
 @pytest.fixture(scope="function")
-async def test_db(test_engine):
-    async_session = sessionmaker(test_engine, class_=AsyncSession, expire_on_commit=False)
-    async with async_session() as session:
-        yield session
-        # Clean up data after each test
-        for table in reversed(Base.metadata.sorted_tables):
-            await session.execute(table.delete())
-        await session.commit()
+def test_session_factory(test_db):
+    """Session factory for code that opens its own sessions; shares test_db's connection and transaction."""
+    return sessionmaker(
+        test_db.bind, class_=AsyncSession, expire_on_commit=False, join_transaction_mode="create_savepoint"
+    )
 
 @pytest.fixture(scope="function")
-async def client(test_db):
+async def client(test_db, test_session_factory):
     app.dependency_overrides[get_db] = lambda: test_db
-    async with AsyncClient(app=app, base_url="http://test") as ac:
+    app.dependency_overrides[get_db_readonly] = lambda: test_db
+    app.dependency_overrides[get_session_factory] = lambda: test_session_factory
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
         yield ac
     app.dependency_overrides.clear()
-
-    
\ No newline at end of file
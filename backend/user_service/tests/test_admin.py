@@ -1,3 +1,6 @@
+import csv
+import io
+import json
 import pytest
 from httpx import AsyncClient
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -6,6 +9,8 @@ from app.schemas.user import UserCreate
 from app.crud import create_user
 from app.core.config import settings
 from app.core.security import get_password_hash
+from app.core.hashing import PasswordHasherBusy
+from app.routers import admin as admin_router
 
 @pytest.fixture
 async def admin_authenticated_client(client: AsyncClient, test_db: AsyncSession):
@@ -64,11 +69,113 @@ async def test_admin_list_users_success(admin_authenticated_client: AsyncClient,
 
     response = await admin_authenticated_client.get("/api/v1/admin/users")
     assert response.status_code == 200
-    users = response.json()
+    users = response.json()["items"]
     assert len(users) >= 3 # Includes the seeded admin and the two created users
     assert any(u["email"] == "user1@example.com" for u in users)
     assert any(u["email"] == "user2@example.com" for u in users)
 
+@pytest.mark.asyncio
+async def test_admin_list_users_cursor_pagination(admin_authenticated_client: AsyncClient, test_db: AsyncSession):
+    for i in range(5):
+        await create_user(test_db, user=UserCreate(email=f"page{i}@example.com", password="pass", full_name=f"Page {i}", role=UserRole.TENANT))
+
+    seen = []
+    cursor = None
+    while True:
+        params = {"limit": 2, "role": "tenant"}
+        if cursor:
+            params["cursor"] = cursor
+        response = await admin_authenticated_client.get("/api/v1/admin/users", params=params)
+        assert response.status_code == 200
+        page = response.json()
+        assert len(page["items"]) <= 2
+        seen.extend(u["email"] for u in page["items"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+
+    assert sorted(seen) == sorted(f"page{i}@example.com" for i in range(5))
+
+@pytest.mark.asyncio
+async def test_admin_list_users_invalid_cursor(admin_authenticated_client: AsyncClient):
+    response = await admin_authenticated_client.get("/api/v1/admin/users", params={"cursor": "not-a-cursor"})
+    assert response.status_code == 400
+    assert "Invalid cursor" in response.json()["detail"]
+
+@pytest.mark.asyncio
+async def test_admin_export_users_ndjson(admin_authenticated_client: AsyncClient, test_db: AsyncSession):
+    await create_user(test_db, user=UserCreate(email="export@example.com", password="pass", full_name="Export User", role=UserRole.OWNER))
+
+    response = await admin_authenticated_client.get("/api/v1/admin/users/export")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    exported = next(r for r in rows if r["email"] == "export@example.com")
+    assert exported["role"] == "owner"
+    assert "password" not in exported
+
+@pytest.mark.asyncio
+async def test_admin_export_users_csv(admin_authenticated_client: AsyncClient, test_db: AsyncSession):
+    await create_user(test_db, user=UserCreate(email="csv@example.com", password="pass", full_name="Csv User", role=UserRole.TENANT))
+
+    response = await admin_authenticated_client.get("/api/v1/admin/users/export", params={"format": "csv"})
+    assert response.status_code == 200
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert any(r["email"] == "csv@example.com" and r["full_name"] == "Csv User" for r in rows)
+
+@pytest.mark.asyncio
+async def test_admin_import_users_csv(admin_authenticated_client: AsyncClient, test_db: AsyncSession):
+    await create_user(test_db, user=UserCreate(email="already@example.com", password="pass", full_name="Already There", role=UserRole.TENANT))
+
+    upload = (
+        "email,full_name,password,role\n"
+        "imported1@example.com,Imported One,pass1,tenant\n"
+        "already@example.com,Already There,pass2,tenant\n"
+        "not-an-email,Broken Row,pass3,tenant\n"
+        "imported1@example.com,Imported One Again,pass4,tenant\n"
+    )
+    response = await admin_authenticated_client.post(
+        "/api/v1/admin/users/import",
+        files={"file": ("users.csv", upload.encode(), "text/csv")}
+    )
+    assert response.status_code == 200
+    body = response.json()
+    assert body["created"] == 1
+    assert body["exists"] == 1
+    assert body["invalid"] == 1
+    assert body["duplicate"] == 1
+    assert [r["status"] for r in body["results"]] == ["created", "exists", "invalid", "duplicate"]
+
+    login_response = await admin_authenticated_client.post(
+        "/api/v1/auth/login",
+        data={"username": "imported1@example.com", "password": "pass1"}
+    )
+    assert login_response.status_code == 200
+
+@pytest.mark.asyncio
+async def test_admin_import_records_busy_rows(admin_authenticated_client: AsyncClient, monkeypatch):
+    async def hash_many(passwords, concurrency=None):
+        # The pool turns away the first password only
+        return [PasswordHasherBusy("Password hashing pool is saturated")] + [get_password_hash(p) for p in passwords[1:]]
+
+    monkeypatch.setattr(admin_router.password_hasher, "hash_many", hash_many)
+    upload = (
+        "email,full_name,password,role\n"
+        "busy@example.com,Busy Row,pass1,tenant\n"
+        "hashed@example.com,Hashed Row,pass2,tenant\n"
+    )
+    response = await admin_authenticated_client.post(
+        "/api/v1/admin/users/import",
+        files={"file": ("users.csv", upload.encode(), "text/csv")}
+    )
+    assert response.status_code == 200
+    body = response.json()
+    assert body["failed"] == 1
+    assert body["created"] == 1
+    assert [(r["email"], r["status"]) for r in body["results"]] == [
+        ("busy@example.com", "failed"), ("hashed@example.com", "created")
+    ]
+
 @pytest.mark.asyncio
 async def test_admin_list_users_forbidden_for_tenant(tenant_authenticated_client: AsyncClient):
     response = await tenant_authenticated_client.get("/api/v1/admin/users")
@@ -97,4 +204,50 @@ async def test_admin_get_user_by_id_forbidden_for_tenant(tenant_authenticated_cl
     some_user_id = "a0eebc99-9c0b-4ef8-bb6d-6bb9bd380a11" # Doesn't matter if it exists, permission denied first
     response = await tenant_authenticated_client.get(f"/api/v1/admin/users/{some_user_id}")
     assert response.status_code == 403
-    assert "The user does not have enough privileges" in response.json()["detail"]
\ No newline at end of file
+    assert "The user does not have enough privileges" in response.json()["detail"]
+
+@pytest.mark.asyncio
+async def test_admin_lookup_users_by_ids_and_emails(admin_authenticated_client: AsyncClient, test_db: AsyncSession):
+    owner = await create_user(test_db, user=UserCreate(email="lookup_owner@example.com", password="pass", full_name="Lookup Owner", role=UserRole.OWNER))
+    broker = await create_user(test_db, user=UserCreate(email="lookup_broker@example.com", password="pass", full_name="Lookup Broker", role=UserRole.BROKER))
+    missing_id = "a0eebc99-9c0b-4ef8-bb6d-6bb9bd380a11"
+
+    response = await admin_authenticated_client.post("/api/v1/admin/users/lookup", json={
+        "ids": [str(owner.id), missing_id, str(owner.id)],
+        "emails": ["lookup_broker@example.com", "nobody@example.com"],
+        "fields": ["full_name", "role"]
+    })
+    assert response.status_code == 200
+    data = response.json()
+    users = {user["id"]: user for user in data["users"]}
+    assert users == {
+        str(owner.id): {"id": str(owner.id), "email": "lookup_owner@example.com", "full_name": "Lookup Owner", "role": "owner"},
+        str(broker.id): {"id": str(broker.id), "email": "lookup_broker@example.com", "full_name": "Lookup Broker", "role": "broker"},
+    }
+    assert data["missing_ids"] == [missing_id]
+    assert data["missing_emails"] == ["nobody@example.com"]
+
+@pytest.mark.asyncio
+async def test_admin_lookup_users_projection_and_validation(admin_authenticated_client: AsyncClient, test_db: AsyncSession):
+    owner = await create_user(test_db, user=UserCreate(email="lookup_only@example.com", password="pass", full_name="Lookup Only", role=UserRole.OWNER))
+
+    response = await admin_authenticated_client.post("/api/v1/admin/users/lookup", json={"ids": [str(owner.id)], "fields": ["full_name"]})
+    assert response.json()["users"] == [{"id": str(owner.id), "full_name": "Lookup Only"}]
+
+    # Only public columns can be requested
+    response = await admin_authenticated_client.post("/api/v1/admin/users/lookup", json={"ids": [str(owner.id)], "fields": ["password"]})
+    assert response.status_code == 400
+
+    response = await admin_authenticated_client.post("/api/v1/admin/users/lookup", json={"ids": []})
+    assert response.status_code == 422
+
+    too_many = ["a0eebc99-9c0b-4ef8-bb6d-6bb9bd380a11"] * (settings.USER_LOOKUP_MAX_KEYS + 1)
+    response = await admin_authenticated_client.post("/api/v1/admin/users/lookup", json={"ids": too_many})
+    assert response.status_code == 422
+
+@pytest.mark.asyncio
+async def test_admin_lookup_users_forbidden_for_tenant(tenant_authenticated_client: AsyncClient):
+    response = await tenant_authenticated_client.post(
+        "/api/v1/admin/users/lookup", json={"ids": ["a0eebc99-9c0b-4ef8-bb6d-6bb9bd380a11"]}
+    )
+    assert response.status_code == 403
@@ -1,10 +1,16 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
 import pytest
 from httpx import AsyncClient
+from sqlalchemy import delete
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import sessionmaker
 from app.core.config import settings
-from app.core.security import get_password_hash
-from app.models.user import User, UserRole
+from app.core.security import get_password_hash, create_access_token, create_refresh_token, hash_refresh_token, hash_reset_token
+from app.models.user import RefreshToken, User, UserRole
 from app.schemas.user import UserCreate
+from app import crud
 from app.crud import create_user
 
 @pytest.mark.asyncio
@@ -24,6 +30,20 @@ async def test_register_user(client: AsyncClient, test_db: AsyncSession):
     assert response.json()["role"] == "tenant"
     assert response.json()["phone_number"] == "+251911223344"
 
+@pytest.mark.asyncio
+async def test_register_duplicate_email(client: AsyncClient, test_db: AsyncSession):
+    user_data = {
+        "email": "duplicate@example.com",
+        "password": "securepassword",
+        "full_name": "Duplicate User"
+    }
+    first_response = await client.post("/api/v1/users/register", json=user_data)
+    assert first_response.status_code == 200
+
+    second_response = await client.post("/api/v1/users/register", json=user_data)
+    assert second_response.status_code == 400
+    assert "Email already registered" in second_response.json()["detail"]
+
 @pytest.mark.asyncio
 async def test_register_admin_forbidden(client: AsyncClient, test_db: AsyncSession):
     admin_data = {
@@ -155,6 +175,61 @@ async def test_refresh_token_success(client: AsyncClient, test_db: AsyncSession)
     assert "access_token" in refresh_response.json()
     assert "refresh_token" in refresh_response.json()
 
+@pytest.mark.asyncio
+async def test_refresh_token_rotated_token_rejected(client: AsyncClient, test_db: AsyncSession):
+    user_data = UserCreate(
+        email="rotate@example.com",
+        password="rotatepassword",
+        full_name="Rotate User",
+        role=UserRole.TENANT
+    )
+    await create_user(test_db, user=user_data)
+
+    login_response = await client.post(
+        "/api/v1/auth/login",
+        data={
+            "username": "rotate@example.com",
+            "password": "rotatepassword"
+        }
+    )
+    refresh_token = login_response.json()["refresh_token"]
+
+    first_response = await client.post("/api/v1/auth/refresh", json={"refresh_token": refresh_token})
+    assert first_response.status_code == 200
+    assert first_response.json()["refresh_token"] != refresh_token
+
+    # The old token was rotated out and must not be accepted again
+    replay_response = await client.post("/api/v1/auth/refresh", json={"refresh_token": refresh_token})
+    assert replay_response.status_code == 401
+    assert "Invalid or expired refresh token" in replay_response.json()["detail"]
+
+@pytest.mark.asyncio
+async def test_concurrent_rotations_of_one_token(test_engine):
+    # Separate sessions that really commit, so the two DELETEs contend on the row
+    Session = sessionmaker(test_engine, class_=AsyncSession, expire_on_commit=False)
+    async with Session() as session:
+        user = await create_user(session, user=UserCreate(email="race@example.com", password="pass", full_name="Race", role=UserRole.TENANT))
+        expires_at = datetime.now(timezone.utc) + timedelta(days=1)
+        await crud.create_refresh_token_db(session, user.id, hash_refresh_token("old"), expires_at)
+        await session.commit()
+
+    async def rotate(new_token: str):
+        async with Session() as session:
+            rotated = await crud.rotate_refresh_token(
+                session, hash_refresh_token("old"), user.id, user.token_version, hash_refresh_token(new_token), expires_at
+            )
+            await session.commit()
+            return rotated
+
+    try:
+        results = await asyncio.gather(rotate("first"), rotate("second"))
+        assert sum(result is not None for result in results) == 1
+    finally:
+        async with Session() as session:
+            await session.execute(delete(RefreshToken).where(RefreshToken.user_id == user.id))
+            await session.execute(delete(User).where(User.id == user.id))
+            await session.commit()
+
 @pytest.mark.asyncio
 async def test_change_password_success(client: AsyncClient, test_db: AsyncSession):
     user_data = UserCreate(
@@ -197,6 +272,15 @@ async def test_change_password_success(client: AsyncClient, test_db: AsyncSessio
     )
     assert new_login_response.status_code == 200
 
+    # Tokens issued before the password change are revoked
+    old_token_response = await client.get(
+        "/api/v1/auth/verify",
+        headers={
+            "Authorization": f"Bearer {access_token}"
+        }
+    )
+    assert old_token_response.status_code == 401
+
 @pytest.mark.asyncio
 async def test_verify_token_success(client: AsyncClient, test_db: AsyncSession):
     user_data = UserCreate(
@@ -240,4 +324,101 @@ async def test_verify_token_invalid(client: AsyncClient):
         }
     )
     assert response.status_code == 401
-    assert "Could not validate credentials" in response.json()["detail"]
\ No newline at end of file
+    assert "Could not validate credentials" in response.json()["detail"]
+
+@pytest.mark.asyncio
+async def test_refresh_token_not_accepted_as_access_token(client: AsyncClient, test_db: AsyncSession):
+    user = await create_user(test_db, user=UserCreate(email="refresh-as-access@example.com", password="pass", full_name="Refresh", role=UserRole.TENANT))
+    refresh_token = create_refresh_token({"sub": str(user.id), "ver": user.token_version})
+
+    for path in ("/api/v1/users/me", "/api/v1/auth/verify"):
+        response = await client.get(path, headers={"Authorization": f"Bearer {refresh_token}"})
+        assert response.status_code == 401
+
+def test_reset_and_refresh_token_digests_differ():
+    assert hash_reset_token("same-token") != hash_refresh_token("same-token")
+    assert hash_reset_token("same-token") == hash_reset_token("same-token")
+
+@pytest.mark.asyncio
+async def test_forgot_and_reset_password(client: AsyncClient, test_db: AsyncSession, monkeypatch):
+    user_data = UserCreate(
+        email="reset@example.com",
+        password="oldpassword",
+        full_name="Reset User",
+        role=UserRole.TENANT
+    )
+    await create_user(test_db, user=user_data)
+
+    sent_tokens = []
+    monkeypatch.setattr("app.routers.auth.enqueue_reset_email", lambda email, token: sent_tokens.append(token))
+
+    forgot_response = await client.post("/api/v1/auth/forgot-password", json={"email": "reset@example.com"})
+    assert forgot_response.status_code == 200
+    assert len(sent_tokens) == 1
+
+    reset_response = await client.post(
+        "/api/v1/auth/reset-password",
+        json={"token": sent_tokens[0], "password": "brandnewpassword"}
+    )
+    assert reset_response.status_code == 200
+
+    # A reset token can only be used once
+    reuse_response = await client.post(
+        "/api/v1/auth/reset-password",
+        json={"token": sent_tokens[0], "password": "anotherpassword"}
+    )
+    assert reuse_response.status_code == 400
+    assert "Invalid token" in reuse_response.json()["detail"]
+
+    login_response = await client.post(
+        "/api/v1/auth/login",
+        data={
+            "username": "reset@example.com",
+            "password": "brandnewpassword"
+        }
+    )
+    assert login_response.status_code == 200
+
+@pytest.mark.asyncio
+async def test_introspect_tokens_batch(client: AsyncClient, test_db: AsyncSession, monkeypatch):
+    version_queries = []
+    async def get_user_token_versions(db, user_ids):
+        version_queries.append(user_ids)
+        return await crud.get_user_token_versions(db, user_ids)
+    monkeypatch.setattr("app.routers.auth.get_user_token_versions", get_user_token_versions)
+
+    tokens = []
+    for i in range(2):
+        user = await create_user(test_db, user=UserCreate(
+            email=f"introspect{i}@example.com",
+            password="introspectpassword",
+            full_name="Introspect User",
+            role=UserRole.OWNER
+        ))
+        claims = {"sub": str(user.id), "role": "owner", "email": user.email, "ver": 0}
+        tokens.append(create_access_token(claims))
+        if i == 0:
+            revoked = create_access_token({**claims, "ver": 1})
+    malformed = create_access_token({"sub": "not-a-uuid", "role": "owner", "email": "x@example.com"})
+
+    response = await client.post(
+        "/api/v1/auth/introspect",
+        json={"tokens": [tokens[0], "invalidtoken", tokens[1], revoked, malformed, tokens[0]]}
+    )
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert [r["active"] for r in results] == [True, False, True, False, False, True]
+    assert [r["error"] for r in results] == [None, "invalid_token", None, "revoked", "malformed_claims", None]
+    assert results[0]["claims"]["email"] == "introspect0@example.com"
+    assert results[2]["claims"]["role"] == "owner"
+    # Both users' versions came from one query
+    assert len(version_queries) == 1
+    assert len(version_queries[0]) == 2
+
+@pytest.mark.asyncio
+async def test_introspect_tokens_limit(client: AsyncClient):
+    response = await client.post(
+        "/api/v1/auth/introspect",
+        json={"tokens": ["t"] * (settings.INTROSPECTION_MAX_TOKENS + 1)}
+    )
+    assert response.status_code == 422
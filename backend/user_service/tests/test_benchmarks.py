@@ -0,0 +1,52 @@
+import asyncio
+import itertools
+
+import httpx
+import pytest
+
+from benchmarks.run import SCENARIOS, _percentile, run_scenario
+
+def test_all_scenarios_registered():
+    assert set(SCENARIOS) == {"register", "login", "refresh", "verify", "me", "admin_list"}
+
+def test_percentile_nearest_rank():
+    values = [float(v) for v in range(1, 101)]
+    assert _percentile(values, 0.50) == 50.0
+    assert _percentile(values, 0.95) == 95.0
+    assert _percentile(values, 0.99) == 99.0
+    assert _percentile([], 0.99) == 0.0
+
+def test_jwt_backend_benchmark_reports_each_backend():
+    from benchmarks.jwt_backends import bench_backend
+    from app.core.jwt_backends import available_backends
+
+    for name in available_backends():
+        result = bench_backend(name, "HS256", "secret-" + "x" * 32, iterations=10, repeat=1)
+        assert result["backend"] == name
+        assert result["sign_ops_per_sec"] > 0
+        assert result["verify_ops_per_sec"] > 0
+
+@pytest.mark.asyncio
+async def test_run_scenario_counts_statuses_and_transport_errors():
+    calls = itertools.count()
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        n = next(calls)
+        # Long enough that the rounded duration gives a stable throughput
+        await asyncio.sleep(0.01)
+        if n % 5 == 0:
+            raise httpx.ConnectError("refused", request=request)
+        return httpx.Response(200 if n % 2 == 0 else 401)
+
+    data = {"users": [{"access_token": "token"}]}
+    async with httpx.AsyncClient(transport=httpx.MockTransport(handler), base_url="http://bench") as client:
+        result = await run_scenario(client, "verify", data, concurrency=3, requests=10)
+
+    assert result["requests"] == 10
+    assert result["completed"] == 8
+    assert result["succeeded"] == 4
+    assert result["status_codes"] == {"200": 4, "401": 4}
+    assert result["transport_errors"] == {"ConnectError": 2}
+    assert set(result["latency_ms"]) == {"mean", "p50", "p95", "p99", "max"}
+    # Throughput counts completed requests only, not the ones that errored
+    assert result["throughput_rps"] == pytest.approx(8 / result["duration_seconds"], rel=0.01)
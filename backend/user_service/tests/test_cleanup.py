@@ -1,102 +1,156 @@
 import pytest
-from httpx import AsyncClient
+from sqlalchemy import func, select
 from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import datetime, timedelta
-import pytz
 
-from app.models.user import RefreshToken, User, UserRole
-from app.crud import create_user, create_refresh_token_db
-from app.utils.cleanup import cleanup_expired_refresh_tokens
+from app.models.user import PasswordReset, RefreshToken, UserRole
+from app.schemas.user import UserCreate
+from app.crud import create_user, create_refresh_token_db, create_password_reset
+from app.utils import cleanup
+from app.utils.cleanup import CLEANUP_LOCK_KEY, EAT, _schedule_window_start, cleanup_expired_refresh_tokens
 from app.core.config import settings
-from app.core.security import get_password_hash
+from app.core.security import hash_refresh_token, hash_reset_token
+
+def _expired_at() -> datetime:
+    return datetime.utcnow() - timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS + 1)
+
+def _valid_at() -> datetime:
+    return datetime.utcnow() + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS - 1)
+
+async def _create_cleanup_user(test_db: AsyncSession, email: str):
+    user_data = UserCreate(
+        email=email,
+        password="securepassword",
+        full_name="Cleanup User",
+        role=UserRole.TENANT
+    )
+    return await create_user(test_db, user=user_data)
 
 @pytest.fixture
 async def setup_refresh_tokens(test_db: AsyncSession):
     # Create a user
-    user_data = {
-        "email": "cleanup_user@example.com",
-        "password": "securepassword",
-        "full_name": "Cleanup User",
-        "role": UserRole.TENANT
-    }
-    user = await create_user(test_db, user=user_data)
+    user = await _create_cleanup_user(test_db, "cleanup_user@example.com")
 
     # Create an expired refresh token
-    expired_token_raw = "expired_token_hash"
-    expired_token_hashed = get_password_hash(expired_token_raw)
-    expired_at = datetime.utcnow() - timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS + 1)
-    await create_refresh_token_db(test_db, user.id, expired_token_hashed, expired_at)
+    await create_refresh_token_db(test_db, user.id, hash_refresh_token("expired_token_hash"), _expired_at())
 
     # Create a valid refresh token
-    valid_token_raw = "valid_token_hash"
-    valid_token_hashed = get_password_hash(valid_token_raw)
-    valid_at = datetime.utcnow() + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS - 1)
-    await create_refresh_token_db(test_db, user.id, valid_token_hashed, valid_at)
+    await create_refresh_token_db(test_db, user.id, hash_refresh_token("valid_token_hash"), _valid_at())
+    await test_db.commit()
 
     return user
 
 @pytest.mark.asyncio
-async def test_cleanup_expired_refresh_tokens(test_db: AsyncSession, setup_refresh_tokens):
+async def test_cleanup_expired_refresh_tokens(test_db: AsyncSession, test_session_factory, setup_refresh_tokens):
     # Ensure there are expired and valid tokens before cleanup
     initial_tokens = (await test_db.execute(select(RefreshToken))).scalars().all()
     assert len(initial_tokens) == 2
 
     # Run the cleanup job
-    await cleanup_expired_refresh_tokens()
+    run = await cleanup_expired_refresh_tokens(test_session_factory)
+    assert run["refresh_tokens_deleted"] == 1
+    assert run["duration_seconds"] >= 0
 
     # Check if expired token is deleted and valid token remains
     remaining_tokens = (await test_db.execute(select(RefreshToken))).scalars().all()
     assert len(remaining_tokens) == 1
-    assert remaining_tokens[0].token == get_password_hash("valid_token_hash")
+    assert remaining_tokens[0].token_digest == hash_refresh_token("valid_token_hash")
 
 @pytest.mark.asyncio
-async def test_cleanup_no_expired_tokens(test_db: AsyncSession):
-    # Create a user
-    user_data = {
-        "email": "no_expired@example.com",
-        "password": "securepassword",
-        "full_name": "No Expired User",
-        "role": UserRole.TENANT
-    }
-    user = await create_user(test_db, user=user_data)
+async def test_cleanup_no_expired_tokens(test_db: AsyncSession, test_session_factory):
+    user = await _create_cleanup_user(test_db, "no_expired@example.com")
 
     # Create only valid refresh tokens
-    valid_token_raw = "another_valid_token_hash"
-    valid_token_hashed = get_password_hash(valid_token_raw)
-    valid_at = datetime.utcnow() + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS - 1)
-    await create_refresh_token_db(test_db, user.id, valid_token_hashed, valid_at)
-
-    initial_tokens = (await test_db.execute(select(RefreshToken))).scalars().all()
-    assert len(initial_tokens) == 1
+    await create_refresh_token_db(test_db, user.id, hash_refresh_token("another_valid_token_hash"), _valid_at())
+    await test_db.commit()
 
     # Run the cleanup job
-    await cleanup_expired_refresh_tokens()
+    run = await cleanup_expired_refresh_tokens(test_session_factory)
+    assert run["refresh_tokens_deleted"] == 0
 
     # No tokens should be deleted
     remaining_tokens = (await test_db.execute(select(RefreshToken))).scalars().all()
     assert len(remaining_tokens) == 1
-    assert remaining_tokens[0].token == get_password_hash("another_valid_token_hash")
+    assert remaining_tokens[0].token_digest == hash_refresh_token("another_valid_token_hash")
+
+@pytest.mark.asyncio
+async def test_cleanup_deletes_in_chunks(test_db: AsyncSession, test_session_factory, monkeypatch):
+    monkeypatch.setattr(settings, "CLEANUP_CHUNK_SIZE", 2)
+    monkeypatch.setattr(settings, "CLEANUP_CHUNK_PAUSE_SECONDS", 0)
+    user = await _create_cleanup_user(test_db, "chunked@example.com")
+    for i in range(5):
+        await create_refresh_token_db(test_db, user.id, hash_refresh_token(f"expired_{i}"), _expired_at())
+    await test_db.commit()
+
+    run = await cleanup_expired_refresh_tokens(test_session_factory)
+
+    assert run["refresh_tokens_deleted"] == 5
+    # 2 + 2 + 1 refresh tokens, then one (empty) chunk of password resets
+    assert run["chunks"] == 4
+    assert await test_db.scalar(select(func.count()).select_from(RefreshToken)) == 0
+
+@pytest.mark.asyncio
+async def test_cleanup_expired_password_resets(test_db: AsyncSession, test_session_factory):
+    user = await _create_cleanup_user(test_db, "reset_cleanup@example.com")
+    await create_password_reset(test_db, user.id, hash_reset_token("expired"), datetime.utcnow() - timedelta(minutes=1))
+    await create_password_reset(test_db, user.id, hash_reset_token("valid"), datetime.utcnow() + timedelta(minutes=15))
+    await test_db.commit()
+
+    run = await cleanup_expired_refresh_tokens(test_session_factory)
+
+    assert run["password_resets_deleted"] == 1
+    remaining = (await test_db.execute(select(PasswordReset))).scalars().all()
+    assert [reset.token_digest for reset in remaining] == [hash_reset_token("valid")]
+
+@pytest.mark.asyncio
+async def test_cleanup_skipped_when_another_worker_holds_lock(test_engine, test_session_factory, setup_refresh_tokens):
+    async with test_engine.connect() as other_worker:
+        assert await other_worker.scalar(select(func.pg_try_advisory_lock(CLEANUP_LOCK_KEY)))
+        try:
+            assert await cleanup_expired_refresh_tokens(test_session_factory) is None
+        finally:
+            await other_worker.scalar(select(func.pg_advisory_unlock(CLEANUP_LOCK_KEY)))
+
+@pytest.mark.asyncio
+async def test_cleanup_skipped_after_a_run_in_the_same_window(test_db: AsyncSession, test_session_factory, setup_refresh_tokens):
+    runs_before = len(cleanup.cleanup_runs)
+    assert (await cleanup_expired_refresh_tokens(test_session_factory))["refresh_tokens_deleted"] == 1
+
+    # A worker whose job fires after the leader released the lock does not run it again
+    assert await cleanup_expired_refresh_tokens(test_session_factory) is None
+    assert len(cleanup.cleanup_runs) == runs_before + 1
+
+def test_schedule_window_start(monkeypatch):
+    monkeypatch.setattr(settings, "CLEANUP_SCHEDULE_HOUR", 2)
+    before = EAT.localize(datetime(2026, 3, 10, 1, 30))
+    after = EAT.localize(datetime(2026, 3, 10, 2, 15))
+
+    assert _schedule_window_start(before) == EAT.localize(datetime(2026, 3, 9, 2, 0))
+    assert _schedule_window_start(after) == EAT.localize(datetime(2026, 3, 10, 2, 0))
 
 # Mocking database failure for error handling test
 class MockAsyncSession:
-    async def execute(self, statement):
-        if isinstance(statement, Delete):
-            raise Exception("Simulated DB error during cleanup")
-        return MagicMock(scalars=MagicMock(return_value=MagicMock(all=MagicMock(return_value=[]))))
+    async def __aenter__(self):
+        return self
 
-    async def commit(self):
+    async def __aexit__(self, *exc):
         pass
 
-    async def rollback(self):
+    async def scalar(self, statement):
+        # The cleanup lock is always acquired, and no run has completed yet
+        return True if "pg_try_advisory_xact_lock" in str(statement) else None
+
+    async def execute(self, statement):
+        raise Exception("Simulated DB error during cleanup")
+
+    async def commit(self):
         pass
 
 @pytest.mark.asyncio
 async def test_cleanup_error_handling(monkeypatch):
-    # Mock get_db to return our mock session
-    async def mock_get_db():
-        yield MockAsyncSession()
-    
-    monkeypatch.setattr("app.utils.cleanup.get_db", mock_get_db)
+    async def no_sleep(delay):
+        pass
+    monkeypatch.setattr("app.utils.retry.asyncio.sleep", no_sleep)
 
     with pytest.raises(Exception, match="Simulated DB error during cleanup"):
-        await cleanup_expired_refresh_tokens()
+        await cleanup_expired_refresh_tokens(MockAsyncSession)
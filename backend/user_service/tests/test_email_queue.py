@@ -0,0 +1,97 @@
+import pytest
+
+from app.utils.email_queue import EmailDispatcher, EmailQueueFull
+from app.utils.send_email import build_reset_email
+from app.utils.smtp_debug import LocalSMTPServer
+
+@pytest.fixture
+async def smtp_server():
+    server = LocalSMTPServer()
+    await server.start()
+    yield server
+    await server.stop()
+
+def make_dispatcher(server: LocalSMTPServer, **kwargs) -> EmailDispatcher:
+    return EmailDispatcher(
+        host=server.host,
+        port=server.port,
+        use_tls=False,
+        retry_base_delay=0.01,
+        **kwargs
+    )
+
+@pytest.mark.asyncio
+async def test_email_dispatcher_delivers_queued_messages(smtp_server: LocalSMTPServer):
+    dispatcher = make_dispatcher(smtp_server, workers=2)
+
+    for i in range(5):
+        dispatcher.enqueue(build_reset_email(f"user{i}@example.com", f"token{i}"))
+    await dispatcher.join()
+    await dispatcher.stop()
+
+    assert len(smtp_server.messages) == 5
+    assert {m["To"] for m in smtp_server.messages} == {f"user{i}@example.com" for i in range(5)}
+    assert any("reset-password?token=token0" in m.as_string() for m in smtp_server.messages)
+    assert dispatcher.stats()["sent"] == 5
+
+@pytest.mark.asyncio
+async def test_email_dispatcher_retries_transient_failures(smtp_server: LocalSMTPServer):
+    smtp_server.fail_next = 1
+    dispatcher = make_dispatcher(smtp_server, workers=1, max_retries=3)
+
+    dispatcher.enqueue(build_reset_email("retry@example.com", "token"))
+    await dispatcher.join()
+    await dispatcher.stop()
+
+    assert len(smtp_server.messages) == 1
+    assert dispatcher.stats()["retried"] == 1
+    assert dispatcher.stats()["failed"] == 0
+
+@pytest.mark.asyncio
+async def test_email_dispatcher_dead_letters_after_max_retries(smtp_server: LocalSMTPServer):
+    smtp_server.fail_next = 2
+    dispatcher = make_dispatcher(smtp_server, workers=1, max_retries=2)
+
+    dispatcher.enqueue(build_reset_email("dead@example.com", "token"))
+    await dispatcher.join()
+    await dispatcher.stop()
+
+    assert smtp_server.messages == []
+    assert dispatcher.stats()["failed"] == 1
+    assert dispatcher.dead_letters[0]["to"] == "dead@example.com"
+
+@pytest.mark.asyncio
+async def test_email_dispatcher_survives_unexpected_errors(smtp_server: LocalSMTPServer):
+    dispatcher = make_dispatcher(smtp_server, workers=1, max_retries=3)
+    send = dispatcher._send
+
+    def broken_send(server, message):
+        if message["To"] == "broken@example.com":
+            raise ValueError("cannot serialize message")
+        return send(server, message)
+
+    dispatcher._send = broken_send
+    dispatcher.enqueue(build_reset_email("broken@example.com", "token"))
+    dispatcher.enqueue(build_reset_email("after@example.com", "token"))
+    await dispatcher.join()
+
+    # The bad message is dead-lettered without retries and the worker keeps going
+    assert not any(task.done() for task in dispatcher._tasks)
+    assert [m["To"] for m in smtp_server.messages] == ["after@example.com"]
+    assert dispatcher.stats()["retried"] == 0
+    assert dispatcher.stats()["failed"] == 1
+    assert dispatcher.dead_letters[0]["error"] == "cannot serialize message"
+    await dispatcher.stop()
+
+@pytest.mark.asyncio
+async def test_email_dispatcher_rejects_when_queue_full(smtp_server: LocalSMTPServer):
+    dispatcher = make_dispatcher(smtp_server, workers=1, max_queue_size=1)
+
+    dispatcher.enqueue(build_reset_email("first@example.com", "token"))
+    with pytest.raises(EmailQueueFull):
+        dispatcher.enqueue(build_reset_email("second@example.com", "token"))
+    await dispatcher.stop()
+
+def test_email_dispatcher_rejects_zero_workers():
+    with pytest.raises(ValueError):
+        EmailDispatcher(host="localhost", port=25, workers=0)
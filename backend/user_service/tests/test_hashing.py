@@ -0,0 +1,89 @@
+import asyncio
+import time
+import pytest
+
+from app.core import hashing
+from app.core.hashing import PasswordHasher, PasswordHasherBusy
+from app.core.security import get_password_hash
+
+@pytest.mark.asyncio
+async def test_password_hasher_hash_and_verify():
+    hasher = PasswordHasher(workers=0, max_pending=4)
+
+    hashed = await hasher.hash("securepassword")
+    assert hashed != "securepassword"
+    assert await hasher.verify("securepassword", hashed)
+    assert not await hasher.verify("wrongpassword", hashed)
+
+    stats = hasher.stats()
+    assert stats["completed"] == 3
+    assert stats["in_flight"] == 0
+    assert stats["rejected"] == 0
+
+@pytest.mark.asyncio
+async def test_password_hasher_verifies_existing_hash():
+    hasher = PasswordHasher(workers=0, max_pending=1)
+    assert await hasher.verify("loginpassword", get_password_hash("loginpassword"))
+
+@pytest.mark.asyncio
+async def test_password_hasher_rejects_when_saturated():
+    hasher = PasswordHasher(workers=0, max_pending=1)
+
+    # Capacity is two concurrent calls; the third must be rejected immediately
+    results = await asyncio.gather(
+        hasher.hash("one"),
+        hasher.hash("two"),
+        hasher.hash("three"),
+        return_exceptions=True
+    )
+    assert sum(isinstance(r, PasswordHasherBusy) for r in results) == 1
+    assert hasher.stats()["rejected"] == 1
+    assert hasher.stats()["peak_in_flight"] == 2
+
+@pytest.mark.asyncio
+async def test_password_hasher_hash_many_preserves_order():
+    hasher = PasswordHasher(workers=0, max_pending=4)
+    passwords = [f"password{i}" for i in range(5)]
+
+    hashed = await hasher.hash_many(passwords)
+    assert len(hashed) == 5
+    for password, hashed_password in zip(passwords, hashed):
+        assert await hasher.verify(password, hashed_password)
+    assert hasher.stats()["completed"] == 10
+
+@pytest.mark.asyncio
+async def test_password_hasher_hash_many_bounds_concurrency():
+    hasher = PasswordHasher(workers=0, max_pending=8)
+
+    hashed = await hasher.hash_many([f"password{i}" for i in range(4)], concurrency=2)
+    assert all(isinstance(h, str) for h in hashed)
+    assert hasher.stats()["peak_in_flight"] == 2
+
+@pytest.mark.asyncio
+async def test_password_hasher_hash_many_uses_every_worker(monkeypatch):
+    hasher = PasswordHasher(workers=4, max_pending=8)
+    # Run in the default thread pool rather than spawning processes
+    monkeypatch.setattr(hasher, "start", lambda: None)
+
+    def slow_hash(password):
+        time.sleep(0.05)
+        return f"hashed-{password}"
+
+    monkeypatch.setattr(hashing, "get_password_hash", slow_hash)
+    started = time.perf_counter()
+    hashed = await hasher.hash_many([f"password{i}" for i in range(8)])
+
+    assert hashed == [f"hashed-password{i}" for i in range(8)]
+    assert hasher.stats()["peak_in_flight"] == 4
+    # Two rounds of four, not eight hashes one after another
+    assert time.perf_counter() - started < 0.3
+
+@pytest.mark.asyncio
+async def test_password_hasher_hash_many_reports_busy_per_password():
+    hasher = PasswordHasher(workers=0, max_pending=0)
+
+    # A login holds the only slot, so the batch's passwords are rejected one by one
+    login, hashed = await asyncio.gather(hasher.hash("login"), hasher.hash_many(["one", "two"]))
+    assert isinstance(login, str)
+    assert all(isinstance(h, PasswordHasherBusy) for h in hashed)
+    assert hasher.stats()["rejected"] == 2
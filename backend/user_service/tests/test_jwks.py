@@ -0,0 +1,132 @@
+from datetime import timedelta
+
+import httpx
+import pytest
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from jose import jwt
+from jose.exceptions import JWTError
+
+import app.main
+from app.core import security
+from app.core.keys import KeyRing
+from app.core.jwks_verifier import JWKSVerifier
+
+def _private_pem() -> str:
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    return key.private_bytes(
+        serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+    ).decode()
+
+@pytest.fixture(scope="module")
+def pems():
+    return {"2026-01": _private_pem(), "2026-02": _private_pem()}
+
+@pytest.fixture
+def rotated_ring(pems, monkeypatch):
+    """Both keys loaded, signing with the newer one."""
+    ring = KeyRing("RS256", pems, active_kid="2026-02")
+    monkeypatch.setattr(security, "key_ring", ring)
+    monkeypatch.setattr(app.main, "key_ring", ring)
+    return ring
+
+def test_key_ring_verifies_tokens_signed_before_rotation(pems):
+    old_ring = KeyRing("RS256", {"2026-01": pems["2026-01"]}, active_kid="2026-01")
+    token = old_ring.sign({"sub": "user"})
+
+    ring = KeyRing("RS256", pems, active_kid="2026-02")
+    assert ring.verify(token) == {"sub": "user"}
+    assert jwt.get_unverified_header(ring.sign({"sub": "user"}))["kid"] == "2026-02"
+
+    # Once the old key is dropped its tokens are rejected
+    with pytest.raises(JWTError):
+        KeyRing("RS256", {"2026-02": pems["2026-02"]}, active_kid="2026-02").verify(token)
+
+def test_key_ring_from_directory_and_bad_config(pems, tmp_path):
+    for kid, pem in pems.items():
+        (tmp_path / f"{kid}.pem").write_text(pem)
+    (tmp_path / "README").write_text("not a key")
+    ring = KeyRing.from_directory("RS256", str(tmp_path), "2026-01")
+    assert ring.kids == ["2026-01", "2026-02"]
+
+    with pytest.raises(ValueError):
+        KeyRing("RS256", pems, active_kid="missing")
+    with pytest.raises(ValueError):
+        KeyRing("HS256", pems, active_kid="2026-01")
+    public_pem = ring._public_keys["2026-01"].to_pem().decode()
+    with pytest.raises(ValueError):
+        KeyRing("RS256", {"public": public_pem}, active_kid="public")
+
+def test_security_signs_with_key_ring(rotated_ring):
+    token = security.create_access_token({"sub": "user", "role": "tenant"})
+    assert jwt.get_unverified_header(token)["alg"] == "RS256"
+    assert security.decode_token(token)["sub"] == "user"
+
+    expired = security.create_access_token({"sub": "user"}, expires_delta=timedelta(seconds=-1))
+    assert security.decode_token(expired) is None
+    assert security.decode_token("not-a-jwt") is None
+
+@pytest.mark.asyncio
+async def test_jwks_endpoint_publishes_public_keys_only(rotated_ring):
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app.main.app), base_url="http://test") as client:
+        response = await client.get("/.well-known/jwks.json")
+    assert response.status_code == 200
+    assert response.headers["cache-control"] == "public, max-age=300"
+    keys = response.json()["keys"]
+    assert [key["kid"] for key in keys] == ["2026-01", "2026-02"]
+    assert all(key["kty"] == "RSA" and key["use"] == "sig" and "d" not in key for key in keys)
+
+@pytest.mark.asyncio
+async def test_jwks_endpoint_404_with_shared_secret(monkeypatch):
+    monkeypatch.setattr(app.main, "key_ring", None)
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app.main.app), base_url="http://test") as client:
+        response = await client.get("/.well-known/jwks.json")
+    assert response.status_code == 404
+
+@pytest.mark.asyncio
+async def test_verifier_caches_keys_and_refetches_on_rotation(pems, monkeypatch):
+    ring = KeyRing("RS256", {"2026-01": pems["2026-01"]}, active_kid="2026-01")
+    monkeypatch.setattr(app.main, "key_ring", ring)
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app.main.app), base_url="http://test") as client:
+        verifier = JWKSVerifier("/.well-known/jwks.json", min_refresh_seconds=0, client=client)
+
+        token = ring.sign({"sub": "user", "token_use": "access"})
+        assert await verifier.verify(token) == {"sub": "user", "token_use": "access"}
+        assert await verifier.verify(token) == {"sub": "user", "token_use": "access"}
+        assert verifier.fetches == 1
+
+        # A key rotated in after the first fetch is picked up on first sight
+        rotated = KeyRing("RS256", pems, active_kid="2026-02")
+        monkeypatch.setattr(app.main, "key_ring", rotated)
+        assert await verifier.verify(rotated.sign({"sub": "other", "token_use": "access"})) == {"sub": "other", "token_use": "access"}
+        assert verifier.fetches == 2
+
+        # Symmetric or tampered tokens never verify
+        assert await verifier.verify(jwt.encode({"sub": "user", "token_use": "access"}, "secret", algorithm="HS256")) is None
+        assert await verifier.verify(token[:-4] + "AAAA") is None
+        assert verifier.fetches == 2
+
+@pytest.mark.asyncio
+async def test_verifier_rate_limits_refetch_for_unknown_kids(pems, monkeypatch):
+    ring = KeyRing("RS256", {"2026-01": pems["2026-01"]}, active_kid="2026-01")
+    monkeypatch.setattr(app.main, "key_ring", ring)
+    forged = KeyRing("RS256", {"forged": pems["2026-02"]}, active_kid="forged")
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app.main.app), base_url="http://test") as client:
+        verifier = JWKSVerifier("/.well-known/jwks.json", min_refresh_seconds=60, client=client)
+        assert await verifier.verify(ring.sign({"sub": "user", "token_use": "access"})) is not None
+        for _ in range(3):
+            assert await verifier.verify(forged.sign({"sub": "user", "token_use": "access"})) is None
+        assert verifier.fetches == 1
+
+@pytest.mark.asyncio
+async def test_verifier_rejects_refresh_tokens(rotated_ring):
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app.main.app), base_url="http://test") as client:
+        verifier = JWKSVerifier("/.well-known/jwks.json", client=client)
+
+        access = security.create_access_token({"sub": "user", "role": "tenant"})
+        refresh = security.create_refresh_token({"sub": "user", "ver": 0})
+        assert (await verifier.verify(access))["token_use"] == "access"
+        # Same key and a valid signature, but not an access credential
+        assert await verifier.verify(refresh) is None
+        # Nor is a token without the claim
+        assert await verifier.verify(rotated_ring.sign({"sub": "user"})) is None
@@ -0,0 +1,66 @@
+import base64
+import json
+from datetime import datetime, timedelta
+
+import pytest
+from jose.exceptions import ExpiredSignatureError, JWTError
+
+from app.core.jwt_backends import JWTBackend, available_backends, create_backend
+
+SECRET = "backend-test-secret-" + "x" * 32
+
+def _claims(**overrides) -> dict:
+    claims = {"sub": "user", "role": "tenant", "ver": 0, "exp": datetime.utcnow() + timedelta(minutes=5)}
+    claims.update(overrides)
+    return claims
+
+@pytest.mark.parametrize("signer", available_backends())
+@pytest.mark.parametrize("verifier", available_backends())
+def test_tokens_interchangeable_between_backends(signer, verifier):
+    token = create_backend(signer, "HS256", SECRET).sign(_claims())
+    claims = create_backend(verifier, "HS256", SECRET).verify(token)
+    assert claims["sub"] == "user"
+    assert isinstance(claims["exp"], int)
+
+@pytest.mark.parametrize("name", available_backends())
+def test_backends_reject_bad_tokens(name):
+    backend = create_backend(name, "HS256", SECRET)
+    token = backend.sign(_claims())
+
+    with pytest.raises(JWTError):
+        create_backend(name, "HS256", SECRET + "other").verify(token)
+    with pytest.raises(JWTError):
+        backend.verify(token[:-4] + "AAAA")
+    with pytest.raises(JWTError):
+        backend.verify("not-a-jwt")
+    with pytest.raises(ExpiredSignatureError):
+        backend.verify(backend.sign(_claims(exp=datetime.utcnow() - timedelta(seconds=5))))
+    with pytest.raises(JWTError):
+        backend.verify(backend.sign(_claims(nbf=datetime.utcnow() + timedelta(minutes=5))))
+
+def test_hmac_backend_requires_its_algorithm_in_header():
+    backend = create_backend("hmac", "HS256", SECRET)
+    _, payload, signature = backend.sign(_claims()).split(".")
+    for alg in ("none", "HS512"):
+        header = base64.urlsafe_b64encode(json.dumps({"alg": alg}).encode()).rstrip(b"=").decode()
+        with pytest.raises(JWTError):
+            backend.verify(f"{header}.{payload}.{signature}")
+
+    # Another header naming HS256 is parsed, then fails as the signature covers the header
+    header = base64.urlsafe_b64encode(b'{"typ":"JWT","alg":"HS256","kid":"a"}').rstrip(b"=").decode()
+    with pytest.raises(JWTError, match="Signature verification failed"):
+        backend.verify(f"{header}.{payload}.{signature}")
+
+def test_unknown_backend_or_algorithm():
+    with pytest.raises(ValueError):
+        create_backend("fastest", "HS256", SECRET)
+    with pytest.raises(ValueError):
+        create_backend("hmac", "RS256", SECRET)
+
+def test_backend_must_implement_sign_and_verify():
+    class SignOnly(JWTBackend):
+        def sign(self, claims):
+            return ""
+
+    with pytest.raises(TypeError):
+        SignOnly("HS256", SECRET)
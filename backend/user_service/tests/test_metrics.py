@@ -0,0 +1,50 @@
+import pytest
+from httpx import AsyncClient
+
+from app.core.metrics import MetricsRegistry
+
+def test_registry_renders_text_exposition_format():
+    registry = MetricsRegistry()
+    requests = registry.counter("requests_total", "Requests.", ("route",))
+    latency = registry.histogram("latency_seconds", "Latency.", buckets=(0.1, 1.0))
+    registry.gauge("queue_depth", "Queue depth.", callback=lambda: 7)
+
+    requests.inc(route="/a")
+    requests.inc(route="/a")
+    requests.inc(route='/b"c')
+    latency.observe(0.05)
+    latency.observe(0.5)
+    latency.observe(3.0)
+
+    assert registry.render().splitlines() == [
+        "# HELP requests_total Requests.",
+        "# TYPE requests_total counter",
+        'requests_total{route="/a"} 2',
+        'requests_total{route="/b\\"c"} 1',
+        "# HELP latency_seconds Latency.",
+        "# TYPE latency_seconds histogram",
+        'latency_seconds_bucket{le="0.1"} 1',
+        'latency_seconds_bucket{le="1.0"} 2',
+        'latency_seconds_bucket{le="+Inf"} 3',
+        "latency_seconds_sum 3.55",
+        "latency_seconds_count 3",
+        "# HELP queue_depth Queue depth.",
+        "# TYPE queue_depth gauge",
+        "queue_depth 7",
+    ]
+
+def test_registry_rejects_duplicate_names():
+    registry = MetricsRegistry()
+    registry.counter("requests_total", "Requests.")
+    with pytest.raises(ValueError):
+        registry.counter("requests_total", "Requests.")
+
+@pytest.mark.asyncio
+async def test_metrics_endpoint_records_routes(client: AsyncClient):
+    await client.post("/api/v1/auth/login", data={"username": "nobody@example.com", "password": "wrong"})
+
+    response = await client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    assert 'http_requests_total{method="POST",route="/api/v1/auth/login",status="401"}' in response.text
+    assert "email_queue_depth" in response.text
@@ -0,0 +1,135 @@
+import pytest
+from sqlalchemy.exc import TimeoutError
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.db.pool import InstrumentedPool, PoolMonitor
+
+@pytest.fixture(scope="function")
+async def pooled_engine(tmp_path):
+    engine = create_async_engine(
+        f"sqlite+aiosqlite:///{tmp_path / 'pool.db'}",
+        poolclass=InstrumentedPool,
+        pool_size=2,
+        max_overflow=4
+    )
+    yield engine, PoolMonitor(engine)
+    await engine.dispose()
+
+@pytest.mark.asyncio
+async def test_pool_monitor_records_checkouts(pooled_engine):
+    engine, monitor = pooled_engine
+
+    async with engine.connect() as first, engine.connect() as second, engine.connect() as third:
+        stats = monitor.stats()
+        assert stats["in_use"] == 3
+        assert stats["overflow"] == 1
+
+    stats = monitor.stats()
+    assert stats["in_use"] == 0
+    assert stats["checkouts"] == 3
+    assert stats["connects"] == 3
+    assert stats["peak_in_use"] == 3
+    assert stats["checkout_wait_seconds"]["max"] >= stats["checkout_wait_seconds"]["p50"] > 0
+
+@pytest.mark.asyncio
+async def test_adaptive_sizing_follows_peak_concurrency(pooled_engine):
+    engine, monitor = pooled_engine
+
+    async with engine.connect(), engine.connect(), engine.connect(), engine.connect():
+        pass
+    # Two of the four were closed as surplus on check-in
+    assert monitor.pool.checkedin() == 2
+    monitor.adapt(min_size=1, max_size=6)
+    assert monitor.stats()["size"] == 4
+    # The total connection cap is unchanged
+    assert monitor.pool.size() == 6
+
+    # Four connections are now kept open instead of closing two as surplus
+    async with engine.connect(), engine.connect(), engine.connect(), engine.connect():
+        pass
+    assert monitor.pool.checkedin() == 4
+
+    # A quiet interval shrinks the pool back down
+    monitor.adapt(min_size=1, max_size=6)
+    async with engine.connect():
+        pass
+    monitor.adapt(min_size=1, max_size=6)
+    assert monitor.stats()["size"] == 1
+    assert monitor.resizes == 2
+    assert monitor.pool.size() == 6
+
+@pytest.mark.asyncio
+async def test_resize_keeps_warm_connections(pooled_engine):
+    engine, monitor = pooled_engine
+
+    async with engine.connect() as held:
+        async with engine.connect(), engine.connect():
+            pass
+        monitor.adapt(min_size=1, max_size=6)
+        assert monitor.stats()["size"] == 3
+        # Idle connections opened before the resize are reused, not reopened
+        async with engine.connect(), engine.connect():
+            pass
+        assert (await held.exec_driver_sql("SELECT 1")).scalar() == 1
+    assert monitor.stats()["connects"] == 3
+    assert monitor.pool.checkedin() == 3
+
+@pytest.mark.asyncio
+async def test_pool_shrinks_only_after_consecutive_quiet_windows(pooled_engine):
+    engine, monitor = pooled_engine
+
+    async def busy(connections: int):
+        conns = [await engine.connect() for _ in range(connections)]
+        for conn in conns:
+            await conn.close()
+
+    await busy(5)
+    monitor.adapt(min_size=1, max_size=6, shrink_after=3)
+    assert monitor.stats()["size"] == 5
+
+    # A dip that recovers within three windows keeps the pool as it is
+    for connections in (1, 2, 5):
+        await busy(connections)
+        monitor.adapt(min_size=1, max_size=6, shrink_after=3)
+    assert monitor.stats()["size"] == 5
+
+    # Three quiet windows in a row shrink it to the busiest of them
+    for connections in (2, 3, 1):
+        await busy(connections)
+        monitor.adapt(min_size=1, max_size=6, shrink_after=3)
+    assert monitor.stats()["size"] == 3
+    assert monitor.resizes == 2
+
+@pytest.mark.asyncio
+async def test_connection_cap_holds_across_resizes(tmp_path):
+    engine = create_async_engine(
+        f"sqlite+aiosqlite:///{tmp_path / 'cap.db'}",
+        poolclass=InstrumentedPool,
+        pool_size=2,
+        max_overflow=4,
+        pool_timeout=0.01
+    )
+    monitor = PoolMonitor(engine)
+
+    conns = [await engine.connect() for _ in range(6)]
+    monitor.adapt(min_size=1, max_size=6)
+    with pytest.raises(TimeoutError):
+        await engine.connect()
+    for conn in conns:
+        await conn.close()
+    assert monitor.stats()["in_use"] == 0
+    assert monitor.pool.checkedin() == 6
+    await engine.dispose()
+
+@pytest.mark.asyncio
+async def test_liveness_check_pings_idle_connections(pooled_engine):
+    engine, monitor = pooled_engine
+
+    async with engine.connect(), engine.connect():
+        pass
+    await monitor.check_liveness()
+
+    stats = monitor.stats()
+    assert stats["liveness_failures"] == 0
+    assert stats["checkouts"] == 4
+    assert stats["connects"] == 2
@@ -0,0 +1,116 @@
+import asyncio
+import threading
+import time
+import uuid
+
+import pytest
+from starlette.requests import Request
+
+from app.core.profiling import RequestProfiler, StackSampler
+from app.core.security import create_access_token
+from app.crud import create_user, get_user_token_version
+from app.models.user import UserRole
+from app.schemas.user import UserCreate
+
+def _busy(seconds: float) -> None:
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pass
+
+def _request(headers: dict) -> Request:
+    return Request({
+        "type": "http",
+        "method": "GET",
+        "path": "/",
+        "headers": [(k.lower().encode(), v.encode()) for k, v in headers.items()],
+    })
+
+def _loader(session_factory):
+    async def load_version(user_id):
+        async with session_factory() as db:
+            return await get_user_token_version(db, user_id)
+    return load_version
+
+def test_stack_sampler_collects_collapsed_stacks():
+    sampler = StackSampler(threading.get_ident(), interval=0.001).start()
+    _busy(0.1)
+    stacks = sampler.stop()
+
+    assert sum(stacks.values()) > 10
+    assert any("_busy (test_profiling.py" in stack.split(";")[-1] for stack in stacks)
+
+@pytest.mark.asyncio
+async def test_request_profiler_aggregates_per_route():
+    profiler = RequestProfiler(sample_rate=1.0, interval_ms=1, header="X-Profile")
+
+    for _ in range(2):
+        assert await profiler.should_profile(_request({}), load_version=None)
+        sampler = profiler.start()
+        # Only one request is profiled at a time
+        assert not await profiler.should_profile(_request({}), load_version=None)
+        _busy(0.05)
+        profiler.finish(sampler, "/api/v1/auth/login")
+
+    summary = profiler.summary()["routes"]["/api/v1/auth/login"]
+    assert summary["requests"] == 2
+    assert summary["samples"] > 10
+
+    lines = profiler.collapsed().splitlines()
+    assert all(line.startswith("/api/v1/auth/login;") for line in lines)
+    assert sum(int(line.rsplit(" ", 1)[1]) for line in lines) == summary["samples"]
+    assert not profiler.collapsed("/api/v1/auth/login").startswith("/api/v1/auth/login;")
+
+    profiler.clear()
+    assert profiler.collapsed() == ""
+
+@pytest.mark.asyncio
+async def test_request_profiler_honours_admin_header_only(test_db, test_session_factory):
+    profiler = RequestProfiler(sample_rate=0.0, interval_ms=1, header="X-Profile")
+    admin = await create_user(test_db, user=UserCreate(email="profiler@example.com", password="pass", full_name="Profiler", role=UserRole.ADMIN))
+    admin_token = create_access_token({"sub": str(admin.id), "role": "admin", "ver": admin.token_version})
+    tenant_token = create_access_token({"sub": str(admin.id), "role": "tenant", "ver": admin.token_version})
+
+    async def flagged(headers: dict) -> bool:
+        return await profiler.should_profile(_request(headers), _loader(test_session_factory))
+
+    assert await flagged({"X-Profile": "1", "Authorization": f"Bearer {admin_token}"})
+    assert not await flagged({"X-Profile": "1", "Authorization": f"Bearer {tenant_token}"})
+    assert not await flagged({"Authorization": f"Bearer {admin_token}"})
+    assert not await flagged({"X-Profile": "1"})
+
+@pytest.mark.asyncio
+async def test_request_profiler_ignores_revoked_admin_token(test_db, test_session_factory):
+    profiler = RequestProfiler(sample_rate=0.0, interval_ms=1, header="X-Profile")
+    admin = await create_user(test_db, user=UserCreate(email="revoked@example.com", password="pass", full_name="Revoked", role=UserRole.ADMIN))
+    revoked_token = create_access_token({"sub": str(admin.id), "role": "admin", "ver": admin.token_version - 1})
+
+    assert not await profiler.should_profile(
+        _request({"X-Profile": "1", "Authorization": f"Bearer {revoked_token}"}), _loader(test_session_factory)
+    )
+
+@pytest.mark.asyncio
+async def test_request_profiler_claims_before_version_lookup():
+    profiler = RequestProfiler(sample_rate=0.0, interval_ms=1, header="X-Profile")
+    admin_id = uuid.uuid4()
+    token = create_access_token({"sub": str(admin_id), "role": "admin", "ver": 0})
+    headers = {"X-Profile": "1", "Authorization": f"Bearer {token}"}
+    lookup_started = asyncio.Event()
+    release = asyncio.Event()
+
+    async def slow_version(user_id):
+        lookup_started.set()
+        await release.wait()
+        return 0
+
+    first = asyncio.create_task(profiler.should_profile(_request(headers), slow_version))
+    await lookup_started.wait()
+    # Another request arriving during the lookup is not profiled alongside it
+    assert not await profiler.should_profile(_request(headers), slow_version)
+    release.set()
+    assert await first
+
+    # A request that is not flagged releases its claim
+    sampler = profiler.start()
+    profiler.finish(sampler, "/")
+    assert not await profiler.should_profile(_request({}), slow_version)
+    assert not profiler._active
@@ -0,0 +1,66 @@
+import json
+import pytest
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.db.query_log import QueryLog, current_request_scope, fingerprint
+
+def test_fingerprint_ignores_values_and_list_lengths():
+    assert fingerprint(
+        "SELECT users.id FROM users\n  WHERE users.id IN ($1::UUID, $2::UUID) LIMIT $3::INTEGER"
+    ) == fingerprint(
+        "SELECT users.id FROM users WHERE users.id IN ($1::UUID, $2::UUID, $3::UUID) LIMIT $4::INTEGER"
+    ) == "SELECT users.id FROM users WHERE users.id IN (...) LIMIT ?::INTEGER"
+    assert fingerprint("SELECT 1 WHERE a = 'x''y'") == "SELECT ? WHERE a = ?"
+    assert fingerprint(
+        "INSERT INTO users (id, email) VALUES ($1::UUID, $2::VARCHAR), ($3::UUID, $4::VARCHAR)"
+    ) == "INSERT INTO users (id, email) VALUES (...)"
+
+def test_query_log_histograms_and_slow_log(capsys):
+    log = QueryLog(slow_threshold_ms=100)
+    scope = {"method": "GET", "path": "/api/v1/users/me", "route": None}
+
+    log.record("SELECT * FROM users WHERE id = $1", 3.0, scope)
+    log.record("SELECT  *  FROM users WHERE id = $1", 150.0, scope)
+    log.record("SELECT * FROM refresh_tokens", 0.5)
+
+    stats = log.stats()
+    assert stats["fingerprints"] == 2
+    assert stats["slow_queries"] == 1
+
+    users = stats["top"][0]
+    assert users["statement"] == "SELECT * FROM users WHERE id = ?"
+    assert users["count"] == 2
+    assert users["max_ms"] == 150.0
+    assert users["histogram_ms"]["5"] == 1
+    assert users["histogram_ms"]["250"] == 1
+    assert users["routes"] == {"GET /api/v1/users/me": {"count": 2, "total_ms": 153.0}}
+    assert stats["top"][1]["routes"] == {"-": {"count": 1, "total_ms": 0.5}}
+
+    # Only the slow statement is logged, and without parameters
+    lines = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    assert lines == [{
+        "event": "slow_query",
+        "duration_ms": 150.0,
+        "route": "GET /api/v1/users/me",
+        "statement": "SELECT * FROM users WHERE id = ?",
+    }]
+
+@pytest.mark.asyncio
+async def test_query_log_times_engine_statements():
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    log = QueryLog(slow_threshold_ms=10_000)
+    log.install(engine.sync_engine)
+    current_request_scope.set({"method": "POST", "path": "/api/v1/auth/login"})
+
+    async with engine.connect() as conn:
+        await conn.execute(text("SELECT 1"))
+        await conn.execute(text("SELECT 2"))
+        with pytest.raises(Exception):
+            await conn.execute(text("SELECT * FROM missing_table"))
+    await engine.dispose()
+
+    top = log.stats()["top"]
+    assert len(top) == 1
+    assert top[0]["statement"] == "SELECT ?"
+    assert top[0]["routes"]["POST /api/v1/auth/login"]["count"] == 2
@@ -0,0 +1,185 @@
+import uuid
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import select, text, update
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+from app.db.base import Base
+from app.db.routing import ReplicaSet, RoutingSession
+from app.models.user import User, UserRole
+from app.core.security import decode_token, get_password_hash
+from app.core.token_versions import TokenVersionCache
+from app.crud import get_user, get_user_token_version, get_user_token_versions
+from app.routers.auth import login
+
+# Two schemas in the test database stand in for the primary and a replica.
+# They are not replicating, so a row inserted into only one of them shows
+# which server served a read. Both are created for this module only and
+# dropped afterwards; the shared test schema is never touched.
+
+def _user(email: str, **fields) -> User:
+    fields.setdefault("password", get_password_hash("password"))
+    return User(
+        email=email,
+        full_name="Replica Test",
+        role=UserRole.TENANT,
+        phone_number="1234567890",
+        **fields
+    )
+
+def _search_path(schema: str) -> dict:
+    return {"server_settings": {"search_path": schema}}
+
+@pytest.fixture(scope="function")
+async def routed(test_database_url, test_schema):
+    prefix = test_schema or "test"
+    primary_schema, replica_schema = f"{prefix}_routing_primary", f"{prefix}_routing_replica"
+    admin = create_async_engine(test_database_url)
+    async with admin.begin() as conn:
+        for schema in (primary_schema, replica_schema):
+            await conn.execute(text(f'CREATE SCHEMA IF NOT EXISTS "{schema}"'))
+
+    primary = create_async_engine(test_database_url, connect_args=_search_path(primary_schema))
+    replicas = ReplicaSet.from_urls(
+        [test_database_url], max_lag_seconds=5, retry_after_seconds=30,
+        connect_args=_search_path(replica_schema)
+    )
+    for engine in [primary, *replicas.engines]:
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+
+    class TestRoutingSession(RoutingSession):
+        replica_set = replicas
+
+    factory = sessionmaker(
+        primary, class_=AsyncSession, sync_session_class=TestRoutingSession, expire_on_commit=False
+    )
+    try:
+        yield factory, primary, replicas
+    finally:
+        await replicas.stop()
+        await primary.dispose()
+        async with admin.begin() as conn:
+            for schema in (primary_schema, replica_schema):
+                await conn.execute(text(f'DROP SCHEMA IF EXISTS "{schema}" CASCADE'))
+        await admin.dispose()
+
+async def _insert(engine, email: str, **fields):
+    async with sessionmaker(engine, class_=AsyncSession)() as session:
+        session.add(_user(email, **fields))
+        await session.commit()
+
+@pytest.mark.asyncio
+async def test_selects_are_served_by_replica(routed):
+    factory, primary, replicas = routed
+    await _insert(replicas.engines[0], "replica-only@example.com")
+
+    async with factory() as session:
+        result = await session.execute(select(User).where(User.email == "replica-only@example.com"))
+        assert result.scalars().first() is not None
+
+@pytest.mark.asyncio
+async def test_reads_after_write_go_to_primary(routed):
+    factory, primary, replicas = routed
+    await _insert(primary, "primary@example.com")
+
+    async with factory() as session:
+        # Not on the replica yet
+        result = await session.execute(select(User).where(User.email == "primary@example.com"))
+        assert result.scalars().first() is None
+
+        await session.execute(
+            update(User).where(User.email == "primary@example.com").values(full_name="Updated")
+        )
+        result = await session.execute(select(User).where(User.email == "primary@example.com"))
+        assert result.scalars().first().full_name == "Updated"
+        await session.commit()
+
+@pytest.mark.asyncio
+async def test_unhealthy_replica_falls_back_to_primary(routed):
+    factory, primary, replicas = routed
+    await _insert(primary, "fallback@example.com")
+    replicas.mark_unhealthy(0)
+
+    async with factory() as session:
+        result = await session.execute(select(User).where(User.email == "fallback@example.com"))
+        assert result.scalars().first() is not None
+
+@pytest.mark.asyncio
+async def test_health_check_marks_replica_healthy(routed):
+    factory, primary, replicas = routed
+    replicas.mark_unhealthy(0)
+
+    await replicas.check_health()
+    assert replicas.stats()["replicas"] == [{"index": 0, "healthy": True, "lag_seconds": 0.0}]
+
+def test_replicas_chosen_round_robin():
+    # Engines connect lazily; these URLs are never dialed
+    replicas = ReplicaSet.from_urls(
+        ["postgresql+asyncpg://replica-a/rent_db", "postgresql+asyncpg://replica-b/rent_db"],
+        max_lag_seconds=5, retry_after_seconds=30
+    )
+    first, second = (engine.sync_engine for engine in replicas.engines)
+    assert [replicas.choose() for _ in range(4)] == [first, second, first, second]
+
+    replicas.mark_unhealthy(0)
+    assert [replicas.choose() for _ in range(2)] == [second, second]
+
+    replicas.mark_unhealthy(1)
+    assert replicas.choose() is None
+
+@pytest.mark.asyncio
+async def test_lagging_replica_cannot_unrevoke_token(routed):
+    factory, primary, replicas = routed
+    # The primary has the bumped version; the replica has not replayed it yet
+    user_id = uuid.uuid4()
+    await _insert(primary, "revoked@example.com", id=user_id, token_version=1)
+    await _insert(replicas.engines[0], "revoked@example.com", id=user_id, token_version=0)
+    token_version_in_token = 0
+
+    async with factory() as session:
+        stale = await session.execute(select(User.token_version).where(User.id == user_id))
+        assert stale.scalar_one() == 0  # plain reads still go to the replica
+
+        cache = TokenVersionCache(ttl_seconds=60, max_entries=10)
+        current = await cache.get(user_id, lambda uid: get_user_token_version(session, uid))
+        assert current == 1 != token_version_in_token
+        assert await get_user_token_versions(session, [user_id]) == {user_id: 1}
+
+        # Per-statement routing: the session itself is not pinned
+        assert not session.info.get("use_primary")
+
+@pytest.mark.asyncio
+async def test_user_loaded_for_write_comes_from_primary(routed):
+    factory, primary, replicas = routed
+    user_id = uuid.uuid4()
+    await _insert(primary, "writer@example.com", id=user_id, token_version=3)
+    await _insert(replicas.engines[0], "writer@example.com", id=user_id, token_version=2)
+
+    async with factory() as session:
+        user = await get_user(session, user_id, fresh=True)
+        assert user.token_version == 3
+        user.token_version += 1
+        await session.commit()
+
+    async with sessionmaker(primary, class_=AsyncSession)() as session:
+        assert (await session.get(User, user_id)).token_version == 4
+
+@pytest.mark.asyncio
+async def test_login_after_password_change_on_lagging_replica(routed):
+    factory, primary, replicas = routed
+    # The primary has the new password and bumped version; the replica has neither
+    user_id = uuid.uuid4()
+    await _insert(primary, "changed@example.com", id=user_id, token_version=1,
+                  password=get_password_hash("new-password"))
+    await _insert(replicas.engines[0], "changed@example.com", id=user_id, token_version=0)
+
+    async with factory() as session:
+        tokens = await login(db=session, form_data=SimpleNamespace(username="changed@example.com", password="new-password"))
+        await session.commit()
+
+    # Both tokens carry the primary's version, so their first use is accepted
+    assert decode_token(tokens["access_token"])["ver"] == 1
+    assert decode_token(tokens["refresh_token"])["ver"] == 1
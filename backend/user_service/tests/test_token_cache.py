@@ -0,0 +1,62 @@
+from datetime import timedelta
+
+from app.core import security, token_cache
+from app.core.security import create_access_token, decode_token
+from app.core.token_cache import VerifiedTokenCache
+
+def test_decode_token_served_from_cache(monkeypatch):
+    cache = VerifiedTokenCache(max_entries=10)
+    monkeypatch.setattr(security, "verified_token_cache", cache)
+    token = create_access_token({"sub": "user", "role": "tenant"})
+
+    payload = decode_token(token)
+    assert payload["sub"] == "user"
+    assert cache.stats()["misses"] == 1
+
+    # Callers get a copy; mutating it does not change the cached payload
+    payload["role"] = "admin"
+    assert decode_token(token)["role"] == "tenant"
+    assert cache.stats()["hits"] == 1
+
+    # A tampered token is never answered from the cache
+    assert decode_token(token[:-4] + "AAAA") is None
+    assert cache.stats() == {"size": 1, "max_entries": 10, "hits": 1, "misses": 2, "hit_rate": 0.3333}
+
+def test_expired_and_invalid_tokens_not_cached(monkeypatch):
+    cache = VerifiedTokenCache(max_entries=10)
+    monkeypatch.setattr(security, "verified_token_cache", cache)
+    expired = create_access_token({"sub": "user"}, expires_delta=timedelta(seconds=-1))
+
+    assert decode_token(expired) is None
+    assert decode_token("invalidtoken") is None
+    assert cache.stats()["size"] == 0
+
+def test_entries_expire_at_token_exp(monkeypatch):
+    cache = VerifiedTokenCache(max_entries=10)
+    now = 1_000_000.0
+    monkeypatch.setattr(token_cache.time, "time", lambda: now)
+
+    cache.store("token", {"sub": "user", "exp": now + 60})
+    assert cache.get("token") == {"sub": "user", "exp": now + 60}
+
+    now += 60
+    assert cache.get("token") is None
+    assert cache.stats()["size"] == 0
+
+def test_least_recently_used_entry_evicted():
+    cache = VerifiedTokenCache(max_entries=2)
+    exp = 2 ** 40
+    cache.store("first", {"sub": "1", "exp": exp})
+    cache.store("second", {"sub": "2", "exp": exp})
+    assert cache.get("first") is not None
+    cache.store("third", {"sub": "3", "exp": exp})
+
+    assert cache.get("second") is None
+    assert cache.get("first") is not None
+    assert cache.get("third") is not None
+
+def test_disabled_cache_stores_nothing():
+    cache = VerifiedTokenCache(max_entries=0)
+    cache.store("token", {"sub": "user", "exp": 2 ** 40})
+    assert cache.get("token") is None
+    assert cache.stats()["size"] == 0
@@ -0,0 +1,61 @@
+import uuid
+import pytest
+
+from app.core.token_versions import TokenVersionCache
+
+@pytest.mark.asyncio
+async def test_token_version_cache_hits_after_first_load():
+    cache = TokenVersionCache(ttl_seconds=60, max_entries=10)
+    user_id = uuid.uuid4()
+    calls = []
+
+    async def loader(uid):
+        calls.append(uid)
+        return 3
+
+    assert await cache.get(user_id, loader) == 3
+    assert await cache.get(user_id, loader) == 3
+    assert calls == [user_id]
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+@pytest.mark.asyncio
+async def test_token_version_cache_invalidate_and_eviction():
+    cache = TokenVersionCache(ttl_seconds=60, max_entries=2)
+    versions = {}
+
+    async def loader(uid):
+        return versions.get(uid)
+
+    first, second, third = uuid.uuid4(), uuid.uuid4(), uuid.uuid4()
+    versions[first] = 0
+    assert await cache.get(first, loader) == 0
+
+    # A bumped version is picked up once the entry is invalidated
+    versions[first] = 1
+    cache.invalidate(first)
+    assert await cache.get(first, loader) == 1
+
+    # Missing users are cached as None; the oldest entry is evicted past max_entries
+    assert await cache.get(second, loader) is None
+    await cache.get(third, loader)
+    assert cache.stats()["size"] == 2
+
+@pytest.mark.asyncio
+async def test_token_version_cache_get_many_loads_misses_together():
+    cache = TokenVersionCache(ttl_seconds=60, max_entries=10)
+    cached, active, missing = uuid.uuid4(), uuid.uuid4(), uuid.uuid4()
+    cache.set(cached, 2)
+    calls = []
+
+    async def loader(uids):
+        calls.append(uids)
+        return {active: 0}
+
+    versions = await cache.get_many([cached, active, missing, active], loader)
+    assert versions == {cached: 2, active: 0, missing: None}
+    assert calls == [[active, missing]]
+
+    # Now all cached, including the missing user
+    assert await cache.get_many([active, missing], loader) == {active: 0, missing: None}
+    assert len(calls) == 1
@@ -0,0 +1,75 @@
+import time
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.user_cache import InMemoryUserCacheBackend, UserCache, UserCacheBackend, user_cache
+from app.crud import create_user
+from app.models.user import UserRole
+from app.schemas.user import UserCreate
+
+def test_user_cache_backend_hit_miss_counters():
+    backend = InMemoryUserCacheBackend(ttl_seconds=60, max_entries=10)
+    assert backend.get("user:id:1") is None
+    backend.set("user:id:1", {"email": "one@example.com"})
+    assert backend.get("user:id:1") == {"email": "one@example.com"}
+
+    stats = backend.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["hit_rate"] == 0.5
+
+def test_user_cache_backend_lru_eviction():
+    backend = InMemoryUserCacheBackend(ttl_seconds=60, max_entries=2)
+    backend.set("a", 1)
+    backend.set("b", 2)
+    backend.get("a")  # "b" is now least recently used
+    backend.set("c", 3)
+
+    assert backend.get("b") is None
+    assert backend.get("a") == 1
+    assert backend.get("c") == 3
+    assert backend.stats()["evictions"] == 1
+
+def test_user_cache_backend_ttl_expiry(monkeypatch):
+    backend = InMemoryUserCacheBackend(ttl_seconds=5, max_entries=10)
+    backend.set("a", 1)
+
+    now = time.monotonic()
+    monkeypatch.setattr(time, "monotonic", lambda: now + 10)
+    assert backend.get("a") is None
+    assert backend.stats()["size"] == 0
+
+def test_user_cache_backend_delete():
+    backend = InMemoryUserCacheBackend(ttl_seconds=60, max_entries=10)
+    backend.set("a", 1)
+    backend.delete("a")
+    assert backend.get("a") is None
+
+def test_user_cache_ttl_capped_at_token_version_ttl():
+    assert user_cache.max_age_seconds <= settings.TOKEN_VERSION_CACHE_TTL_SECONDS
+    if user_cache.backend is not None:
+        assert user_cache.backend.ttl_seconds <= settings.TOKEN_VERSION_CACHE_TTL_SECONDS
+
+@pytest.mark.asyncio
+async def test_user_cache_ignores_snapshots_older_than_max_age(test_db: AsyncSession, monkeypatch):
+    user = await create_user(test_db, user=UserCreate(email="aged@example.com", password="pass", full_name="Aged", role=UserRole.TENANT))
+    # A shared backend may keep entries for longer than we allow
+    cache = UserCache(InMemoryUserCacheBackend(ttl_seconds=3600, max_entries=10), max_age_seconds=30)
+    cache.store(user)
+    test_db.expunge(user)
+    cached = await cache.get_by_id(test_db, user.id)
+    assert cached is not None
+    test_db.expunge(cached)
+
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now + 31)
+    assert await cache.get_by_id(test_db, user.id) is None
+
+def test_user_cache_backend_requires_storage_methods():
+    class Incomplete(UserCacheBackend):
+        def get(self, key):
+            return None
+
+    with pytest.raises(TypeError):
+        Incomplete()